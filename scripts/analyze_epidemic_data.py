@@ -3,92 +3,117 @@
 """
 香港各区疫情数据分析脚本
 读取并分析香港各区疫情数据_20250322.xlsx文件
+数据分块流式读取，文件大于内存时同样可用
 """
 
-import pandas as pd
-import numpy as np
+import argparse
 import os
 
-def read_epidemic_data(file_path):
+from streaming_loader import DEFAULT_CHUNKSIZE, DescriptiveStats, Head, MissingCounts, aggregate
+
+def read_epidemic_data(file_path, chunksize=DEFAULT_CHUNKSIZE):
     """
-    读取香港各区疫情数据Excel文件
-    
+    分块读取香港各区疫情数据文件，一遍读取完成所有统计
+
     Args:
-        file_path (str): Excel文件路径
-        
+        file_path (str): Excel/CSV文件路径
+        chunksize (int): 每块行数
+
     Returns:
-        pandas.DataFrame: 疫情数据
+        dict: 数据概况（rows, columns, dtypes, missing, head, describe）
     """
     try:
-        # 读取Excel文件
         print(f"正在读取文件: {file_path}")
-        df = pd.read_excel(file_path)
-        print(f"数据读取成功！数据形状: {df.shape}")
-        return df
+        missing = MissingCounts()
+        head = Head(20)
+        # 统计第一个数据块中的全部数值列
+        stats = DescriptiveStats()
+        rows = aggregate(file_path, [missing, head, stats], chunksize)
+        if head.result() is None:
+            print("读取文件时出错: 文件中没有数据")
+            return None
+
+        profile = {
+            'rows': rows,
+            'columns': list(missing.dtypes.index),
+            'dtypes': missing.dtypes,
+            'missing': missing.result(),
+            'head': head.result(),
+            'describe': stats.result(),
+        }
+        print(f"数据读取成功！数据形状: {(rows, len(profile['columns']))}")
+        return profile
     except Exception as e:
         print(f"读取文件时出错: {e}")
         return None
 
-def analyze_data_structure(df):
+def analyze_data_structure(profile):
     """
     分析数据结构
-    
+
     Args:
-        df (pandas.DataFrame): 数据框
+        profile (dict): read_epidemic_data返回的数据概况
     """
+    shape = (profile['rows'], len(profile['columns']))
     print("\n=== 数据结构分析 ===")
-    print(f"数据形状: {df.shape}")
-    print(f"列数: {df.shape[1]}")
-    print(f"行数: {df.shape[0]}")
-    
+    print(f"数据形状: {shape}")
+    print(f"列数: {shape[1]}")
+    print(f"行数: {shape[0]}")
+
     print("\n=== 列名信息 ===")
-    for i, col in enumerate(df.columns):
+    for i, col in enumerate(profile['columns']):
         print(f"{i+1}. {col}")
-    
+
     print("\n=== 数据类型 ===")
-    print(df.dtypes)
-    
+    print(profile['dtypes'])
+
     print("\n=== 缺失值统计 ===")
-    missing_data = df.isnull().sum()
+    missing_data = profile['missing']
     print(missing_data[missing_data > 0])
 
-def display_first_20_rows(df):
+def display_first_20_rows(head):
     """
     显示前20行数据
-    
+
     Args:
-        df (pandas.DataFrame): 数据框
+        head (pandas.DataFrame): 前20行数据
     """
     print("\n=== 前20行数据 ===")
-    print(df.head(20))
-    
+    print(head)
+
     print("\n=== 前20行数据详细信息 ===")
-    print(df.head(20).to_string())
+    print(head.to_string())
 
 def main():
     """
     主函数
     """
+    parser = argparse.ArgumentParser(description='香港各区疫情数据分析')
+    parser.add_argument('file_path', nargs='?', default="香港各区疫情数据_20250322.xlsx",
+                        help='数据文件路径（xlsx/csv或列式.npy目录）')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='每次读取的行数')
+    args = parser.parse_args()
+
     # 文件路径
-    file_path = "香港各区疫情数据_20250322.xlsx"
-    
+    file_path = args.file_path
+
     # 检查文件是否存在
     if not os.path.exists(file_path):
         print(f"错误: 文件 {file_path} 不存在！")
         return
-    
+
     # 读取数据
-    df = read_epidemic_data(file_path)
-    
-    if df is not None:
+    profile = read_epidemic_data(file_path, args.chunksize)
+
+    if profile is not None:
         # 分析数据结构
-        analyze_data_structure(df)
-        
+        analyze_data_structure(profile)
+
         # 显示前20行数据
-        display_first_20_rows(df)
-        
+        display_first_20_rows(profile['head'])
+
         print("\n=== 数据概览 ===")
-        print(df.describe())
+        print(profile['describe'])
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大屏API负载与延迟基准测试
+按真实数据的12列结构生成放大的合成数据集（以180天×18区为基准，天数、地区数倍增），分别启动服务器，
+用并发客户端压测各 /api/* 接口，输出p50/p95/p99延迟、吞吐量、内存占用和冷启动耗时（JSON），
+并可对比两次结果、标出性能退化
+
+用法：
+    python3 scripts/benchmark_api.py run --output results.json
+    python3 scripts/benchmark_api.py run --scale 1:1 --scale 100:1 --concurrency 16 --duration 10
+    python3 scripts/benchmark_api.py compare baseline.json results.json --threshold 0.1
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'src', 'backend')
+
+# 1倍规模对应真实数据的天数和地区数
+BASE_DAYS = 180
+BASE_REGIONS = 18
+
+# 压测的接口（按顺序逐个压测）
+ROUTES = [
+    '/api/summary_stats',
+    '/api/daily_trend',
+    '/api/regional_comparison',
+    '/api/risk_distribution',
+    '/api/monthly_statistics',
+    '/api/dashboard',
+    '/api/stats',
+    '/api/data_quality',
+    '/api/rolling_metrics',
+    '/api/risk_timeline/current',
+    '/api/risk_timeline/transitions',
+    '/api/daily_trend?regions=中西区,湾仔区',
+    '/api/daily_trend?format=columnar',
+    '/api/region/中西区/series',
+    '/api/region_series?format=columnar',
+]
+
+# 默认的数据规模（天数倍数:地区倍数）
+DEFAULT_SCALES = ['1:1', '10:1', '100:1', '1:10']
+
+# 启动服务器的命令，{port}/{workers}在运行时替换
+SERVERS = {
+    'prefork': [sys.executable, 'start_dashboard.py', '--host', '127.0.0.1', '--port', '{port}',
+                '--workers', '{workers}'],
+    'gevent': [sys.executable, 'src/backend/async_server.py', '--host', '127.0.0.1', '--port', '{port}'],
+}
+
+# 对比时参与退化判断的指标：(指标名, 数值越大越好)
+LATENCY_METRICS = [('p50_ms', False), ('p95_ms', False), ('p99_ms', False), ('throughput_rps', True)]
+SCENARIO_METRICS = [('cold_start_s', False), ('warm_start_s', False), ('rss_mb', False), ('pss_mb', False)]
+
+
+def free_port():
+    """获取一个空闲端口"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def request(conn, path):
+    """发送一个GET请求并读完响应，返回状态码"""
+    conn.request('GET', quote(path, safe='/?=&,'), headers={'Accept-Encoding': 'gzip'})
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+def wait_ready(port, proc, timeout):
+    """轮询直到服务器返回数据，返回从启动到就绪的耗时（秒）"""
+    start = time.perf_counter()
+    deadline = start + timeout
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"服务器进程已退出（返回码 {proc.returncode}）")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+            if request(conn, '/api/summary_stats') == 200:
+                conn.close()
+                return time.perf_counter() - start
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"服务器在{timeout}秒内没有就绪")
+
+
+def process_tree(pid):
+    """返回pid及其所有子孙进程（读取/proc，仅Linux）"""
+    parents = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # 进程名可能含空格，ppid位于最后一个')'之后的第二个字段
+                    parents[int(entry)] = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+    tree, frontier = [pid], [pid]
+    while frontier:
+        children = [p for p, ppid in parents.items() if ppid in frontier]
+        tree.extend(children)
+        frontier = children
+    return tree
+
+
+def memory_usage(pid):
+    """
+    服务器进程树的内存占用（MB）
+
+    rss为各进程常驻内存之和（共享页面被重复计算），
+    pss按共享进程数分摊共享页面，更能反映多进程时的实际占用。
+    """
+    if not os.path.isdir('/proc'):
+        return None, None
+    rss = pss = 0
+    for p in process_tree(pid):
+        try:
+            with open(f"/proc/{p}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith('Rss:'):
+                        rss += int(line.split()[1])
+                    elif line.startswith('Pss:'):
+                        pss += int(line.split()[1])
+        except OSError:
+            continue
+    return round(rss / 1024, 1), round(pss / 1024, 1)
+
+
+def start_server(args, port, env):
+    """启动服务器子进程，返回(进程, 就绪耗时)"""
+    command = [part.format(port=port, workers=args.workers) for part in SERVERS[args.server]]
+    proc = subprocess.Popen(command, cwd=project_root, env=env, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL, start_new_session=True)
+    try:
+        return proc, wait_ready(port, proc, args.startup_timeout)
+    except Exception:
+        stop_server(proc)
+        raise
+
+
+def stop_server(proc):
+    """停止服务器子进程（含工作进程）"""
+    if proc.poll() is None:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+
+
+def load_route(port, path, concurrency, duration):
+    """
+    用concurrency个持久连接的客户端在duration秒内反复请求同一个接口
+
+    Returns:
+        dict: 请求数、错误数、吞吐量和延迟分位数（毫秒）
+    """
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    start_barrier = threading.Barrier(concurrency + 1)
+    stop_at = [0.0]
+
+    def client(i):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        start_barrier.wait()
+        samples = latencies[i]
+        while time.perf_counter() < stop_at[0]:
+            t0 = time.perf_counter()
+            try:
+                ok = request(conn, path) == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                ok = False
+            if ok:
+                samples.append(time.perf_counter() - t0)
+            else:
+                errors[i] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    stop_at[0] = time.perf_counter() + duration
+    begin = time.perf_counter()
+    start_barrier.wait()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - begin
+
+    samples = np.concatenate([np.asarray(s) for s in latencies]) * 1000
+    result = {'requests': int(samples.size), 'errors': int(sum(errors)),
+              'throughput_rps': round(samples.size / elapsed, 1)}
+    if samples.size:
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        result.update({'mean_ms': round(float(samples.mean()), 3), 'p50_ms': round(float(p50), 3),
+                       'p95_ms': round(float(p95), 3), 'p99_ms': round(float(p99), 3),
+                       'max_ms': round(float(samples.max()), 3)})
+    return result
+
+
+def run_scenario(args, scale, workdir):
+    """生成一个规模的数据集，启动服务器并压测所有接口"""
+    from synthetic_data import generate, write_dataset
+
+    days_factor, region_factor = (int(x) for x in scale.split(':'))
+    name = f"days{days_factor}x_regions{region_factor}x"
+    print(f"\n📦 {name}: 生成合成数据...", file=sys.stderr)
+    df = generate(BASE_DAYS * days_factor, BASE_REGIONS * region_factor, seed=args.seed)
+    # CSV比xlsx写入快得多，后端同样支持
+    data_path = os.path.join(workdir, f"{name}.csv")
+    write_dataset(df, data_path)
+
+    env = dict(os.environ,
+               DASHBOARD_DATA_PATH=data_path,
+               DASHBOARD_INGEST_DIR=os.path.join(workdir, f"{name}-ingested"),
+               DASHBOARD_CACHE_DIR=os.path.join(workdir, 'cache'),
+               PYTHONUNBUFFERED='1')
+    scenario = {
+        'name': name,
+        'days_factor': days_factor,
+        'region_factor': region_factor,
+        'rows': len(df),
+        'days': int(df['报告日期'].nunique()),
+        'regions': int(df['地区名称'].nunique()),
+    }
+
+    # 冷启动：列式缓存不存在，需要解析源文件；热启动：直接内存映射缓存
+    for label in ('cold_start_s', 'warm_start_s'):
+        port = free_port()
+        proc, ready = start_server(args, port, env)
+        scenario[label] = round(ready, 3)
+        if label == 'cold_start_s':
+            stop_server(proc)
+
+    try:
+        routes = {}
+        for path in ROUTES:
+            print(f"   ⏱  {path}", file=sys.stderr)
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            t0 = time.perf_counter()
+            status = request(conn, path)
+            first_ms = round((time.perf_counter() - t0) * 1000, 3)
+            conn.close()
+            if status != 200:
+                routes[path] = {'status': status, 'first_ms': first_ms}
+                continue
+            routes[path] = dict(load_route(port, path, args.concurrency, args.duration), first_ms=first_ms)
+        scenario['rss_mb'], scenario['pss_mb'] = memory_usage(proc.pid)
+        scenario['routes'] = routes
+    finally:
+        stop_server(proc)
+    return scenario
+
+
+def git_commit():
+    """当前代码的git提交（用于标识结果）"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    """执行基准测试并输出JSON结果"""
+    sys.path.insert(0, backend_path)
+    workdir = tempfile.mkdtemp(prefix='dashboard-bench-')
+    try:
+        scenarios = [run_scenario(args, scale, workdir) for scale in args.scale or DEFAULT_SCALES]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'server': args.server,
+            'workers': args.workers if args.server == 'prefork' else 1,
+            'concurrency': args.concurrency,
+            'duration_s': args.duration,
+            'seed': args.seed,
+        },
+        'scenarios': scenarios,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"\n✅ 结果已保存到 {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+def is_regression(metric, higher_is_better, old, new, threshold, min_delta_ms):
+    """判断某个指标是否退化（相对变化超过阈值；延迟还需超过最小绝对差，避免噪声）"""
+    if old is None or new is None or old == 0:
+        return False
+    change = (new - old) / old
+    if higher_is_better:
+        return change < -threshold
+    if metric.endswith('_ms') and new - old < min_delta_ms:
+        return False
+    return change > threshold
+
+
+def compare(args):
+    """对比两次结果，列出退化的指标；有退化时返回码为1"""
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = {s['name']: s for s in json.load(f)['scenarios']}
+    with open(args.current, encoding='utf-8') as f:
+        current = {s['name']: s for s in json.load(f)['scenarios']}
+
+    rows = []
+    for name, new in current.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        checks = [(None, metric, better, old.get(metric), new.get(metric)) for metric, better in SCENARIO_METRICS]
+        for path, new_route in new.get('routes', {}).items():
+            old_route = old.get('routes', {}).get(path, {})
+            checks += [(path, metric, better, old_route.get(metric), new_route.get(metric))
+                       for metric, better in LATENCY_METRICS]
+        for path, metric, better, old_value, new_value in checks:
+            if old_value is None or new_value is None:
+                continue
+            rows.append({
+                'scenario': name,
+                'route': path,
+                'metric': metric,
+                'baseline': old_value,
+                'current': new_value,
+                'change': round((new_value - old_value) / old_value, 4) if old_value else None,
+                'regression': is_regression(metric, better, old_value, new_value,
+                                            args.threshold, args.min_delta_ms),
+            })
+
+    regressions = [r for r in rows if r['regression']]
+    if args.json:
+        print(json.dumps({'threshold': args.threshold, 'regressions': regressions, 'comparisons': rows},
+                         ensure_ascii=False, indent=2))
+    else:
+        print("=" * 90)
+        print(f"基准测试对比（退化阈值 {args.threshold:.0%}）")
+        print("=" * 90)
+        for r in rows:
+            mark = '❌' if r['regression'] else '  '
+            change = f"{r['change']:+.1%}" if r['change'] is not None else '-'
+            print(f"{mark} {r['scenario']:<22} {r['route'] or '-':<38} {r['metric']:<15} "
+                  f"{r['baseline']:>10} → {r['current']:<10} {change}")
+        print("-" * 90)
+        print(f"共 {len(rows)} 项指标，{len(regressions)} 项退化")
+    return 1 if regressions else 0
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='大屏API负载与延迟基准测试')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = sub.add_parser('run', help='运行基准测试')
+    run_parser.add_argument('--scale', action='append',
+                            help=f"数据规模，格式为 天数倍数:地区倍数，可重复（默认 {' '.join(DEFAULT_SCALES)}）")
+    run_parser.add_argument('--seed', type=int, default=0, help='合成数据的随机种子（对比时应保持一致）')
+    run_parser.add_argument('--server', choices=sorted(SERVERS), default='prefork', help='服务器模式')
+    run_parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='prefork工作进程数')
+    run_parser.add_argument('--concurrency', type=int, default=8, help='并发客户端数')
+    run_parser.add_argument('--duration', type=float, default=5.0, help='每个接口的压测时长（秒）')
+    run_parser.add_argument('--startup-timeout', type=float, default=600.0, help='等待服务器就绪的最长时间（秒）')
+    run_parser.add_argument('--output', help='结果JSON文件路径（默认输出到标准输出）')
+
+    compare_parser = sub.add_parser('compare', help='对比两次基准测试结果')
+    compare_parser.add_argument('baseline', help='基线结果JSON')
+    compare_parser.add_argument('current', help='当前结果JSON')
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help='相对退化阈值（默认10%%）')
+    compare_parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                                help='延迟至少增加多少毫秒才算退化（过滤噪声）')
+    compare_parser.add_argument('--json', action='store_true', help='以JSON格式输出对比结果')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == '__main__':
+    main()
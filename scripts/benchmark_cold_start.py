@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据加载冷启动基准测试
+对比直接解析Excel与读取列式二进制缓存两种方式的冷启动耗时
+每次测量都在全新的Python子进程中进行，包含模块导入时间
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'src', 'backend')
+
+# 子进程中执行的测量代码：输出加载耗时（秒）
+EXCEL_SNIPPET = """
+import time
+start = time.perf_counter()
+import pandas as pd
+df = pd.read_excel({path!r})
+df['报告日期'] = pd.to_datetime(df['报告日期'])
+print(time.perf_counter() - start)
+"""
+
+CACHE_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {backend!r})
+from data_cache import load_dataframe
+df = load_dataframe({path!r})
+print(time.perf_counter() - start)
+"""
+
+
+def measure(snippet, repeat):
+    """在独立子进程中重复执行测量代码，返回每次耗时列表"""
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-c', snippet],
+                                capture_output=True, text=True, check=True)
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def summarize(timings):
+    """汇总耗时统计"""
+    return {
+        'median_s': round(statistics.median(timings), 4),
+        'min_s': round(min(timings), 4),
+        'max_s': round(max(timings), 4),
+        'runs': len(timings),
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='对比Excel解析与列式缓存的冷启动耗时')
+    parser.add_argument('--data', default=os.path.join(project_root, 'data', '香港各区疫情数据_20250322.xlsx'),
+                        help='Excel数据文件路径')
+    parser.add_argument('--repeat', type=int, default=5, help='每种方式的测量次数')
+    parser.add_argument('--json', action='store_true', help='以JSON格式输出结果')
+    args = parser.parse_args()
+
+    sys.path.insert(0, backend_path)
+    from data_cache import build_cache
+    build_cache(args.data)
+
+    excel = summarize(measure(EXCEL_SNIPPET.format(path=args.data), args.repeat))
+    cache = summarize(measure(CACHE_SNIPPET.format(backend=backend_path, path=args.data), args.repeat))
+    report = {
+        'data': os.path.basename(args.data),
+        'excel': excel,
+        'columnar_cache': cache,
+        'speedup': round(excel['median_s'] / cache['median_s'], 2),
+    }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    print("=" * 60)
+    print("数据加载冷启动基准测试")
+    print("=" * 60)
+    print(f"数据文件: {report['data']}  (每种方式 {args.repeat} 次)")
+    print(f"{'方式':<12} {'中位数(秒)':<12} {'最小(秒)':<10} {'最大(秒)':<10}")
+    print("-" * 60)
+    for name, stats in [('Excel解析', excel), ('列式缓存', cache)]:
+        print(f"{name:<12} {stats['median_s']:<12} {stats['min_s']:<10} {stats['max_s']:<10}")
+    print("-" * 60)
+    print(f"加速比: {report['speedup']}x")
+
+
+if __name__ == '__main__':
+    main()
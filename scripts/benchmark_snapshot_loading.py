@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多快照并行加载基准测试
+用合成数据生成一组按日期命名的数据快照（每个快照包含截至当天的全部历史，相邻快照互相重叠），
+分别用1、2、4……个进程解析并合并，输出耗时、加速比和并行效率
+
+解析xlsx是纯CPU计算，各快照之间没有依赖，加速比应接近进程数（不超过CPU核数和快照数）；
+合并去重只在主进程中执行一次，是不可并行的部分
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'src', 'backend')
+sys.path.insert(0, backend_path)
+
+from snapshot_loader import discover_snapshot_files, load_snapshot_files
+from synthetic_data import generate, write_dataset
+
+
+def make_snapshots(workdir, count, days, regions, fmt, seed):
+    """
+    生成count个快照文件：第i个快照覆盖前 days-count+1+i 天，文件名日期为覆盖的最后一天
+
+    Returns:
+        list: 按日期排列的快照文件路径
+    """
+    df = generate(days, regions, seed=seed)
+    dates = df['报告日期'].drop_duplicates().reset_index(drop=True)
+    for i in range(count):
+        last = dates[days - count + i]
+        path = os.path.join(workdir, f"香港各区疫情数据_{last.strftime('%Y%m%d')}.{fmt}")
+        write_dataset(df[df['报告日期'] <= last], path)
+    return [path for _, path in discover_snapshot_files(workdir)]
+
+
+def worker_counts(limit):
+    """1, 2, 4, ... 直到limit（包含limit本身）"""
+    counts = []
+    n = 1
+    while n < limit:
+        counts.append(n)
+        n *= 2
+    counts.append(limit)
+    return counts
+
+
+def measure(paths, workers, repeat):
+    """不使用缓存，重复解析合并全部快照，返回每次耗时和合并后的行数"""
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = load_snapshot_files(paths, workers, cache_root=None)
+        timings.append(time.perf_counter() - start)
+        rows = len(df)
+    return timings, rows
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='测试多快照并行加载的加速比')
+    parser.add_argument('--snapshots', type=int, default=8, help='快照文件数')
+    parser.add_argument('--days', type=int, default=180, help='最新快照覆盖的天数')
+    parser.add_argument('--regions', type=int, default=18, help='地区数')
+    parser.add_argument('--format', choices=['xlsx', 'csv'], default='xlsx', help='快照文件格式')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1, help='最多测试的进程数')
+    parser.add_argument('--repeat', type=int, default=3, help='每种进程数的测量次数')
+    parser.add_argument('--seed', type=int, default=0, help='合成数据随机种子')
+    parser.add_argument('--json', action='store_true', help='以JSON格式输出结果')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='snapshot-bench-')
+    try:
+        paths = make_snapshots(workdir, args.snapshots, args.days, args.regions, args.format, args.seed)
+        input_rows = sum(args.days - args.snapshots + 1 + i for i in range(args.snapshots)) * args.regions
+
+        results = []
+        for workers in worker_counts(min(args.max_workers, args.snapshots)):
+            timings, rows = measure(paths, workers, args.repeat)
+            results.append({'workers': workers, 'median_s': round(statistics.median(timings), 4),
+                            'min_s': round(min(timings), 4), 'rows': rows})
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = results[0]['median_s']
+    for result in results:
+        result['speedup'] = round(baseline / result['median_s'], 2)
+        result['efficiency'] = round(result['speedup'] / result['workers'], 2)
+    report = {
+        'snapshots': args.snapshots,
+        'format': args.format,
+        'input_rows': input_rows,
+        'merged_rows': results[0]['rows'],
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    print("=" * 60)
+    print("多快照并行加载基准测试")
+    print("=" * 60)
+    print(f"{args.snapshots}个{args.format}快照，共{input_rows:,}行，合并后{report['merged_rows']:,}行"
+          f"（CPU核数 {report['cpu_count']}，每种进程数 {args.repeat} 次）")
+    print(f"{'进程数':<8} {'中位数(秒)':<12} {'最小(秒)':<10} {'加速比':<8} {'并行效率':<8}")
+    print("-" * 60)
+    for result in results:
+        print(f"{result['workers']:<8} {result['median_s']:<12} {result['min_s']:<10} "
+              f"{result['speedup']:<8} {result['efficiency']:<8}")
+    if (os.cpu_count() or 1) < args.snapshots:
+        print("-" * 60)
+        print(f"⚠️ CPU核数少于快照数，进程数超过 {os.cpu_count()} 后不会继续加速")
+
+
+if __name__ == '__main__':
+    main()
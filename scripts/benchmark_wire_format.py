@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+响应格式基准测试
+在不同历史长度的合成数据上，对比时间序列接口（每日趋势、滚动窗口指标）的JSON与列式二进制格式：
+    响应大小（原始 / gzip）
+    解析耗时：Python（json.loads / wire_format.decode），
+             以及安装了Node.js时前端的解析耗时（TextDecoder+JSON.parse / decodeColumnar，另计日期转标签）
+
+用法：
+    python3 scripts/benchmark_wire_format.py
+    python3 scripts/benchmark_wire_format.py --scale 3650:18 --scale 36500:18 --json
+"""
+
+import argparse
+import gzip
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'src', 'backend')
+decoder_path = os.path.join(project_root, 'src', 'frontend', 'js', 'columnar.js')
+
+# 默认的数据规模（天数:地区数）
+DEFAULT_SCALES = ['180:18', '3650:18', '36500:18']
+
+# Node.js中执行的测量代码：参数为 JSON文件 列式文件 重复次数，输出各方式的耗时中位数（毫秒）
+NODE_SNIPPET = """
+const fs = require('fs');
+const { decodeColumnar, dayLabels } = require(process.argv[1]);
+const [jsonPath, binPath, repeat] = [process.argv[2], process.argv[3], Number(process.argv[4])];
+const toArrayBuffer = b => b.buffer.slice(b.byteOffset, b.byteOffset + b.length);
+const jsonBuffer = toArrayBuffer(fs.readFileSync(jsonPath));
+const binBuffer = toArrayBuffer(fs.readFileSync(binPath));
+function median(fn) {
+    const times = [];
+    for (let i = 0; i < repeat; i++) {
+        const start = process.hrtime.bigint();
+        fn();
+        times.push(Number(process.hrtime.bigint() - start) / 1e6);
+    }
+    times.sort((a, b) => a - b);
+    return times[Math.floor(times.length / 2)];
+}
+console.log(JSON.stringify({
+    json_ms: median(() => JSON.parse(new TextDecoder().decode(jsonBuffer))),
+    columnar_ms: median(() => decodeColumnar(binBuffer)),
+    columnar_labels_ms: median(() => dayLabels(decodeColumnar(binBuffer).dates))
+}));
+"""
+
+
+def median_ms(fn, repeat):
+    """重复执行fn，返回耗时中位数（毫秒）"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def node_parse_times(json_body, columnar_body, repeat, workdir):
+    """用Node.js测量前端解码耗时，未安装Node.js时返回None"""
+    node = shutil.which('node')
+    if node is None:
+        return None
+    json_path = os.path.join(workdir, 'payload.json')
+    bin_path = os.path.join(workdir, 'payload.bin')
+    with open(json_path, 'wb') as f:
+        f.write(json_body)
+    with open(bin_path, 'wb') as f:
+        f.write(columnar_body)
+    result = subprocess.run([node, '-e', NODE_SNIPPET, decoder_path, json_path, bin_path, str(repeat)],
+                            capture_output=True, text=True, check=True)
+    return {k: round(v, 3) for k, v in json.loads(result.stdout).items()}
+
+
+def measure_payload(payload, repeat, workdir):
+    """一个响应的两种格式的大小和解析耗时"""
+    from wire_format import decode, encode
+
+    json_body = (json.dumps(payload, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+    columnar_body = encode(payload)
+    report = {
+        'points': len(payload['dates']),
+        'json_bytes': len(json_body),
+        'columnar_bytes': len(columnar_body),
+        'json_gzip_bytes': len(gzip.compress(json_body, compresslevel=6, mtime=0)),
+        'columnar_gzip_bytes': len(gzip.compress(columnar_body, compresslevel=6, mtime=0)),
+        'python_json_ms': median_ms(lambda: json.loads(json_body), repeat),
+        'python_columnar_ms': median_ms(lambda: decode(columnar_body), repeat),
+    }
+    report['browser'] = node_parse_times(json_body, columnar_body, repeat, workdir)
+    return report
+
+
+def run_scale(days, regions, repeat, workdir):
+    """在一种数据规模上测量各时间序列接口"""
+    from aggregates import AggregateCube
+    from synthetic_data import generate
+
+    cube = AggregateCube.from_frame(generate(days, regions))
+    payloads = {
+        '/api/daily_trend': cube.daily_trend(),
+        '/api/rolling_metrics': cube.rolling_metrics(),
+    }
+    return {route: measure_payload(payload, repeat, workdir) for route, payload in payloads.items()}
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='对比时间序列接口JSON与列式二进制格式的大小和解析耗时')
+    parser.add_argument('--scale', action='append', metavar='DAYS:REGIONS',
+                        help=f"数据规模，可重复指定（默认 {' '.join(DEFAULT_SCALES)}）")
+    parser.add_argument('--repeat', type=int, default=20, help='每种解析方式的测量次数')
+    parser.add_argument('--json', action='store_true', help='以JSON格式输出结果')
+    args = parser.parse_args()
+
+    sys.path.insert(0, backend_path)
+    workdir = tempfile.mkdtemp(prefix='wire_format_')
+    try:
+        report = {}
+        for scale in args.scale or DEFAULT_SCALES:
+            days, regions = (int(v) for v in scale.split(':'))
+            report[scale] = run_scale(days, regions, args.repeat, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    print("=" * 96)
+    print("时间序列响应格式基准测试（JSON / 列式二进制）")
+    print("=" * 96)
+    print(f"{'规模':<10} {'接口':<22} {'点数':>7} {'大小(字节)':>18} {'gzip后':>16} "
+          f"{'Python解析(ms)':>18} {'浏览器解析(ms)':>18}")
+    print("-" * 96)
+    for scale, routes in report.items():
+        for route, r in routes.items():
+            browser = r['browser']
+            browser_text = (f"{browser['json_ms']:>8} / {browser['columnar_ms']:<8}" if browser else 'Node.js未安装')
+            print(f"{scale:<10} {route:<22} {r['points']:>7} "
+                  f"{r['json_bytes']:>8} / {r['columnar_bytes']:<8} "
+                  f"{r['json_gzip_bytes']:>7} / {r['columnar_gzip_bytes']:<7} "
+                  f"{r['python_json_ms']:>8} / {r['python_columnar_ms']:<8} {browser_text}")
+    print("-" * 96)
+    print("浏览器解析：TextDecoder+JSON.parse / decodeColumnar（日期转为YYYY-MM-DD标签另需的时间见 --json 输出）")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,18 +3,39 @@
 """
 香港各区疫情数据详细分析脚本
 深入分析香港各区疫情数据_20250322.xlsx文件
+数据分块流式读取，所有统计在一遍读取中逐块累积
 """
 
-import pandas as pd
-import numpy as np
-from datetime import datetime
+import argparse
 
-def detailed_data_analysis():
+from streaming_loader import (DEFAULT_CHUNKSIZE, DescriptiveStats, Distinct, GroupFirst, Head,
+                              ValueCounts, aggregate)
+
+# 需要统计的数值列
+numeric_cols = ['新增确诊', '累计确诊', '现存确诊', '新增康复', '累计康复',
+               '新增死亡', '累计死亡', '发病率(每10万人)', '人口']
+
+def detailed_data_analysis(file_path="香港各区疫情数据_20250322.xlsx", chunksize=DEFAULT_CHUNKSIZE):
     """
     详细数据分析函数
+
+    Args:
+        file_path (str): 数据文件路径（xlsx/csv或列式.npy目录）
+        chunksize (int): 每次读取的行数
+
+    Returns:
+        pandas.DataFrame: 前20行数据
     """
-    # 读取数据
-    df = pd.read_excel("香港各区疫情数据_20250322.xlsx")
+    # 分块读取数据，一遍完成所有统计
+    dates = Distinct('报告日期')
+    regions_seen = Distinct('地区名称')
+    head = Head(20)
+    stats = DescriptiveStats(numeric_cols)
+    risk_counts = ValueCounts('风险等级')
+    populations = GroupFirst('地区名称', '人口')
+    rows = aggregate(file_path, [dates, regions_seen, head, stats, risk_counts, populations], chunksize)
+    all_dates = dates.result()
+    describe = stats.result()
     
     print("=" * 60)
     print("香港各区疫情数据详细分析报告")
@@ -22,14 +43,14 @@ def detailed_data_analysis():
     
     # 1. 基本信息
     print("\n1. 数据基本信息:")
-    print(f"   - 数据形状: {df.shape}")
-    print(f"   - 时间范围: {df['报告日期'].min()} 至 {df['报告日期'].max()}")
-    print(f"   - 包含地区数: {df['地区名称'].nunique()}")
-    print(f"   - 数据天数: {df['报告日期'].nunique()}")
+    print(f"   - 数据形状: {(rows, len(head.result().columns))}")
+    print(f"   - 时间范围: {min(all_dates):%Y-%m-%d} 至 {max(all_dates):%Y-%m-%d}")
+    print(f"   - 包含地区数: {len(regions_seen.result())}")
+    print(f"   - 数据天数: {len(all_dates)}")
     
     # 2. 地区信息
     print("\n2. 香港各区信息:")
-    regions = df['地区名称'].unique()
+    regions = regions_seen.result()
     for i, region in enumerate(regions, 1):
         print(f"   {i:2d}. {region}")
     
@@ -37,8 +58,10 @@ def detailed_data_analysis():
     print("\n3. 前20行数据详细分析:")
     print("-" * 40)
     
-    first_20 = df.head(20)
-    for idx, row in first_20.iterrows():
+    first_20 = head.result()
+    # 整列格式化日期后一次性转换为记录列表，不再逐行构造Series（iterrows）
+    records = first_20.assign(报告日期=first_20['报告日期'].dt.strftime('%Y-%m-%d')).to_dict('records')
+    for idx, row in enumerate(records):
         print(f"\n第{idx+1}行数据:")
         print(f"  报告日期: {row['报告日期']}")
         print(f"  地区名称: {row['地区名称']}")
@@ -57,30 +80,30 @@ def detailed_data_analysis():
     print("\n4. 数据特征分析:")
     print("-" * 40)
     
-    # 统计各列的基本信息
-    numeric_cols = ['新增确诊', '累计确诊', '现存确诊', '新增康复', '累计康复', 
-                   '新增死亡', '累计死亡', '发病率(每10万人)', '人口']
-    
+    # 统计各列的基本信息（读取时已单遍累积：Welford均值/方差，KLL草图估计中位数）
     for col in numeric_cols:
+        col_stats = describe[col]
+        # 整数列的最值按整数显示
+        as_type = int if first_20[col].dtype.kind in 'iu' else float
         print(f"\n{col}统计:")
-        print(f"  平均值: {df[col].mean():.2f}")
-        print(f"  中位数: {df[col].median():.2f}")
-        print(f"  最大值: {df[col].max()}")
-        print(f"  最小值: {df[col].min()}")
-        print(f"  标准差: {df[col].std():.2f}")
+        print(f"  平均值: {col_stats['mean']:.2f}")
+        print(f"  中位数: {col_stats['50%']:.2f}")
+        print(f"  最大值: {as_type(col_stats['max'])}")
+        print(f"  最小值: {as_type(col_stats['min'])}")
+        print(f"  标准差: {col_stats['std']:.2f}")
     
     # 5. 风险等级分布
     print("\n5. 风险等级分布:")
     print("-" * 40)
-    risk_distribution = df['风险等级'].value_counts()
+    risk_distribution = risk_counts.result()
     for risk_level, count in risk_distribution.items():
-        percentage = (count / len(df)) * 100
+        percentage = (count / rows) * 100
         print(f"  {risk_level}: {count} 条记录 ({percentage:.1f}%)")
     
     # 6. 地区人口分析
     print("\n6. 各地区人口分析:")
     print("-" * 40)
-    region_population = df.groupby('地区名称')['人口'].first().sort_values(ascending=False)
+    region_population = populations.result().sort_values(ascending=False)
     for region, population in region_population.items():
         print(f"  {region}: {population:,} 人")
     
@@ -88,7 +111,7 @@ def detailed_data_analysis():
     print("\n7. 疫情初期情况分析（基于前20行数据）:")
     print("-" * 40)
     
-    early_data = df.head(20)
+    early_data = first_20
     total_new_cases = early_data['新增确诊'].sum()
     total_cumulative_cases = early_data['累计确诊'].sum()
     regions_with_cases = early_data[early_data['新增确诊'] > 0]['地区名称'].unique()
@@ -99,7 +122,12 @@ def detailed_data_analysis():
     print(f"  - 有新增病例的地区: {', '.join(regions_with_cases)}")
     print(f"  - 所有地区风险等级均为: {early_data['风险等级'].unique()[0]}")
     
-    return df
+    return first_20
 
 if __name__ == "__main__":
-    df = detailed_data_analysis()
+    parser = argparse.ArgumentParser(description='香港各区疫情数据详细分析')
+    parser.add_argument('file_path', nargs='?', default="香港各区疫情数据_20250322.xlsx",
+                        help='数据文件路径（xlsx/csv或列式.npy目录）')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='每次读取的行数')
+    args = parser.parse_args()
+    detailed_data_analysis(args.file_path, args.chunksize)
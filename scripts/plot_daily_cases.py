@@ -3,28 +3,33 @@
 """
 香港每日疫情新增确诊人数可视化脚本
 绘制香港每日所有区域新增确诊人数的变化趋势图
+数据分块流式读取，逐块累加每日新增确诊
 """
 
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from datetime import datetime
 import numpy as np
 
+from streaming_loader import DEFAULT_CHUNKSIZE, GroupSum, aggregate
+
 # 设置中文字体支持
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans', 'PingFang SC']
 plt.rcParams['axes.unicode_minus'] = False
 
-def load_and_process_data():
+def load_and_process_data(file_path="香港各区疫情数据_20250322.xlsx", chunksize=DEFAULT_CHUNKSIZE):
     """
     加载并处理疫情数据
     """
     print("正在加载数据...")
-    df = pd.read_excel("香港各区疫情数据_20250322.xlsx")
+    # 按日期汇总所有区域的新增确诊人数（每读一块累加一次，不保留原始数据）
+    totals = GroupSum('报告日期', '新增确诊')
+    aggregate(file_path, [totals], chunksize)
     
     print("正在处理数据...")
-    # 按日期汇总所有区域的新增确诊人数
-    daily_cases = df.groupby('报告日期')['新增确诊'].sum().reset_index()
+    daily_cases = totals.result().reset_index()
     
     # 确保日期格式正确
     daily_cases['报告日期'] = pd.to_datetime(daily_cases['报告日期'])
@@ -35,7 +40,7 @@ def load_and_process_data():
     print(f"数据处理完成！共{len(daily_cases)}天的数据")
     return daily_cases
 
-def plot_daily_cases(daily_cases):
+def plot_daily_cases(daily_cases, show=False):
     """
     绘制香港每日新增确诊人数图表
     """
@@ -83,8 +88,10 @@ def plot_daily_cases(daily_cases):
     plt.savefig('香港每日疫情新增确诊人数.png', dpi=300, bbox_inches='tight')
     print("图表已保存为: 香港每日疫情新增确诊人数.png")
     
-    # 显示图表
-    plt.show()
+    # 只在需要时打开窗口（默认无界面运行，不阻塞；批量渲染请用 src/backend/chart_renderer.py）
+    if show:
+        plt.show()
+    plt.close()
 
 def create_detailed_analysis(daily_cases):
     """
@@ -108,12 +115,19 @@ def main():
     """
     主函数
     """
+    parser = argparse.ArgumentParser(description='绘制香港每日新增确诊趋势图')
+    parser.add_argument('file_path', nargs='?', default="香港各区疫情数据_20250322.xlsx",
+                        help='数据文件路径（xlsx/csv或列式.npy目录）')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='每次读取的行数')
+    parser.add_argument('--show', action='store_true', help='保存后打开图表窗口')
+    args = parser.parse_args()
+
     try:
         # 加载和处理数据
-        daily_cases = load_and_process_data()
+        daily_cases = load_and_process_data(args.file_path, args.chunksize)
         
         # 绘制图表
-        plot_daily_cases(daily_cases)
+        plot_daily_cases(daily_cases, show=args.show)
         
         # 创建详细分析
         create_detailed_analysis(daily_cases)
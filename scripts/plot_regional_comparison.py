@@ -3,61 +3,95 @@
 """
 香港各区疫情新增确诊人数对比可视化脚本
 绘制香港各区新增确诊人数的变化趋势对比图
+数据分块流式读取，逐块累积日期×地区新增确诊矩阵和各区统计；
+各区曲线由日期×地区矩阵一次画成一个LineCollection，地区很多时可只突出前N个地区或改用小多图
 """
 
+import argparse
+import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from datetime import datetime
 import numpy as np
 
+# 各区曲线和小多图使用后端的图表渲染模块
+backend_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from streaming_loader import DEFAULT_CHUNKSIZE, GroupFirst, GroupStats, GroupSum, aggregate
+from chart_renderer import SMALL_MULTIPLES_COLS, SMALL_MULTIPLES_MAX, region_lines, small_multiples
+
 # 设置中文字体支持
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans', 'PingFang SC']
 plt.rcParams['axes.unicode_minus'] = False
 
-def load_and_process_data():
+def load_and_process_data(file_path="香港各区疫情数据_20250322.xlsx", chunksize=DEFAULT_CHUNKSIZE):
     """
     加载并处理疫情数据
+
+    Returns:
+        tuple: (日期×地区的每日新增确诊矩阵, 各区新增确诊统计, 各区人口)
     """
     print("正在加载数据...")
-    df = pd.read_excel("香港各区疫情数据_20250322.xlsx")
+    # 逐块累积，内存占用只与日期数×地区数有关
+    daily = GroupSum(['报告日期', '地区名称'], '新增确诊')
+    regional = GroupStats('地区名称', '新增确诊')
+    population = GroupFirst('地区名称', '人口')
+    rows = aggregate(file_path, [daily, regional, population], chunksize)
     
     print("正在处理数据...")
-    # 确保日期格式正确
-    df['报告日期'] = pd.to_datetime(df['报告日期'])
-    
-    # 按日期和地区排序
-    df = df.sort_values(['报告日期', '地区名称'])
+    # 按日期和地区排序的日期×地区矩阵
+    daily_by_region = daily.result().unstack('地区名称').sort_index(axis=1)
     
-    print(f"数据处理完成！共{len(df)}条记录")
-    return df
+    print(f"数据处理完成！共{rows}条记录")
+    return daily_by_region, regional.result(), population.result()
+
+def plot_small_multiples(daily_by_region, top, show=False):
+    """
+    小多图：新增确诊最多的top个地区各占一个子图（共享坐标轴）
+    """
+    print("正在绘制各区小多图...")
+    regions = list(daily_by_region.columns)
+    n_shown = min(top, len(regions))
+    fig = plt.figure(figsize=(16, 2.4 * max(1, -(-n_shown // SMALL_MULTIPLES_COLS)) + 1))
+    small_multiples(fig, daily_by_region.index.to_numpy(), daily_by_region.to_numpy(), regions, limit=n_shown)
+    fig.suptitle(f'香港各区每日新增确诊人数（新增确诊最多的{n_shown}个地区）', fontsize=16, fontweight='bold')
+    fig.tight_layout(rect=(0, 0, 1, 0.97))
 
-def plot_regional_comparison(df):
+    plt.savefig('香港各区疫情新增确诊小多图.png', dpi=300, bbox_inches='tight')
+    print("图表已保存为: 香港各区疫情新增确诊小多图.png")
+
+    if show:
+        plt.show()
+    plt.close()
+
+def plot_regional_comparison(daily_by_region, show=False, top=None):
     """
     绘制香港各区新增确诊人数对比图表
+
+    Args:
+        daily_by_region (pandas.DataFrame): 日期×地区的每日新增确诊矩阵
+        show (bool): 保存后是否打开图表窗口
+        top (int): 只给新增确诊最多的top个地区着色并列入图例，None表示全部着色
     """
     print("正在绘制各区对比图表...")
     
     # 创建图表
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(16, 12))
     
-    # 获取所有地区
-    regions = df['地区名称'].unique()
-    
-    # 设置颜色
-    colors = plt.cm.Set3(np.linspace(0, 1, len(regions)))
-    
-    # 第一个子图：所有区域的趋势线
-    for i, region in enumerate(regions):
-        region_data = df[df['地区名称'] == region]
-        ax1.plot(region_data['报告日期'], region_data['新增确诊'], 
-                label=region, color=colors[i], linewidth=1.5, alpha=0.8)
+    # 第一个子图：所有区域的趋势线（一个LineCollection，不按地区逐条调用plot）
+    handles = region_lines(ax1, daily_by_region.index.to_numpy(), daily_by_region.to_numpy(),
+                           list(daily_by_region.columns), top=top)
     
     ax1.set_title('香港各区每日新增确诊人数变化趋势', fontsize=16, fontweight='bold', pad=20)
     ax1.set_xlabel('日期', fontsize=12, fontweight='bold')
     ax1.set_ylabel('新增确诊人数', fontsize=12, fontweight='bold')
     ax1.grid(True, alpha=0.3, linestyle='--')
-    ax1.legend(bbox_to_anchor=(1.05, 1), loc='upper left', fontsize=8)
+    ax1.set_ylim(bottom=0)
+    ax1.legend(handles=handles, bbox_to_anchor=(1.05, 1), loc='upper left', fontsize=8)
     
     # 设置x轴日期格式
     ax1.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
@@ -65,7 +99,7 @@ def plot_regional_comparison(df):
     plt.setp(ax1.xaxis.get_majorticklabels(), rotation=45)
     
     # 第二个子图：总体趋势
-    daily_total = df.groupby('报告日期')['新增确诊'].sum().reset_index()
+    daily_total = daily_by_region.sum(axis=1).rename('新增确诊').reset_index()
     ax2.plot(daily_total['报告日期'], daily_total['新增确诊'], 
              linewidth=3, color='#e74c3c', marker='o', markersize=2)
     
@@ -95,22 +129,24 @@ def plot_regional_comparison(df):
     plt.savefig('香港各区疫情新增确诊对比.png', dpi=300, bbox_inches='tight')
     print("图表已保存为: 香港各区疫情新增确诊对比.png")
     
-    # 显示图表
-    plt.show()
+    # 只在需要时打开窗口（默认无界面运行，不阻塞；批量渲染请用 src/backend/chart_renderer.py）
+    if show:
+        plt.show()
+    plt.close()
 
-def create_regional_summary(df):
+def create_regional_summary(regional, population):
     """
     创建各区疫情统计摘要
     """
     print("\n=== 香港各区疫情统计摘要 ===")
     
-    # 按地区统计
-    regional_stats = df.groupby('地区名称').agg({
-        '新增确诊': ['sum', 'mean', 'max'],
-        '人口': 'first'
-    }).round(2)
-    
-    regional_stats.columns = ['总新增确诊', '平均每日新增', '最高单日新增', '人口']
+    # 按地区统计（读取时已逐块累积）
+    regional_stats = pd.DataFrame({
+        '总新增确诊': regional['sum'],
+        '平均每日新增': regional['mean'],
+        '最高单日新增': regional['max'],
+        '人口': population,
+    }).sort_index().round(2)
     regional_stats = regional_stats.sort_values('总新增确诊', ascending=False)
     
     print("\n各区域疫情统计（按总新增确诊排序）:")
@@ -125,15 +161,28 @@ def main():
     """
     主函数
     """
+    parser = argparse.ArgumentParser(description='绘制香港各区新增确诊对比图')
+    parser.add_argument('file_path', nargs='?', default="香港各区疫情数据_20250322.xlsx",
+                        help='数据文件路径（xlsx/csv或列式.npy目录）')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='每次读取的行数')
+    parser.add_argument('--show', action='store_true', help='保存后打开图表窗口')
+    parser.add_argument('--top', type=int, help='只突出新增确诊最多的N个地区，其余画成灰色背景线')
+    parser.add_argument('--small-multiples', action='store_true',
+                        help=f'改为每个地区一个子图（最多--top个，默认{SMALL_MULTIPLES_MAX}个）')
+    args = parser.parse_args()
+
     try:
         # 加载和处理数据
-        df = load_and_process_data()
+        daily_by_region, regional, population = load_and_process_data(args.file_path, args.chunksize)
         
         # 绘制对比图表
-        plot_regional_comparison(df)
+        if args.small_multiples:
+            plot_small_multiples(daily_by_region, args.top or SMALL_MULTIPLES_MAX, show=args.show)
+        else:
+            plot_regional_comparison(daily_by_region, show=args.show, top=args.top)
         
         # 创建统计摘要
-        create_regional_summary(df)
+        create_regional_summary(regional, population)
         
         print("\n✅ 区域对比图表生成完成！")
         
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+疫情数据流式分块读取
+按固定行数分块读取xlsx（openpyxl只读模式）、CSV或列式.npy目录，内存占用与文件大小无关；
+分析脚本的统计改为可合并的部分聚合，逐块更新，只读一遍文件
+
+用法：
+    totals = GroupSum('报告日期', '新增确诊')
+    stats = DescriptiveStats(['新增确诊', '人口'])
+    rows = aggregate('香港各区疫情数据_20250322.xlsx', [totals, stats])
+    daily_cases = totals.result()
+
+每个部分聚合都支持 update(chunk)、merge(other)、result()，
+不同文件或不同进程的部分结果可以用merge合并。
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+backend_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+# 数值列的描述统计使用后端的单遍统计引擎（同样支持逐块update和merge）
+from descriptive_stats import DescriptiveStats
+
+# 默认每块行数
+DEFAULT_CHUNKSIZE = 100_000
+
+# 需要解析为日期的列
+DATE_COLUMNS = ['报告日期']
+
+
+def _normalize(chunk):
+    """统一分块的列类型（日期列转为datetime64）"""
+    for col in DATE_COLUMNS:
+        if col in chunk.columns:
+            chunk[col] = pd.to_datetime(chunk[col])
+    return chunk
+
+
+def _iter_xlsx(path, chunksize):
+    """用openpyxl只读模式逐行读取第一个工作表"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) for c in header]
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame.from_records(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+def _iter_columnar(path, chunksize):
+    """按行切片内存映射的列式.npy目录（data_cache的缓存或synthetic_data的输出）"""
+    from data_cache import read_cache
+
+    df = read_cache(path)
+    for start in range(0, len(df), chunksize):
+        # 复制当前块，避免下游修改只读的映射数组
+        yield df.iloc[start:start + chunksize].copy()
+
+
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    分块读取疫情数据
+
+    Args:
+        path (str): .xlsx/.csv文件，或列式.npy目录
+        chunksize (int): 每块行数
+
+    Yields:
+        pandas.DataFrame: 数据块（报告日期已转为datetime64）
+    """
+    if os.path.isdir(path):
+        chunks = _iter_columnar(path, chunksize)
+    elif path.lower().endswith('.csv'):
+        chunks = pd.read_csv(path, chunksize=chunksize)
+    else:
+        chunks = _iter_xlsx(path, chunksize)
+    for chunk in chunks:
+        yield _normalize(chunk)
+
+
+def aggregate(path, aggregates, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    读取一遍文件，用每个数据块更新所有部分聚合
+
+    Args:
+        path (str): 数据文件路径
+        aggregates (iterable): 部分聚合对象
+        chunksize (int): 每块行数
+
+    Returns:
+        int: 读取的总行数
+    """
+    aggregates = list(aggregates)
+    rows = 0
+    for chunk in iter_chunks(path, chunksize):
+        for agg in aggregates:
+            agg.update(chunk)
+        rows += len(chunk)
+    return rows
+
+
+class GroupSum:
+    """按键分组求和（如每日新增确诊总和；多个键时结果可unstack为日期×地区矩阵）"""
+
+    def __init__(self, keys, column):
+        self.keys = keys
+        self.column = column
+        self.totals = None
+        self.dtype = None
+
+    def _add(self, part):
+        if self.totals is None:
+            self.totals, self.dtype = part, part.dtype
+        else:
+            self.totals = self.totals.add(part, fill_value=0)
+
+    def update(self, chunk):
+        self._add(chunk.groupby(self.keys, sort=False, observed=True)[self.column].sum())
+
+    def merge(self, other):
+        if other.totals is not None:
+            self._add(other.totals)
+        return self
+
+    def result(self):
+        """按键排序的求和结果（pandas.Series）"""
+        if self.totals is None:
+            return pd.Series(dtype='int64', name=self.column)
+        # 分块相加时对齐索引会把整数变成浮点数，这里还原为原始类型
+        return self.totals.sort_index().astype(self.dtype).rename(self.column)
+
+
+class GroupStats:
+    """按键分组统计某列的计数、总和、最大值、最小值（均值由总和/计数得出）"""
+
+    def __init__(self, key, column):
+        self.key = key
+        self.column = column
+        self.parts = None
+
+    def _combine(self, part):
+        if self.parts is None:
+            self.parts = part
+            return
+        combined = pd.concat([self.parts, part])
+        self.parts = combined.groupby(level=0, sort=False).agg(
+            {'count': 'sum', 'sum': 'sum', 'max': 'max', 'min': 'min'})
+
+    def update(self, chunk):
+        part = chunk.groupby(self.key, sort=False, observed=True)[self.column].agg(
+            ['count', 'sum', 'max', 'min'])
+        self._combine(part)
+
+    def merge(self, other):
+        if other.parts is not None:
+            self._combine(other.parts)
+        return self
+
+    def result(self):
+        """各组的 count/sum/mean/max/min（pandas.DataFrame）"""
+        stats = self.parts.copy()
+        stats['mean'] = stats['sum'] / stats['count']
+        return stats[['count', 'sum', 'mean', 'max', 'min']]
+
+
+class GroupFirst:
+    """每组第一次出现的值（如各地区人口）"""
+
+    def __init__(self, key, column):
+        self.key = key
+        self.column = column
+        self.values = pd.Series(dtype='object', name=column)
+
+    def update(self, chunk):
+        part = chunk.groupby(self.key, sort=False, observed=True)[self.column].first()
+        self.values = self.values.combine_first(part) if len(self.values) else part
+
+    def merge(self, other):
+        """合并之后读取的数据的部分结果（已有的值优先）"""
+        if len(other.values):
+            self.values = self.values.combine_first(other.values) if len(self.values) else other.values
+        return self
+
+    def result(self):
+        """按键排序的各组首值（与groupby(...).first()相同）"""
+        return self.values.sort_index()
+
+
+class ValueCounts:
+    """某列各取值的出现次数"""
+
+    def __init__(self, column):
+        self.column = column
+        self.counts = pd.Series(dtype='int64')
+
+    def update(self, chunk):
+        self.counts = self.counts.add(chunk[self.column].value_counts(), fill_value=0)
+
+    def merge(self, other):
+        self.counts = self.counts.add(other.counts, fill_value=0)
+        return self
+
+    def result(self):
+        """按次数降序排列（与value_counts相同）"""
+        counts = self.counts[self.counts > 0].astype('int64')
+        return counts.sort_values(ascending=False, kind='stable').rename('count')
+
+
+class Distinct:
+    """某列的不同取值，保持首次出现的顺序（取值种类应有限，如地区、日期）"""
+
+    def __init__(self, column):
+        self.column = column
+        self.values = {}
+
+    def update(self, chunk):
+        self.values.update(dict.fromkeys(chunk[self.column].unique()))
+
+    def merge(self, other):
+        self.values.update(other.values)
+        return self
+
+    def result(self):
+        return list(self.values)
+
+
+class Head:
+    """前n行数据"""
+
+    def __init__(self, n=20):
+        self.n = n
+        self.rows = None
+
+    def update(self, chunk):
+        if self.rows is None:
+            self.rows = chunk.head(self.n).copy()
+        elif len(self.rows) < self.n:
+            self.rows = pd.concat([self.rows, chunk.head(self.n - len(self.rows))], ignore_index=True)
+
+    def merge(self, other):
+        """合并之后读取的数据的部分结果"""
+        if other.rows is not None:
+            self.update(other.rows)
+        return self
+
+    def result(self):
+        return self.rows
+
+
+class MissingCounts:
+    """各列的缺失值数量，同时记录第一个数据块的列类型"""
+
+    def __init__(self):
+        self.counts = None
+        self.dtypes = None
+
+    def update(self, chunk):
+        missing = chunk.isnull().sum()
+        if self.counts is None:
+            self.counts, self.dtypes = missing, chunk.dtypes
+        else:
+            self.counts = self.counts.add(missing, fill_value=0).astype('int64')
+
+    def merge(self, other):
+        if other.counts is not None:
+            if self.counts is None:
+                self.counts, self.dtypes = other.counts, other.dtypes
+            else:
+                self.counts = self.counts.add(other.counts, fill_value=0).astype('int64')
+        return self
+
+    def result(self):
+        return self.counts
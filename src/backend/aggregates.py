@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 预计算聚合立方体
+数据加载时一次性构建 日期×地区 矩阵，各API只需对矩阵做NumPy归约
+"""
+
+import numpy as np
+import pandas as pd
+
+from downsampling import lttb_indices
+from region_series import RegionSeries
+
+# 构建 日期×地区 矩阵的指标列
+CUBE_METRICS = ['新增确诊', '新增康复', '新增死亡']
+
+
+class QueryError(ValueError):
+    """查询参数无效（如未知地区）"""
+
+
+class RowBuffer:
+    """
+    可按行追加的预分配数组
+
+    多个聚合立方体可以共享同一个缓冲区，各自只读取自己长度以内的行；
+    追加只写入这些行之后的位置，因此不会影响正在被读取的旧立方体。
+    """
+
+    def __init__(self, rows, headroom=64):
+        rows = np.asarray(rows)
+        self.data = np.empty((len(rows) + headroom,) + rows.shape[1:], dtype=rows.dtype)
+        self.data[:len(rows)] = rows
+        self.length = len(rows)
+
+    def appended(self, length, row):
+        """
+        在前length行之后追加一行
+
+        缓冲区已满，或者其他立方体已经在length之后写入过数据时，先复制到新缓冲区。
+
+        Returns:
+            RowBuffer: 包含新行的缓冲区（可能就是自身）
+        """
+        buffer = self
+        if self.length != length or length == len(self.data):
+            buffer = RowBuffer(self.data[:length], headroom=max(length, 64))
+        buffer.data[length] = row
+        buffer.length = length + 1
+        return buffer
+
+
+class AggregateCube:
+    """
+    日期×地区聚合矩阵
+
+    立方体创建后不再修改；增量导入新的一天时生成新的立方体，
+    与旧立方体共享已有行的存储，只计算新增的那一行。
+
+    Attributes:
+        dates (numpy.ndarray): 升序排列的报告日期（datetime64[ns]）
+        date_labels (list): 对应的'%Y-%m-%d'字符串
+        regions (list): 地区名称
+        region_index (dict): 地区名称 -> 矩阵列号
+        matrices (dict): 指标名 -> 形状为(日期数, 地区数)的int64矩阵
+        daily_totals (dict): 指标名 -> 每日全港合计
+        risk_matrix (numpy.ndarray): 日期×地区的风险等级编码（-1表示缺失）
+        risk_categories (list): 风险等级编码表，按首次出现顺序
+        risk_levels (list): 风险等级，按记录数降序（与value_counts一致）
+        risk_counts (list): 各风险等级的记录数
+        population (numpy.ndarray): 各地区人口（取最近一次报告的值）
+        region_major (RegionSeries): 地区×指标×日期 连续矩阵（含现存确诊），供地区下钻接口切片
+    """
+
+    def __init__(self, dates, regions, matrices, risk_matrix, risk_categories, risk_totals, population=None,
+                 region_major=None):
+        months = dates.astype('datetime64[M]')
+        month_starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]]) if len(dates) else np.array([], dtype=np.int64)
+
+        buffers = {'dates': RowBuffer(dates), 'risk': RowBuffer(risk_matrix)}
+        for metric, mat in matrices.items():
+            buffers[metric] = RowBuffer(mat)
+            # 每日全港合计（最常用的归约，直接缓存）
+            buffers[f"daily:{metric}"] = RowBuffer(mat.sum(axis=1))
+
+        self._assign(
+            buffers, len(dates), list(regions),
+            pd.DatetimeIndex(dates).strftime('%Y-%m-%d').tolist(),
+            month_starts, [str(m) for m in months[month_starts]],
+            list(risk_categories), np.asarray(risk_totals, dtype=np.int64),
+            np.zeros(len(regions), dtype=np.int64) if population is None else np.asarray(population, dtype=np.int64),
+            region_major)
+
+    def _assign(self, buffers, n_dates, regions, date_labels, month_starts, month_labels,
+                risk_categories, risk_totals, population, region_major):
+        """设置立方体的全部属性（各数组为共享缓冲区前n_dates行的视图）"""
+        self._buffers = buffers
+        self.dates = buffers['dates'].data[:n_dates]
+        self.date_labels = date_labels
+        self.regions = regions
+        self.region_index = {region: i for i, region in enumerate(regions)}
+        self.matrices = {m: buffers[m].data[:n_dates] for m in CUBE_METRICS}
+        self.daily_totals = {m: buffers[f"daily:{m}"].data[:n_dates] for m in CUBE_METRICS}
+        self.risk_matrix = buffers['risk'].data[:n_dates]
+
+        # 月份边界：日期已排序，同一月份在日期轴上连续
+        self.month_starts = month_starts
+        self.month_labels = month_labels
+
+        # 风险等级计数：并列时保持首次出现顺序
+        self.risk_categories = risk_categories
+        self.risk_totals = risk_totals
+        order = np.argsort(-risk_totals, kind='stable')
+        self.risk_levels = [risk_categories[i] for i in order]
+        self.risk_counts = risk_totals[order].tolist()
+
+        # 降采样结果：(日期切片, 地区, 点数) -> 保留的下标；立方体不可变，按分辨率缓存即可
+        self._downsampled = {}
+
+        self.population = population
+        self.region_major = region_major
+        # 滚动窗口指标与风险等级时间线：首次访问时构建，增量追加时随立方体延续
+        self._rolling = None
+        self._risk_timeline = None
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        从疫情数据DataFrame一次遍历构建聚合立方体
+
+        Args:
+            df (pandas.DataFrame): 疫情数据，报告日期需已转换为datetime
+
+        Returns:
+            AggregateCube: 聚合立方体
+        """
+        date_values = df['报告日期'].to_numpy(dtype='datetime64[ns]')
+        dates, date_idx = np.unique(date_values, return_inverse=True)
+
+        region_values = df['地区名称'].astype(str).to_numpy()
+        regions, region_idx = np.unique(region_values, return_inverse=True)
+
+        flat_idx = date_idx * len(regions) + region_idx
+        shape = (len(dates), len(regions))
+        matrices = {}
+        for metric in CUBE_METRICS:
+            mat = np.zeros(len(dates) * len(regions), dtype=np.int64)
+            np.add.at(mat, flat_idx, df[metric].to_numpy(dtype=np.int64))
+            matrices[metric] = mat.reshape(shape)
+
+        # 风险等级按首次出现顺序编码
+        risk_values = df['风险等级'].astype(str).to_numpy()
+        levels, first_idx, inverse, counts = np.unique(
+            risk_values, return_index=True, return_inverse=True, return_counts=True)
+        appearance = np.argsort(first_idx, kind='stable')
+        rank = np.empty(len(levels), dtype=np.int64)
+        rank[appearance] = np.arange(len(levels))
+        risk_matrix = np.full(shape, -1, dtype=np.int8)
+        risk_matrix[date_idx, region_idx] = rank[inverse]
+
+        # 地区下钻序列另需现存确诊（存量，直接赋值），与各指标一起转置为地区优先的连续矩阵
+        current = np.zeros(len(dates) * len(regions), dtype=np.int64)
+        current[flat_idx] = df['现存确诊'].to_numpy(dtype=np.int64)
+        region_major = RegionSeries.from_matrices({**matrices, '现存确诊': current.reshape(shape)})
+
+        # 人口：各地区最近一次报告的值
+        latest = np.zeros(len(regions), dtype=np.int64)
+        np.maximum.at(latest, region_idx, date_idx)
+        is_latest = date_idx == latest[region_idx]
+        population = np.zeros(len(regions), dtype=np.int64)
+        population[region_idx[is_latest]] = df['人口'].to_numpy(dtype=np.int64)[is_latest]
+
+        return cls(dates, regions, matrices, risk_matrix, levels[appearance].tolist(), counts[appearance],
+                   population, region_major)
+
+    def with_day(self, day):
+        """
+        返回加入一天数据后的新立方体，当前立方体保持不变
+
+        追加最新日期时只计算新增的一行（各指标行、全港合计、月份边界、风险计数）；
+        补录或更正历史日期时只改写对应日期的对应地区单元格，其余行原样复制。
+
+        Args:
+            day (pandas.DataFrame): 同一报告日期的各区数据（已通过ingest校验）
+
+        Returns:
+            AggregateCube: 新立方体
+        """
+        date = np.datetime64(pd.Timestamp(day['报告日期'].iloc[0]), 'ns')
+        columns = self.region_columns(day['地区名称'].astype(str).tolist())
+        n_dates, n_regions = len(self.dates), len(self.regions)
+
+        rows = {}
+        for metric in CUBE_METRICS + ['现存确诊']:
+            rows[metric] = np.zeros(n_regions, dtype=np.int64)
+            rows[metric][columns] = day[metric].to_numpy(dtype=np.int64)
+
+        risk_categories = list(self.risk_categories)
+        codes = []
+        for level in day['风险等级'].astype(str):
+            if level not in risk_categories:
+                risk_categories.append(level)
+            codes.append(risk_categories.index(level))
+        risk_totals = np.zeros(len(risk_categories), dtype=np.int64)
+        risk_totals[:len(self.risk_totals)] = self.risk_totals
+        np.add.at(risk_totals, codes, 1)
+        risk_row = np.full(n_regions, -1, dtype=np.int8)
+        risk_row[columns] = codes
+
+        # 人口取各地区最近一次报告的值（同from_frame）：补录历史日期时只更新此后没有报告的地区
+        population = self.population.copy()
+        reported = day['人口'].to_numpy(dtype=np.int64)
+        if n_dates == 0 or date >= self.dates[-1]:
+            population[columns] = reported
+        else:
+            later = (self.risk_matrix[np.searchsorted(self.dates, date, 'right'):, columns] >= 0).any(axis=0)
+            population[np.asarray(columns)[~later]] = reported[~later]
+
+        if n_dates == 0 or date > self.dates[-1]:
+            # 快速路径：在日期轴末尾追加一行
+            buffers = {
+                'dates': self._buffers['dates'].appended(n_dates, date),
+                'risk': self._buffers['risk'].appended(n_dates, risk_row),
+            }
+            for metric in CUBE_METRICS:
+                buffers[metric] = self._buffers[metric].appended(n_dates, rows[metric])
+                buffers[f"daily:{metric}"] = self._buffers[f"daily:{metric}"].appended(
+                    n_dates, rows[metric].sum())
+
+            label = pd.Timestamp(date).strftime('%Y-%m-%d')
+            month_starts, month_labels = self.month_starts, self.month_labels
+            if n_dates == 0 or date.astype('datetime64[M]') != self.dates[-1].astype('datetime64[M]'):
+                month_starts = np.append(month_starts, n_dates)
+                month_labels = month_labels + [label[:7]]
+
+            cube = object.__new__(AggregateCube)
+            cube._assign(buffers, n_dates + 1, self.regions, self.date_labels + [label],
+                         month_starts, month_labels, risk_categories, risk_totals, population,
+                         self.region_major.appended(rows))
+            if self._rolling is not None:
+                cube._rolling = self._rolling.appended(rows['新增确诊'], population)
+            if self._risk_timeline is not None:
+                cube._risk_timeline = self._risk_timeline.appended(risk_row)
+            return cube
+
+        # 补录/更正：定位日期后改写对应单元格
+        pos = int(np.searchsorted(self.dates, date))
+        dates = self.dates
+        matrices = {m: mat.copy() for m, mat in self.matrices.items()}
+        risk_matrix = self.risk_matrix.copy()
+        region_major = self.region_major.with_day_at(pos, dates[pos] != date, columns, rows)
+        if dates[pos] == date:
+            replaced = risk_matrix[pos, columns]
+            np.subtract.at(risk_totals, replaced[replaced >= 0], 1)
+        else:
+            dates = np.insert(dates, pos, date)
+            matrices = {m: np.insert(mat, pos, 0, axis=0) for m, mat in matrices.items()}
+            risk_matrix = np.insert(risk_matrix, pos, -1, axis=0)
+        for metric in CUBE_METRICS:
+            matrices[metric][pos, columns] = rows[metric][columns]
+        risk_matrix[pos, columns] = risk_row[columns]
+        return AggregateCube(dates, self.regions, matrices, risk_matrix, risk_categories, risk_totals, population,
+                             region_major)
+
+    @property
+    def rolling(self):
+        """新增确诊的滚动窗口指标（RollingMetrics），首次访问时构建"""
+        if self._rolling is None:
+            from rolling_metrics import RollingMetrics
+            self._rolling = RollingMetrics.from_matrix(self.matrices['新增确诊'], self.population)
+        return self._rolling
+
+    @property
+    def risk_timeline(self):
+        """风险等级游程时间线（RiskTimeline），首次访问时构建"""
+        if self._risk_timeline is None:
+            from risk_timeline import RiskTimeline
+            self._risk_timeline = RiskTimeline.from_matrix(self.risk_matrix)
+        return self._risk_timeline
+
+    def date_range(self, start=None, end=None):
+        """
+        用二分查找把日期范围转换为日期轴上的切片
+
+        Args:
+            start: 起始日期（含），None表示不限
+            end: 结束日期（含），None表示不限
+
+        Returns:
+            tuple: (lo, hi) 半开区间下标
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, 'ns'), 'left'))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, 'ns'), 'right'))
+        return lo, max(lo, hi)
+
+    def region_columns(self, regions=None):
+        """把地区名称列表转换为矩阵列号，None表示全部地区"""
+        if regions is None:
+            return None
+        unknown = [r for r in regions if r not in self.region_index]
+        if unknown:
+            raise QueryError(f"未知的地区: {', '.join(unknown)}")
+        return [self.region_index[r] for r in regions]
+
+    def _daily(self, metric, lo, hi, columns):
+        """日期切片内每日合计，只选部分地区时对相应列求和"""
+        if columns is None:
+            return self.daily_totals[metric][lo:hi]
+        return self.matrices[metric][lo:hi, columns].sum(axis=1)
+
+    def daily_trend(self, start=None, end=None, regions=None, max_points=None, since=None):
+        """
+        每日全港（或指定地区）新增确诊
+
+        指定max_points且天数更多时返回LTTB降采样后的序列（保留最高点），
+        并附带 source_points 表示原始天数。
+
+        指定since（日期游标）时只返回该日期之后的点（不降采样）并附带 since 字段，
+        客户端追加到已有序列末尾；之后的点多于max_points时仍返回完整的降采样序列（不带since）。
+        """
+        lo, hi = self.date_range(start, end)
+        columns = self.region_columns(regions)
+        if since is not None:
+            after = int(np.searchsorted(self.dates, np.datetime64(since, 'ns'), 'right'))
+            if max_points is None or hi - max(lo, after) <= max_points:
+                lo = max(lo, after)
+                return {
+                    'since': pd.Timestamp(since).strftime('%Y-%m-%d'),
+                    'dates': self.date_labels[lo:hi],
+                    'cases': self._daily('新增确诊', lo, hi, columns).tolist(),
+                }
+        cases = self._daily('新增确诊', lo, hi, columns)
+        if max_points is None or hi - lo <= max_points:
+            return {
+                'dates': self.date_labels[lo:hi],
+                'cases': cases.tolist(),
+            }
+
+        key = (lo, hi, None if columns is None else tuple(columns), max_points)
+        keep = self._downsampled.get(key)
+        if keep is None:
+            # 横坐标用实际日期（以天为单位），日期有缺口时三角形面积仍按真实间隔计算
+            days = self.dates[lo:hi].astype('datetime64[D]').astype(np.int64)
+            keep = self._downsampled[key] = lttb_indices(cases, max_points, days)
+        return {
+            'dates': [self.date_labels[lo + i] for i in keep],
+            'cases': cases[keep].tolist(),
+            'source_points': hi - lo,
+        }
+
+    def rolling_metrics(self, start=None, end=None, regions=None):
+        """
+        每日全港（或指定地区合计）的7日滚动平均、周环比增长率、倍增时间和7日发病率
+
+        各指标由新增确诊的累加数组两行相减得出，窗口可以跨过start往前取数据。
+        """
+        lo, hi = self.date_range(start, end)
+        columns = self.region_columns(regions)
+        return {
+            'dates': self.date_labels[lo:hi],
+            **self.rolling.to_dict(lo, hi, columns),
+        }
+
+    def latest_rolling_metrics(self):
+        """最近一天各地区及全港的滚动窗口指标"""
+        return {
+            'date': self.date_labels[-1] if self.date_labels else None,
+            'regions': self.regions + ['全港'],
+            **self.rolling.latest(),
+        }
+
+    def region_series(self, region, start=None, end=None):
+        """
+        单个地区每日的新增确诊/新增康复/新增死亡/现存确诊（缺报的日期为0）
+
+        各序列是地区优先矩阵上的切片视图（numpy数组，不复制），序列化时才转换
+
+        Raises:
+            QueryError: 未知的地区
+        """
+        lo, hi = self.date_range(start, end)
+        column = self.region_columns([region])[0]
+        return {
+            'region': region,
+            'dates': self.date_labels[lo:hi],
+            **self.region_major.series(column, lo, hi),
+        }
+
+    def multi_region_series(self, regions=None, start=None, end=None):
+        """
+        多个地区（None表示全部地区）的逐日序列：{'dates', 'regions': {地区: {字段名: 序列}}}
+        """
+        lo, hi = self.date_range(start, end)
+        columns = self.region_columns(regions)
+        if columns is None:
+            columns = list(range(len(self.regions)))
+        return {
+            'dates': self.date_labels[lo:hi],
+            'regions': {self.regions[c]: self.region_major.series(c, lo, hi) for c in columns},
+        }
+
+    def regional_comparison(self, start=None, end=None, regions=None):
+        """各地区新增确诊合计，升序排列"""
+        lo, hi = self.date_range(start, end)
+        columns = self.region_columns(regions)
+        if columns is None:
+            columns = list(range(len(self.regions)))
+        totals = self.matrices['新增确诊'][lo:hi, columns].sum(axis=0)
+        order = np.argsort(totals, kind='stable')
+        return {
+            'regions': [self.regions[columns[i]] for i in order],
+            'cases': totals[order].tolist(),
+        }
+
+    def risk_distribution(self):
+        """风险等级分布"""
+        return {
+            'risk_levels': self.risk_levels,
+            'counts': self.risk_counts,
+        }
+
+    def _risk_label(self, code):
+        """风险等级编码转为名称（-1为None）"""
+        return self.risk_categories[code] if code >= 0 else None
+
+    def risk_states(self, date=None):
+        """
+        某一天（默认最近一天）各地区的风险等级、进入该等级的日期及各等级地区数
+
+        date不是数据中的日期时取此前最近的一天。
+        """
+        if date is None:
+            day = len(self.dates) - 1
+        else:
+            day = int(np.searchsorted(self.dates, np.datetime64(date, 'ns'), 'right')) - 1
+        if day < 0:
+            raise QueryError("日期早于数据的起始日期" if len(self.dates) else "没有数据")
+
+        codes, since = self.risk_timeline.state_at(day)
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.risk_categories))
+        return {
+            'date': self.date_labels[day],
+            'regions': self.regions,
+            'levels': [self._risk_label(c) for c in codes.tolist()],
+            'since': [self.date_labels[d] for d in since.tolist()],
+            'risk_levels': self.risk_categories,
+            'counts': counts.tolist(),
+        }
+
+    def risk_intervals(self, start=None, end=None, regions=None):
+        """各地区在日期范围内的风险等级区间（起止日期均含）"""
+        lo, hi = self.date_range(start, end)
+        columns = self.region_columns(regions)
+        if columns is None:
+            columns = range(len(self.regions))
+        timeline = self.risk_timeline
+        result = {}
+        for column in columns:
+            starts, ends, codes = timeline.intervals(column, lo, hi)
+            result[self.regions[column]] = [
+                {'start': self.date_labels[a], 'end': self.date_labels[b], 'level': self._risk_label(c)}
+                for a, b, c in zip(starts.tolist(), ends.tolist(), codes.tolist())
+            ]
+        return {'regions': result}
+
+    def risk_transitions(self, start=None, end=None, regions=None):
+        """日期范围内的风险等级转换矩阵（行为原等级、列为新等级）"""
+        lo, hi = self.date_range(start, end)
+        columns = self.region_columns(regions)
+        matrix = self.risk_timeline.transition_matrix(lo, hi, len(self.risk_categories), columns)
+        return {
+            'risk_levels': self.risk_categories,
+            'matrix': matrix.tolist(),
+            'total': int(matrix.sum()),
+        }
+
+    def monthly_statistics(self, start=None, end=None, regions=None):
+        """月度新增确诊/康复/死亡"""
+        lo, hi = self.date_range(start, end)
+        columns = self.region_columns(regions)
+        if lo == hi:
+            return {'months': [], 'new_cases': [], 'recovered': [], 'deaths': []}
+
+        # 切片内的月份起点：切片开头加上落在切片内的预计算月份边界
+        i = int(np.searchsorted(self.month_starts, lo, 'right'))
+        j = int(np.searchsorted(self.month_starts, hi, 'left'))
+        starts = np.r_[0, self.month_starts[i:j] - lo]
+        months = [self.month_labels[i - 1]] + self.month_labels[i:j]
+
+        def rollup(metric):
+            return np.add.reduceat(self._daily(metric, lo, hi, columns), starts).tolist()
+
+        return {
+            'months': months,
+            'new_cases': rollup('新增确诊'),
+            'recovered': rollup('新增康复'),
+            'deaths': rollup('新增死亡'),
+        }
+
+    def summary_stats(self):
+        """关键统计指标"""
+        daily = self.daily_totals['新增确诊']
+        peak = int(np.argmax(daily))
+        return {
+            'total_cases': int(daily.sum()),
+            'avg_daily': round(float(daily.mean()), 1),
+            'max_daily': int(daily[peak]),
+            'peak_date': self.date_labels[peak],
+            'total_recovered': int(self.daily_totals['新增康复'].sum()),
+            'total_deaths': int(self.daily_totals['新增死亡'].sum()),
+        }
@@ -5,31 +5,348 @@
 提供数据API接口
 """
 
-from flask import Flask, render_template, jsonify, send_from_directory
+from flask import Flask, Response, g, has_request_context, render_template, jsonify, request, send_file, send_from_directory, stream_with_context
+import numpy as np
 import pandas as pd
-import json
 from datetime import datetime
+import gzip
+import hmac
 import os
 import sys
+import threading
+import time
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # 添加项目根目录到Python路径
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(project_root)
 
+from aggregates import QueryError
+from chart_renderer import CHART_FORMATS, ChartCache, chart_data, list_charts
+from data_store import DatasetStore
+from descriptive_stats import describe_frame
+from ingest import IngestError, parse_day_payload
+from instrumentation import RequestMetrics, SamplingProfiler, metric_lines, render_metrics
+from live_updates import UpdateBroadcaster
+from response_cache import ResponseCache
+from wire_format import COLUMNAR_MIMETYPE, encode as encode_columnar
+
 app = Flask(__name__, 
             template_folder='../frontend/templates',
             static_folder='../frontend')
 
-def load_data():
-    """加载疫情数据"""
+# 各路由耗时与各阶段（load/aggregate/serialize）耗时，由 /metrics 输出
+# （数据集存储跳过的无效导入文件计入其中的错误计数）
+request_metrics = RequestMetrics()
+
+# 进程级共享的数据集存储，所有请求共用同一份只读数据
+# data/ingested/ 中的单日数据文件（POST /api/ingest 写入或直接放入）会被增量合并
+# data/ 中所有“香港各区疫情数据_YYYYMMDD.xlsx”快照并行解析后合并，同一天同一地区以最新的快照为准
+# 环境变量 DASHBOARD_DATA_PATH / DASHBOARD_INGEST_DIR 可替换数据文件（或目录）和导入目录（如基准测试的合成数据）
+DATA_PATH = os.environ.get('DASHBOARD_DATA_PATH') or os.path.join(project_root, 'data')
+INGEST_DIR = os.environ.get('DASHBOARD_INGEST_DIR') or os.path.join(project_root, 'data', 'ingested')
+dataset_store = DatasetStore(DATA_PATH, ingest_dir=INGEST_DIR, logger=app.logger,
+                             metrics=request_metrics)
+
+# /api/ingest 需要在 X-Ingest-Token 请求头中提供该值；未设置时拒绝所有导入请求（仍可把文件放入导入目录）
+INGEST_TOKEN = os.environ.get('DASHBOARD_INGEST_TOKEN')
+
+# 上传数据的Content-Type与格式对应关系
+INGEST_CONTENT_TYPES = {
+    'text/csv': 'csv',
+    'application/json': 'json',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'xlsx',
+}
+
+# 已序列化的API响应，每个数据集版本只渲染一次
+response_cache = ResponseCache()
+
+# 预渲染图表缓存（与 chart_renderer.py 命令行批量渲染的输出目录相同）
+chart_cache = ChartCache()
+
+# 上次清理图表缓存时的数据版本（每个进程每个数据版本最多清理一次）
+chart_cache_pruned = {'version': None}
+
+# 慢请求采样分析器，默认关闭，通过 POST /api/profiler 在运行时开启
+profiler = SamplingProfiler()
+
+# /api/profiler 的修改设置和 /api/profiler/stacks 需要在 X-Profiler-Token 请求头中提供该值，未设置时拒绝；
+# 设置后查看当前设置（GET /api/profiler）也需要提供
+PROFILER_TOKEN = os.environ.get('DASHBOARD_PROFILER_TOKEN')
+
+# 大屏页面请求的每日趋势最多点数（与dashboard.js中的TREND_MAX_POINTS一致），
+# SSE推送的daily_trend面板按同样的分辨率降采样
+DASHBOARD_TREND_MAX_POINTS = 1000
+
+# 大屏各面板（同名的聚合立方体方法提供数据），/api/dashboard 按此顺序输出
+DASHBOARD_PANELS = (
+    'summary_stats',
+    'daily_trend',
+    'regional_comparison',
+    'risk_distribution',
+    'monthly_statistics',
+)
+
+def record_load_error():
+    """记录数据加载错误的日志和错误计数（在except块中调用）"""
+    request_metrics.errors.inc('data_load')
+    app.logger.exception("数据加载错误")
+
+# 请求的WSGI环境中带有此键时使用其中的快照（warm_up预热指定的数据版本）
+SNAPSHOT_ENVIRON_KEY = 'dashboard.snapshot'
+
+def token_matches(expected, header):
+    """请求头中的令牌与配置的令牌一致（未配置令牌时一律不通过）"""
+    provided = request.headers.get(header)
+    return bool(expected) and provided is not None and hmac.compare_digest(provided.encode(), expected.encode())
+
+def load_snapshot():
+    """获取当前数据集快照（加载失败时记录日志和错误计数，返回None）"""
+    if has_request_context() and SNAPSHOT_ENVIRON_KEY in request.environ:
+        return request.environ[SNAPSHOT_ENVIRON_KEY]
+    try:
+        with request_metrics.phase('load'):
+            return dataset_store.get()
+    except Exception:
+        record_load_error()
+        return None
+
+def compress(body, encoding=None):
+    """按gzip/br压缩响应字节，encoding为None时原样返回"""
+    if encoding == 'br':
+        return brotli.compress(body)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    return body
+
+def json_default(value):
+    """numpy数组（如地区下钻序列的切片视图）在序列化时才转换为列表"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return app.json.default(value)
+
+def render_json(payload, encoding=None):
+    """把响应字典序列化为紧凑JSON字节，可选gzip/br压缩"""
+    body = app.json.dumps(payload, separators=(',', ':'), default=json_default) + '\n'
+    return compress(body.encode('utf-8'), encoding)
+
+def render_payload(build, snapshot, encoding=None, fmt=None):
+    """生成响应字典并序列化（fmt为columnar时编码为列式二进制），分别计入aggregate和serialize阶段耗时"""
+    with request_metrics.phase('aggregate'):
+        payload = build(snapshot)
+    with request_metrics.phase('serialize'):
+        if fmt == 'columnar':
+            return compress(encode_columnar(payload), encoding)
+        return render_json(payload, encoding)
+
+def negotiate_encoding():
+    """根据Accept-Encoding选择压缩方式（br需要安装brotli）"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def negotiate_format():
+    """
+    时间序列接口的响应格式：format参数或Accept请求头要求列式格式时为columnar，否则为json
+
+    Raises:
+        QueryError: format参数不是json或columnar
+    """
+    fmt = request.args.get('format')
+    if fmt:
+        if fmt not in ('json', 'columnar'):
+            raise QueryError(f"format应为json或columnar: {fmt}")
+        return fmt
+    best = request.accept_mimetypes.best_match(['application/json', COLUMNAR_MIMETYPE])
+    return 'columnar' if best == COLUMNAR_MIMETYPE else 'json'
+
+def cached_api_response(key, build, encoding=None, fmt=None):
+    """
+    返回带ETag的缓存API响应
+
+    Args:
+        key (str): 响应缓存键
+        build (callable): 接收数据集快照、返回响应字典的函数
+        encoding (str): 响应压缩方式，None表示不压缩
+        fmt (str): 协商得到的响应格式（json/columnar），None表示该接口只提供JSON
+
+    Returns:
+        flask.Response: 命中If-None-Match时为304，否则为200
+    """
+    snapshot = load_snapshot()
+    if snapshot is None:
+        return jsonify({'error': '数据加载失败'})
+
+    if fmt == 'columnar':
+        key = f"{key}|columnar"
+    if encoding:
+        key = f"{key}|{encoding}"
+    try:
+        entry = response_cache.get(snapshot.version, key, lambda: render_payload(build, snapshot, encoding, fmt))
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response = Response(entry.body, mimetype=COLUMNAR_MIMETYPE if fmt == 'columnar' else 'application/json')
+    if fmt:
+        response.vary.add('Accept')
+    if encoding:
+        response.content_encoding = encoding
+        response.vary.add('Accept-Encoding')
+    response.set_etag(entry.etag)
+    response.last_modified = snapshot.modified_at
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def render_panel(snapshot, name):
+    """面板的缓存序列化响应（与单独的面板接口共用缓存条目）"""
+    if name == 'daily_trend':
+        key = f"{name}?max_points={DASHBOARD_TREND_MAX_POINTS}"
+        return response_cache.get(snapshot.version, key, lambda: render_payload(
+            lambda s: s.cube.daily_trend(max_points=DASHBOARD_TREND_MAX_POINTS), snapshot))
+    return response_cache.get(snapshot.version, name, lambda: render_payload(
+        lambda s: getattr(s.cube, name)(), snapshot))
+
+def trend_delta(snapshot, since=None, since_version=None, **filters):
+    """
+    每日趋势的增量数据：只含游标日期之后的点（带since字段）
+
+    指定since_version时先确认该版本之后的更新都在游标日期之后（游标默认为该版本的最后日期）；
+    版本未知或之后更正过游标及以前的数据时返回完整序列（不带since字段），客户端整体替换。
+    """
+    cursor = since.strftime('%Y-%m-%d') if since else None
+    if since_version is not None:
+        cursor = snapshot.appended_since(since_version, cursor)
+    return snapshot.cube.daily_trend(since=cursor, **filters)
+
+def render_panel_delta(snapshot, name, since_version):
+    """SSE推送时面板相对since_version的增量（只有每日趋势支持，其他面板返回None）"""
+    if name != 'daily_trend':
+        return None
+    params = {'max_points': DASHBOARD_TREND_MAX_POINTS, 'since_version': since_version}
+    return response_cache.get(snapshot.version, panel_key(name, params), lambda: render_payload(
+        lambda s: trend_delta(s, **params), snapshot))
+
+# 数据变化时向SSE连接推送有变化的面板（每日趋势只推送新增的点）
+update_broadcaster = UpdateBroadcaster(dataset_store, render_panel, DASHBOARD_PANELS, render_panel_delta,
+                                        on_load_error=record_load_error)
+
+def parse_date_arg(name):
+    """解析YYYY-MM-DD格式的日期参数，未指定时为None"""
+    value = request.args.get(name)
+    if not value:
+        return None
     try:
-        data_path = os.path.join(project_root, 'data', '香港各区疫情数据_20250322.xlsx')
-        df = pd.read_excel(data_path)
-        df['报告日期'] = pd.to_datetime(df['报告日期'])
-        return df
-    except Exception as e:
-        print(f"数据加载错误: {e}")
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise QueryError(f"日期格式应为YYYY-MM-DD: {name}={value}")
+
+def parse_query_filters():
+    """
+    解析查询参数中的过滤条件
+
+    支持 start/end（YYYY-MM-DD，含端点）和 regions（逗号分隔的地区名称）。
+
+    Returns:
+        dict: 可直接传给聚合立方体方法的关键字参数
+    """
+    filters = {}
+    for name in ('start', 'end'):
+        value = parse_date_arg(name)
+        if value:
+            filters[name] = value
+    regions = request.args.get('regions')
+    if regions:
+        filters['regions'] = [r.strip() for r in regions.split(',') if r.strip()]
+    return filters
+
+def parse_max_points():
+    """
+    解析降采样参数 max_points（每日趋势最多返回的点数）
+
+    Returns:
+        int: 点数，未指定时为None
+    """
+    value = request.args.get('max_points')
+    if not value:
         return None
+    try:
+        max_points = int(value)
+    except ValueError:
+        max_points = 0
+    if max_points < 3:
+        raise QueryError(f"max_points应为不小于3的整数: {value}")
+    return max_points
+
+def format_filter(name, value):
+    """把过滤条件格式化为缓存键的一部分"""
+    if name == 'regions':
+        return ','.join(value)
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+def panel_key(name, params=None):
+    """面板的响应缓存键：面板名?参数（按参数名排序）"""
+    if not params:
+        return name
+    return name + '?' + '&'.join(f"{k}={format_filter(k, v)}" for k, v in sorted(params.items()))
+
+def panel_response(name, filters=None, fmt=None):
+    """单个面板的缓存API响应（每种过滤条件和降采样分辨率各缓存一份，列式格式按Accept-Encoding压缩）"""
+    filters = filters or {}
+    encoding = negotiate_encoding() if fmt == 'columnar' else None
+    return cached_api_response(panel_key(name, filters), lambda snapshot: getattr(snapshot.cube, name)(**filters),
+                               encoding, fmt)
+
+def parse_panel_filters(downsample=False):
+    """解析 start/end/regions 过滤条件（以及可选的 max_points 降采样）"""
+    filters = parse_query_filters()
+    max_points = parse_max_points() if downsample else None
+    if max_points:
+        filters['max_points'] = max_points
+    return filters
+
+def filtered_panel_response(name, downsample=False, series=False):
+    """支持 start/end/regions 过滤（以及可选的 max_points 降采样）的面板响应，时间序列面板可协商列式格式"""
+    try:
+        filters = parse_panel_filters(downsample)
+        fmt = negotiate_format() if series else None
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    return panel_response(name, filters, fmt)
+
+def route_label():
+    """指标中的路由标签：URL规则（如 /api/charts/<path:filename>），未匹配的请求合并为unmatched"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def start_timing():
+    """请求开始计时，采样分析器开启时开始采集当前线程"""
+    g.request_start = time.perf_counter()
+    request_metrics.start_request(route_label())
+    profiler.begin()
+
+@app.after_request
+def finish_timing(response):
+    """记录请求耗时，并在Server-Timing响应头中给出各阶段耗时（毫秒）"""
+    start = g.pop('request_start', None)
+    if start is None:
+        return response
+    seconds = time.perf_counter() - start
+    route = route_label()
+    phases = request_metrics.finish_request(route, request.method, response.status_code, seconds)
+    profiler.end(route, request.method, seconds)
+    timing = [f"{name};dur={value * 1000:.2f}" for name, value in phases.items()]
+    response.headers['Server-Timing'] = ', '.join(timing + [f"total;dur={seconds * 1000:.2f}"])
+    return response
 
 @app.route('/')
 def index():
@@ -43,104 +360,357 @@ def favicon():
 
 @app.route('/api/daily_trend')
 def daily_trend():
-    """每日趋势数据API"""
-    df = load_data()
-    if df is None:
-        return jsonify({'error': '数据加载失败'})
-    
-    # 按日期汇总所有区域的新增确诊
-    daily_data = df.groupby('报告日期')['新增确诊'].sum().reset_index()
-    daily_data['报告日期'] = daily_data['报告日期'].dt.strftime('%Y-%m-%d')
-    
-    return jsonify({
-        'dates': daily_data['报告日期'].tolist(),
-        'cases': daily_data['新增确诊'].tolist()
-    })
+    """
+    每日趋势数据API（可选 start/end/regions 过滤，max_points 指定LTTB降采样后的最多点数）
+
+    since（客户端已有的最后日期）和/或 since_version（客户端已有的数据版本）只返回之后新增的点；
+    Accept为列式格式（或format=columnar）时返回列式二进制
+    """
+    try:
+        filters = parse_panel_filters(downsample=True)
+        fmt = negotiate_format()
+        cursor = {}
+        since = parse_date_arg('since')
+        if since:
+            cursor['since'] = since
+        if request.args.get('since_version'):
+            cursor['since_version'] = request.args['since_version']
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    if cursor:
+        return cached_api_response(panel_key('daily_trend', {**filters, **cursor}),
+                                   lambda snapshot: trend_delta(snapshot, **cursor, **filters),
+                                   negotiate_encoding() if fmt == 'columnar' else None, fmt)
+    # 按日期汇总所有区域的新增确诊（加载时已预计算）
+    return panel_response('daily_trend', filters, fmt)
+
+@app.route('/api/region/<name>/series')
+def region_series(name):
+    """
+    单个地区的逐日 new_cases/recovered/deaths/active_cases 序列API（可选 start/end 过滤）
+
+    Accept为列式格式（或format=columnar）时返回列式二进制
+    """
+    try:
+        filters = {k: v for k, v in parse_query_filters().items() if k != 'regions'}
+        fmt = negotiate_format()
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    encoding = negotiate_encoding() if fmt == 'columnar' else None
+    return cached_api_response(panel_key('region_series', {'regions': [name], **filters}),
+                               lambda snapshot: snapshot.cube.region_series(name, **filters), encoding, fmt)
+
+@app.route('/api/region_series')
+def multi_region_series():
+    """多个地区（regions参数，默认全部地区）的逐日序列API：{dates, regions: {地区: {字段: 序列}}}"""
+    return filtered_panel_response('multi_region_series', series=True)
 
 @app.route('/api/regional_comparison')
 def regional_comparison():
-    """区域对比数据API"""
-    df = load_data()
-    if df is None:
-        return jsonify({'error': '数据加载失败'})
-    
+    """区域对比数据API（可选 start/end/regions 过滤）"""
     # 按地区统计总新增确诊
-    regional_data = df.groupby('地区名称')['新增确诊'].sum().reset_index()
-    regional_data = regional_data.sort_values('新增确诊', ascending=True)
-    
-    return jsonify({
-        'regions': regional_data['地区名称'].tolist(),
-        'cases': regional_data['新增确诊'].tolist()
-    })
+    return filtered_panel_response('regional_comparison')
 
 @app.route('/api/risk_distribution')
 def risk_distribution():
     """风险等级分布数据API"""
-    df = load_data()
-    if df is None:
-        return jsonify({'error': '数据加载失败'})
-    
     # 统计风险等级分布
-    risk_data = df['风险等级'].value_counts().reset_index()
-    risk_data.columns = ['risk_level', 'count']
-    
-    return jsonify({
-        'risk_levels': risk_data['risk_level'].tolist(),
-        'counts': risk_data['count'].tolist()
-    })
+    return panel_response('risk_distribution')
 
 @app.route('/api/monthly_statistics')
 def monthly_statistics():
-    """月度统计数据API"""
-    df = load_data()
-    if df is None:
-        return jsonify({'error': '数据加载失败'})
-    
+    """月度统计数据API（可选 start/end/regions 过滤）"""
     # 按月份统计
-    df['月份'] = df['报告日期'].dt.to_period('M')
-    monthly_data = df.groupby('月份').agg({
-        '新增确诊': 'sum',
-        '新增康复': 'sum',
-        '新增死亡': 'sum'
-    }).reset_index()
-    
-    monthly_data['月份'] = monthly_data['月份'].astype(str)
-    
-    return jsonify({
-        'months': monthly_data['月份'].tolist(),
-        'new_cases': monthly_data['新增确诊'].tolist(),
-        'recovered': monthly_data['新增康复'].tolist(),
-        'deaths': monthly_data['新增死亡'].tolist()
-    })
+    return filtered_panel_response('monthly_statistics')
 
 @app.route('/api/summary_stats')
 def summary_stats():
     """统计摘要数据API"""
-    df = load_data()
-    if df is None:
-        return jsonify({'error': '数据加载失败'})
-    
     # 计算关键统计指标
-    total_cases = df['新增确诊'].sum()
-    avg_daily = df.groupby('报告日期')['新增确诊'].sum().mean()
-    max_daily = df.groupby('报告日期')['新增确诊'].sum().max()
-    total_recovered = df['新增康复'].sum()
-    total_deaths = df['新增死亡'].sum()
-    
-    # 找出疫情高峰日期
-    daily_total = df.groupby('报告日期')['新增确诊'].sum().reset_index()
-    peak_date = daily_total[daily_total['新增确诊'] == max_daily]['报告日期'].iloc[0]
-    peak_date_str = peak_date.strftime('%Y-%m-%d')
-    
+    return panel_response('summary_stats')
+
+@app.route('/api/rolling_metrics')
+def rolling_metrics():
+    """
+    滚动窗口指标API（可选 start/end/regions 过滤，多个地区时按合计计算）
+
+    返回每日的 rolling_avg_7d、wow_growth、doubling_days、incidence_7d_per_100k，
+    数据不足一个窗口或无法计算时为null（列式格式中为NaN）。
+    """
+    return filtered_panel_response('rolling_metrics', series=True)
+
+@app.route('/api/rolling_metrics/latest')
+def latest_rolling_metrics():
+    """最近一天各地区（最后一项为全港）的滚动窗口指标API"""
+    return panel_response('latest_rolling_metrics')
+
+@app.route('/api/risk_timeline')
+def risk_timeline():
+    """各地区风险等级区间API（可选 start/end/regions 过滤，区间裁剪到日期范围内）"""
+    return filtered_panel_response('risk_intervals')
+
+@app.route('/api/risk_timeline/current')
+def risk_states():
+    """某一天（date参数，默认最近一天）各地区的风险等级API"""
+    try:
+        date = parse_date_arg('date')
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    return panel_response('risk_states', {'date': date} if date else None)
+
+@app.route('/api/risk_timeline/transitions')
+def risk_transitions():
+    """风险等级转换矩阵API（可选 start/end/regions 过滤）"""
+    return filtered_panel_response('risk_transitions')
+
+@app.route('/api/data_quality')
+def data_quality():
+    """
+    数据质量报告API
+
+    加载时对整列做一次一致性检查（累计列与每日新增、现存确诊、发病率、风险等级等），
+    每项检查给出异常数和前若干个异常行（row为数据集中的行号）。
+    """
+    return cached_api_response('data_quality', lambda snapshot: snapshot.quality)
+
+@app.route('/api/stats')
+def descriptive_stats():
+    """
+    数值列描述统计API
+
+    单遍计算每个数值列的 count/missing/sum/mean/std/min/q25/median/q75/max；
+    分位数由KLL草图给出，数据量较小时为精确值（exact_quantiles）。
+    """
+    def build(snapshot):
+        df = snapshot.df
+        return dict(rows=len(df), **describe_frame(df).to_dict())
+
+    return cached_api_response('stats', build)
+
+@app.route('/api/charts')
+def charts():
+    """可用的预渲染图表列表"""
+    def build(snapshot):
+        names = list_charts(snapshot.cube)
+        return {
+            'formats': list(CHART_FORMATS),
+            'charts': [{'name': name, 'urls': {fmt: f"/api/charts/{name}.{fmt}" for fmt in CHART_FORMATS}}
+                       for name in names],
+        }
+
+    return cached_api_response('charts', build)
+
+@app.route('/api/charts/<path:filename>')
+def chart_image(filename):
+    """
+    预渲染图表图片（PNG/SVG）
+
+    图片以图表参数和数据切片的哈希缓存，批量渲染过的直接返回文件，否则在请求线程中当场渲染一次
+    （大屏本身用ECharts在浏览器端绘图，不依赖此接口）；ETag就是该哈希，数据不变时浏览器的条件请求得到304。
+    数据版本变化后在后台线程中删除旧版本的图片。
+    """
+    name, _, fmt = filename.rpartition('.')
+    if fmt not in CHART_FORMATS:
+        return jsonify({'error': f"图片格式应为{'/'.join(CHART_FORMATS)}之一"}), 400
+    snapshot = load_snapshot()
+    if snapshot is None:
+        return jsonify({'error': '数据加载失败'})
+    spec = chart_data(snapshot.cube, name)
+    if spec is None:
+        return jsonify({'error': f"未知的图表: {name}"}), 404
+
+    with request_metrics.phase('render'):
+        path, key = chart_cache.get(spec, fmt)
+    if chart_cache_pruned['version'] != snapshot.version:
+        chart_cache_pruned['version'] = snapshot.version
+        threading.Thread(target=chart_cache.prune, args=(snapshot.cube,), name='chart-cache-prune',
+                         daemon=True).start()
+    response = send_file(path, mimetype='image/svg+xml' if fmt == 'svg' else 'image/png',
+                         etag=key, conditional=True, max_age=0)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response
+
+@app.route('/api/dashboard')
+def dashboard():
+    """大屏合并数据API：一次请求返回所有（或指定的）面板数据"""
+    panels_param = request.args.get('panels')
+    if panels_param:
+        panels = [p.strip() for p in panels_param.split(',') if p.strip()]
+        unknown = [p for p in panels if p not in DASHBOARD_PANELS]
+        if unknown:
+            return jsonify({'error': f"未知的面板: {', '.join(unknown)}"}), 400
+    else:
+        panels = list(DASHBOARD_PANELS)
+    try:
+        # max_points 作用于其中的每日趋势面板
+        max_points = parse_max_points()
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+
+    def build(snapshot):
+        # 所有面板来自同一个数据集快照
+        cube = snapshot.cube
+        return {
+            'version': snapshot.version,
+            'panels': {name: cube.daily_trend(max_points=max_points) if name == 'daily_trend' else getattr(cube, name)()
+                       for name in panels},
+        }
+
+    key = f"dashboard:{','.join(panels)}" + (f"?max_points={max_points}" if max_points else '')
+    return cached_api_response(key, build, negotiate_encoding())
+
+@app.route('/api/stream')
+def stream():
+    """
+    数据更新推送（Server-Sent Events）
+
+    每个事件的id是数据版本，data为 {"version", "changed": [面板名], "panels": {面板名: 数据}}。
+    断线重连时浏览器自动携带Last-Event-ID，只补发之后变化的面板；
+    首次连接可用 since 参数传入已从 /api/dashboard 获取的版本。
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('since')
+    response = Response(stream_with_context(update_broadcaster.stream(last_event_id)),
+                        mimetype='text/event-stream')
+    response.cache_control.no_cache = True
+    # 禁止反向代理缓冲事件流
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/ingest', methods=['POST'])
+def ingest():
+    """
+    单日数据导入API
+
+    请求体可以是multipart上传的文件（字段名file），也可以是原始的CSV/JSON/xlsx内容；
+    格式依次由 format 参数、文件扩展名、Content-Type 确定。
+    """
+    if not INGEST_TOKEN:
+        return jsonify({'error': '未配置DASHBOARD_INGEST_TOKEN，导入接口已禁用'}), 403
+    if not token_matches(INGEST_TOKEN, 'X-Ingest-Token'):
+        return jsonify({'error': '无权导入数据'}), 403
+
+    upload = request.files.get('file')
+    if upload is not None:
+        content = upload.read()
+        fmt = os.path.splitext(upload.filename or '')[1].lstrip('.').lower()
+    else:
+        content = request.get_data()
+        fmt = INGEST_CONTENT_TYPES.get(request.mimetype, '')
+    fmt = request.args.get('format', fmt)
+
+    try:
+        day = parse_day_payload(content, fmt)
+        snapshot = dataset_store.ingest_day(day)
+    except IngestError as e:
+        return jsonify({'error': str(e)}), 400
+
     return jsonify({
-        'total_cases': int(total_cases),
-        'avg_daily': round(avg_daily, 1),
-        'max_daily': int(max_daily),
-        'peak_date': peak_date_str,
-        'total_recovered': int(total_recovered),
-        'total_deaths': int(total_deaths)
+        'status': 'ok',
+        'date': pd.to_datetime(day['报告日期'].iloc[0]).strftime('%Y-%m-%d'),
+        'rows': len(day),
+        'version': snapshot.version,
     })
 
+@app.route('/metrics')
+def metrics():
+    """
+    Prometheus文本格式的运行指标（多进程模式下为处理本次请求的工作进程的统计）
+
+    增量导入后的快照在首次请求 /api/data_quality 时才重新检查数据质量，此前不输出各项异常数
+    （全量检查需要重建完整DataFrame，不在采集路径上执行）。
+    """
+    snapshot = load_snapshot()
+    dataset = []
+    if snapshot is not None:
+        cube = snapshot.cube
+        report = snapshot.checked_quality
+        quality = [({'check': c['name'], 'severity': c['severity']}, c['count'])
+                   for c in (report['checks'] if report is not None else [])]
+        dataset = (
+            metric_lines('dashboard_data_quality_checked', 'gauge', '当前数据版本是否已完成数据质量检查',
+                         [({}, int(report is not None))])
+            + metric_lines('dashboard_data_quality_anomalies', 'gauge', '数据质量检查各项的异常数', quality)
+            + metric_lines('dashboard_dataset_info', 'gauge', '当前数据集版本', [({'version': snapshot.version}, 1)])
+            + metric_lines('dashboard_dataset_modified_timestamp_seconds', 'gauge', '数据最后修改时间',
+                           [({}, snapshot.modified_at)])
+            + metric_lines('dashboard_dataset_loaded_timestamp_seconds', 'gauge', '当前快照生成时间',
+                           [({}, snapshot.loaded_at)])
+            + metric_lines('dashboard_dataset_dates', 'gauge', '数据集天数', [({}, len(cube.dates))])
+            + metric_lines('dashboard_dataset_regions', 'gauge', '数据集地区数', [({}, len(cube.regions))]))
+    body = render_metrics(
+        request_metrics.collect(),
+        metric_lines('dashboard_response_cache_hits_total', 'counter', '序列化响应缓存命中次数',
+                     [({}, response_cache.hits)]),
+        metric_lines('dashboard_response_cache_misses_total', 'counter', '序列化响应缓存未命中（渲染）次数',
+                     [({}, response_cache.misses)]),
+        dataset,
+        metric_lines('dashboard_profiler_enabled', 'gauge', '采样分析器是否开启', [({}, int(profiler.enabled))]),
+        metric_lines('dashboard_profiler_samples_total', 'counter', '采样分析器采集的调用栈数',
+                     [({}, profiler.samples)]),
+    )
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/profiler', methods=['GET', 'POST'])
+def profiler_settings():
+    """
+    慢请求采样分析器
+
+    GET返回当前设置和已保留的慢请求；POST（JSON或查询参数）修改设置：
+    enabled（true/false）、interval_ms（采样间隔）、threshold_ms（保留调用栈的最短请求耗时）、keep（最多保留的请求数）。
+    """
+    if (PROFILER_TOKEN or request.method == 'POST') and not token_matches(PROFILER_TOKEN, 'X-Profiler-Token'):
+        return jsonify({'error': '无权访问采样分析器'}), 403
+    if request.method == 'POST':
+        params = dict(request.args)
+        params.update(request.get_json(silent=True) or {})
+        try:
+            enabled = params.get('enabled')
+            if isinstance(enabled, str):
+                enabled = enabled.lower() in ('1', 'true', 'yes', 'on')
+            profiler.configure(
+                enabled=enabled,
+                interval=float(params['interval_ms']) / 1000 if 'interval_ms' in params else None,
+                threshold=float(params['threshold_ms']) / 1000 if 'threshold_ms' in params else None,
+                keep=int(params['keep']) if 'keep' in params else None)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f"参数无效: {e}"}), 400
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 409
+    return jsonify(profiler.status())
+
+@app.route('/api/profiler/stacks')
+def profiler_stacks():
+    """慢请求的折叠调用栈（flamegraph.pl / speedscope 格式），request参数指定单个请求的id"""
+    if not token_matches(PROFILER_TOKEN, 'X-Profiler-Token'):
+        return jsonify({'error': '无权访问采样分析器'}), 403
+    request_id = request.args.get('request', type=int)
+    return Response(profiler.folded(request_id), mimetype='text/plain')
+
+def warm_up(snapshot=None):
+    """
+    预先生成大屏使用的各序列化响应
+
+    多进程模式下在fork工作进程之前调用，缓存的响应字节由所有工作进程共享。
+
+    Args:
+        snapshot (DatasetSnapshot): 预热的数据集快照（主进程刚准备好的版本），None表示当前快照
+    """
+    # 大屏页面用列式格式单独请求每日趋势，其余面板合并请求
+    page_panels = ','.join(name for name in DASHBOARD_PANELS if name != 'daily_trend')
+    with app.test_client() as client:
+        if snapshot is not None:
+            client.environ_base[SNAPSHOT_ENVIRON_KEY] = snapshot
+        for encoding in ('gzip', 'br', 'identity'):
+            client.get('/api/dashboard', headers={'Accept-Encoding': encoding})
+            client.get(f'/api/dashboard?max_points={DASHBOARD_TREND_MAX_POINTS}', headers={'Accept-Encoding': encoding})
+            client.get(f'/api/dashboard?panels={page_panels}', headers={'Accept-Encoding': encoding})
+            client.get(f'/api/daily_trend?max_points={DASHBOARD_TREND_MAX_POINTS}',
+                       headers={'Accept': COLUMNAR_MIMETYPE, 'Accept-Encoding': encoding})
+        client.get(f'/api/daily_trend?max_points={DASHBOARD_TREND_MAX_POINTS}')
+        for name in DASHBOARD_PANELS:
+            client.get(f'/api/{name}')
+
 @app.errorhandler(404)
 def not_found(error):
     """404错误处理"""
@@ -154,4 +724,6 @@ def internal_error(error):
 if __name__ == '__main__':
     print("🚀 启动香港疫情数据可视化大屏...")
     print("📊 访问地址: http://localhost:8080")
+    # 启动时预加载数据，避免首个请求承担解析Excel的开销
+    load_snapshot()
     app.run(debug=True, host='0.0.0.0', port=8080)
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 异步服务器模式
+基于gevent运行Flask应用：每个连接是一个协程，单机可以维持数百个空闲的SSE连接
+启动命令：python3 src/backend/async_server.py [--host 0.0.0.0] [--port 8080]
+"""
+
+# monkey patch必须在导入threading等模块之前完成
+from gevent import monkey
+monkey.patch_all()
+
+import argparse
+
+from gevent.pywsgi import WSGIServer
+
+from app import app, load_snapshot
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='以gevent异步模式启动香港疫情数据可视化大屏')
+    parser.add_argument('--host', default='0.0.0.0', help='监听地址')
+    parser.add_argument('--port', type=int, default=8080, help='监听端口')
+    args = parser.parse_args()
+
+    print("🚀 启动香港疫情数据可视化大屏（gevent异步模式）...")
+    print(f"📊 访问地址: http://localhost:{args.port}")
+    # 启动时预加载数据，避免首个请求承担解析Excel的开销
+    load_snapshot()
+    WSGIServer((args.host, args.port), app).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
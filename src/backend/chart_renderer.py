@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 图表预渲染
+无界面（Agg后端）批量渲染全港趋势、各区对比、每个地区、每个月份的PNG/SVG图表，
+用进程池并行渲染；输出以“图表参数 + 所用数据切片”的哈希命名，数据未变的图表直接跳过
+
+缓存目录结构:
+    data/.cache/charts/<哈希前20位>.png|svg
+
+用法：
+    python3 src/backend/chart_renderer.py                         # 渲染全部图表
+    python3 src/backend/chart_renderer.py --charts 'region/*' --formats svg --workers 4
+后端通过 /api/charts/<图表名>.<格式> 提供同一缓存中的图片，缺失时在请求线程中当场渲染（单张约0.1~1秒）。
+每个数据版本都会生成一批新文件，批量渲染后以及服务器的数据版本变化后删除不属于当前数据的图片
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import io
+import os
+import sys
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+import matplotlib.dates as mdates
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+
+from data_cache import DEFAULT_CACHE_ROOT
+
+# 渲染逻辑变化时递增，使旧的缓存图片全部失效
+RENDERER_VERSION = 2
+
+# 清理缓存时保留最近使用过的图片的秒数（其他进程可能仍在旧数据版本上发送这些文件）
+PRUNE_MIN_AGE = 60.0
+
+CHART_FORMATS = ('png', 'svg')
+
+# 网页展示的默认分辨率（命令行可用 --dpi 300 输出打印质量）
+DEFAULT_DPI = 150
+
+DEFAULT_CHART_DIR = os.path.join(DEFAULT_CACHE_ROOT, 'charts')
+
+# 各区对比图中着色并列入图例的地区数上限，其余地区画成灰色背景线
+REGIONAL_TOP_N = 18
+
+# 小多图中的地区数上限和每行子图数
+SMALL_MULTIPLES_MAX = 36
+SMALL_MULTIPLES_COLS = 6
+
+# 与分析脚本相同的中文字体设置
+matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans', 'PingFang SC']
+matplotlib.rcParams['axes.unicode_minus'] = False
+# SVG中的元素id由固定盐值生成，相同输入得到相同文件
+matplotlib.rcParams['svg.hashsalt'] = 'hk-epidemic-dashboard'
+# 服务器上缺少中文字体时每个字都会警告一次，只保留图表本身
+warnings.filterwarnings('ignore', message='Glyph .* missing from')
+
+
+def list_charts(cube):
+    """
+    当前数据可以渲染的全部图表名
+
+    overall（全港每日新增）、regional（各区趋势对比）、regional_grid（各区小多图）、
+    region/<地区>、month/<YYYY-MM>
+    """
+    return (['overall', 'regional', 'regional_grid']
+            + [f"region/{region}" for region in cube.regions]
+            + [f"month/{month}" for month in cube.month_labels])
+
+
+def chart_data(cube, name):
+    """
+    取出一个图表所需的数据切片
+
+    Returns:
+        dict: {'name', 'kind', 'title', 'dates', 'series': [(标签, 数组), ...]}，
+              各区图表另有 'matrix'（日期×地区矩阵）和 'labels'；未知的图表名返回None
+    """
+    cases = cube.matrices['新增确诊']
+    daily = cube.daily_totals['新增确诊']
+    kind, _, arg = name.partition('/')
+    if name == 'overall':
+        return {'name': name, 'kind': 'line', 'title': '香港每日疫情新增确诊人数变化趋势',
+                'dates': cube.dates, 'series': [('新增确诊', daily)]}
+    if name in ('regional', 'regional_grid'):
+        return {'name': name, 'kind': name, 'title': '香港各区每日新增确诊人数变化趋势',
+                'dates': cube.dates, 'series': [('全港合计', daily)],
+                'matrix': cases, 'labels': list(cube.regions)}
+    if kind == 'region' and arg in cube.region_index:
+        return {'name': name, 'kind': 'line', 'title': f'{arg}每日新增确诊人数',
+                'dates': cube.dates, 'series': [(arg, cases[:, cube.region_index[arg]])]}
+    if kind == 'month' and arg in cube.month_labels:
+        i = cube.month_labels.index(arg)
+        lo = int(cube.month_starts[i])
+        hi = int(cube.month_starts[i + 1]) if i + 1 < len(cube.month_starts) else len(cube.dates)
+        return {'name': name, 'kind': 'month', 'title': f'{arg} 香港疫情新增确诊',
+                'dates': cube.dates[lo:hi], 'series': [('新增确诊', daily[lo:hi])],
+                'regions': (list(cube.regions), cases[lo:hi].sum(axis=0))}
+    return None
+
+
+def chart_key(spec, fmt, dpi=DEFAULT_DPI):
+    """图表内容的哈希：渲染参数加上数据切片的原始字节"""
+    digest = hashlib.sha256(f"{RENDERER_VERSION}|{spec['name']}|{fmt}|{dpi}".encode('utf-8'))
+    digest.update(np.ascontiguousarray(spec['dates']).view(np.int64).tobytes())
+    for label, values in spec['series']:
+        digest.update(label.encode('utf-8'))
+        digest.update(np.ascontiguousarray(values, dtype=np.int64).tobytes())
+    if 'matrix' in spec:
+        digest.update('|'.join(spec['labels']).encode('utf-8'))
+        digest.update(np.ascontiguousarray(spec['matrix'], dtype=np.int64).tobytes())
+    if 'regions' in spec:
+        names, totals = spec['regions']
+        digest.update('|'.join(names).encode('utf-8'))
+        digest.update(np.ascontiguousarray(totals, dtype=np.int64).tobytes())
+    return digest.hexdigest()[:20]
+
+
+def _format_date_axis(ax, dates):
+    """日期轴：跨度较长时按月标注，否则每两周标注"""
+    if len(dates) > 120:
+        ax.xaxis.set_major_locator(mdates.MonthLocator())
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    else:
+        ax.xaxis.set_major_locator(mdates.WeekdayLocator(interval=2 if len(dates) > 31 else 1))
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+
+
+def _annotate_peak(ax, dates, values):
+    """左上角标注最高单日新增和日均新增"""
+    if not len(values):
+        return
+    peak = int(np.argmax(values))
+    peak_date = np.datetime_as_string(dates[peak], unit='D')
+    ax.text(0.02, 0.98, f'最高单日新增: {int(values[peak])}例 ({peak_date})\n平均每日新增: {values.mean():.1f}例',
+            transform=ax.transAxes, fontsize=11, verticalalignment='top',
+            bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
+
+
+def region_lines(ax, dates, matrix, labels, top=None):
+    """
+    用一个LineCollection画出所有地区的每日曲线（一次绘制调用，不随地区数增加Artist）
+
+    Args:
+        ax: 坐标轴
+        dates: 日期数组（datetime64）
+        matrix (numpy.ndarray): 日期×地区矩阵
+        labels (list): 地区名称
+        top (int): 只给总数最多的top个地区着色并列入图例，其余画成灰色背景线；None表示全部着色
+
+    Returns:
+        list: 图例句柄（着色地区的代理线条，按总数降序）
+    """
+    x = mdates.date2num(dates)
+    n_regions = matrix.shape[1]
+    order = np.argsort(-matrix.sum(axis=0), kind='stable')
+    highlighted = order[:n_regions if top is None else min(top, n_regions)]
+    # (地区数, 日期数, 2) 的线段数组，每个地区一条折线
+    segments = np.empty((n_regions, len(x), 2))
+    segments[:, :, 0] = x
+    segments[:, :, 1] = matrix.T
+
+    handles = []
+    background = np.setdiff1d(order, highlighted, assume_unique=True)
+    if len(background):
+        ax.add_collection(LineCollection(segments[background], colors='#bdc3c7', linewidths=0.6, alpha=0.5))
+        handles.append(Line2D([], [], color='#bdc3c7', linewidth=0.6, label=f'其他{len(background)}个地区'))
+    colors = matplotlib.colormaps['tab20' if len(highlighted) > 10 else 'tab10'](np.arange(len(highlighted)) % 20)
+    ax.add_collection(LineCollection(segments[highlighted], colors=colors, linewidths=1.2, alpha=0.85))
+    handles = [Line2D([], [], color=color, linewidth=1.2, label=labels[i])
+               for color, i in zip(colors, highlighted)] + handles
+
+    ax.xaxis_date()
+    ax.autoscale_view()
+    return handles
+
+
+def small_multiples(fig, dates, matrix, labels, limit=SMALL_MULTIPLES_MAX, cols=SMALL_MULTIPLES_COLS):
+    """
+    小多图：总数最多的limit个地区各占一个共享坐标轴的子图
+
+    Returns:
+        numpy.ndarray: 子图数组
+    """
+    order = np.argsort(-matrix.sum(axis=0), kind='stable')[:limit]
+    rows = max(1, -(-len(order) // cols))
+    axes = fig.subplots(rows, cols, sharex=True, sharey=True, squeeze=False)
+    for ax, i in zip(axes.flat, order):
+        ax.fill_between(dates, matrix[:, i], color='#e74c3c', alpha=0.35, linewidth=0)
+        ax.plot(dates, matrix[:, i], color='#e74c3c', linewidth=0.8)
+        ax.set_title(labels[i], fontsize=9)
+        ax.grid(True, alpha=0.3, linestyle='--')
+    for ax in axes.flat[len(order):]:
+        ax.set_visible(False)
+    # 每列最下面一个可见的子图显示日期刻度
+    for k, ax in enumerate(axes.flat[:len(order)]):
+        if k + cols >= len(order):
+            ax.tick_params(labelbottom=True)
+            ax.xaxis.set_major_formatter(mdates.DateFormatter('%m' if len(dates) <= 366 else '%Y-%m'))
+            for label in ax.get_xticklabels():
+                label.set_rotation(45)
+    return axes
+
+
+def render_chart(spec, fmt='png', dpi=DEFAULT_DPI):
+    """
+    渲染一个图表
+
+    只使用面向对象的Figure接口，不经过pyplot的全局状态，可在多个线程中同时调用；
+    独立的Figure直接用Agg（PNG）或SVG渲染器输出，与pyplot当前选择的界面后端无关。
+
+    Returns:
+        bytes: PNG或SVG内容
+    """
+    dates = spec['dates']
+    if spec['kind'] == 'regional_grid':
+        n_shown = min(SMALL_MULTIPLES_MAX, len(spec['labels']))
+        fig = Figure(figsize=(16, 2.4 * max(1, -(-n_shown // SMALL_MULTIPLES_COLS)) + 1))
+        small_multiples(fig, dates, spec['matrix'], spec['labels'])
+        suffix = f"（新增确诊最多的{n_shown}个地区）" if n_shown < len(spec['labels']) else ''
+        fig.suptitle(spec['title'] + suffix, fontsize=16, fontweight='bold')
+        fig.tight_layout(rect=(0, 0, 1, 0.97))
+        return _save(fig, fmt, dpi)
+    if spec['kind'] == 'month':
+        fig = Figure(figsize=(14, 10))
+        ax, ax_regions = fig.subplots(2, 1)
+    else:
+        fig = Figure(figsize=(16, 9) if spec['kind'] == 'regional' else (15, 8))
+        ax = fig.subplots()
+
+    if spec['kind'] == 'regional':
+        handles = region_lines(ax, dates, spec['matrix'], spec['labels'], top=REGIONAL_TOP_N)
+        # 全港合计比单个地区大一个数量级以上，画在右侧独立的纵轴上
+        label, values = spec['series'][0]
+        ax_total = ax.twinx()
+        total, = ax_total.plot(dates, values, label=label, color='#e74c3c', linewidth=2.5, alpha=0.9)
+        ax_total.set_ylabel('全港合计', fontsize=12, fontweight='bold', color='#e74c3c')
+        ax_total.set_ylim(bottom=0)
+        ax.legend(handles=[total] + handles, bbox_to_anchor=(1.06, 1), loc='upper left', fontsize=8)
+    elif spec['kind'] == 'month':
+        label, values = spec['series'][0]
+        ax.bar(dates, values, color='#e74c3c', alpha=0.85)
+        names, totals = spec['regions']
+        order = np.argsort(totals, kind='stable')
+        ax_regions.barh([names[i] for i in order], totals[order], color='#3498db')
+        ax_regions.set_title('各区新增确诊合计', fontsize=14, fontweight='bold')
+        ax_regions.grid(True, axis='x', alpha=0.3, linestyle='--')
+    else:
+        label, values = spec['series'][0]
+        ax.plot(dates, values, linewidth=2, color='#e74c3c', marker='o', markersize=2)
+
+    ax.set_title(spec['title'], fontsize=16, fontweight='bold', pad=16)
+    ax.set_xlabel('日期', fontsize=12, fontweight='bold')
+    ax.set_ylabel('新增确诊人数', fontsize=12, fontweight='bold')
+    ax.grid(True, alpha=0.3, linestyle='--')
+    ax.set_ylim(bottom=0)
+    _format_date_axis(ax, dates)
+    _annotate_peak(ax, dates, spec['series'][-1][1])
+    fig.tight_layout()
+    return _save(fig, fmt, dpi)
+
+
+def _save(fig, fmt, dpi):
+    """把Figure保存为PNG/SVG字节"""
+    buffer = io.BytesIO()
+    # 不写入生成时间，相同输入的输出内容相同
+    metadata = {'Date': None} if fmt == 'svg' else None
+    fig.savefig(buffer, format=fmt, dpi=dpi, metadata=metadata)
+    return buffer.getvalue()
+
+
+def _write_atomic(path, content):
+    """先写临时文件再重命名，并发渲染同一图表时不会读到半个文件"""
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _render_to_file(spec, fmt, dpi, path):
+    """渲染并写入缓存文件（在工作进程中执行），返回 (图表名, 格式, 耗时秒)"""
+    start = time.perf_counter()
+    _write_atomic(path, render_chart(spec, fmt, dpi))
+    return spec['name'], fmt, time.perf_counter() - start
+
+
+class ChartCache:
+    """以内容哈希命名的图表文件缓存"""
+
+    def __init__(self, directory=DEFAULT_CHART_DIR, dpi=DEFAULT_DPI):
+        self.directory = directory
+        self.dpi = dpi
+
+    def path_for(self, spec, fmt):
+        """图表在缓存目录中的路径和哈希"""
+        key = chart_key(spec, fmt, self.dpi)
+        return os.path.join(self.directory, f"{key}.{fmt}"), key
+
+    def get(self, spec, fmt):
+        """
+        获取图表文件，缓存中没有时在当前进程（调用线程）中同步渲染
+
+        命中时刷新文件的修改时间，prune不会删除最近使用过的图片。
+
+        Returns:
+            tuple: (文件路径, 哈希)
+        """
+        path, key = self.path_for(spec, fmt)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            os.makedirs(self.directory, exist_ok=True)
+            _write_atomic(path, render_chart(spec, fmt, self.dpi))
+        return path, key
+
+    def prune(self, cube, formats=CHART_FORMATS, min_age=PRUNE_MIN_AGE):
+        """
+        删除不属于当前数据的缓存图片（以及中断渲染留下的临时文件）
+
+        Args:
+            cube (AggregateCube): 当前数据，list_charts的全部图表 × formats 保留
+            formats (tuple): 保留的格式
+            min_age (float): 只删除超过该秒数未使用的文件
+
+        Returns:
+            int: 删除的文件数
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+        keep = {os.path.basename(self.path_for(chart_data(cube, name), fmt)[0])
+                for name in list_charts(cube) for fmt in formats}
+        cutoff = time.time() - min_age
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if entry.name in keep or not entry.is_file():
+                continue
+            if not (entry.name.endswith(CHART_FORMATS) or '.tmp-' in entry.name):
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                # 其他进程同时在清理
+                continue
+        return removed
+
+    def render_all(self, cube, names=None, formats=CHART_FORMATS, workers=None, force=False, progress=None,
+                   prune=True):
+        """
+        并行渲染一批图表，已在缓存中的跳过，完成后清理不属于当前数据的图片
+
+        Args:
+            cube (AggregateCube): 数据
+            names (list): 图表名，None表示list_charts的全部
+            formats (tuple): 输出格式
+            workers (int): 进程数，None表示CPU核数；1表示在当前进程中依次渲染
+            force (bool): 忽略缓存全部重新渲染
+            progress (callable): 每渲染完一个调用 progress(已完成数, 总数, 图表名, 格式, 耗时秒)
+            prune (bool): 渲染后调用prune（保留当前数据的全部图表，不只是本次渲染的names）
+
+        Returns:
+            dict: {'rendered', 'skipped', 'pruned', 'seconds'}
+        """
+        start = time.perf_counter()
+        names = list_charts(cube) if names is None else names
+        os.makedirs(self.directory, exist_ok=True)
+        jobs = []
+        for name in names:
+            spec = chart_data(cube, name)
+            for fmt in formats:
+                path, _ = self.path_for(spec, fmt)
+                if force or not os.path.exists(path):
+                    jobs.append((spec, fmt, self.dpi, path))
+
+        workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+        done = 0
+        if workers == 1:
+            for job in jobs:
+                name, fmt, seconds = _render_to_file(*job)
+                done += 1
+                if progress:
+                    progress(done, len(jobs), name, fmt, seconds)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_render_to_file, *job) for job in jobs]
+                for future in as_completed(futures):
+                    name, fmt, seconds = future.result()
+                    done += 1
+                    if progress:
+                        progress(done, len(jobs), name, fmt, seconds)
+        return {
+            'rendered': len(jobs),
+            'skipped': len(names) * len(formats) - len(jobs),
+            'pruned': self.prune(cube) if prune else 0,
+            'seconds': time.perf_counter() - start,
+        }
+
+
+def main():
+    """命令行入口：批量渲染图表"""
+    from data_store import DatasetStore
+
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description='并行批量渲染疫情图表（PNG/SVG），数据未变的图表自动跳过')
+    parser.add_argument('data_path', nargs='?', default=os.path.join(project_root, 'data'),
+                        help='数据文件或快照目录')
+    parser.add_argument('--output', default=DEFAULT_CHART_DIR, help='图表缓存目录')
+    parser.add_argument('--charts', default='*',
+                        help="图表名通配符，逗号分隔（如 'overall,region/*'）")
+    parser.add_argument('--formats', default='png,svg', help='输出格式，逗号分隔（png/svg）')
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI, help='分辨率')
+    parser.add_argument('--workers', type=int, help='进程数（默认为CPU核数）')
+    parser.add_argument('--force', action='store_true', help='忽略缓存全部重新渲染')
+    parser.add_argument('--keep-stale', action='store_true', help='不删除不属于当前数据的旧图片')
+    args = parser.parse_args()
+
+    formats = [f.strip() for f in args.formats.split(',') if f.strip()]
+    unknown = [f for f in formats if f not in CHART_FORMATS]
+    if unknown:
+        print(f"❌ 不支持的格式: {', '.join(unknown)}")
+        sys.exit(1)
+
+    cube = DatasetStore(args.data_path).get().cube
+    patterns = [p.strip() for p in args.charts.split(',') if p.strip()]
+    names = [name for name in list_charts(cube) if any(fnmatch.fnmatchcase(name, p) for p in patterns)]
+    print(f"🎨 共 {len(names)} 个图表 × {len(formats)} 种格式")
+
+    def report(done, total, name, fmt, seconds):
+        print(f"🖼️ [{done}/{total}] {name}.{fmt} ({seconds:.2f}秒)")
+
+    cache = ChartCache(args.output, args.dpi)
+    result = cache.render_all(cube, names, formats, args.workers, args.force, report, prune=not args.keep_stale)
+    print(f"✅ 渲染 {result['rendered']} 个，跳过未变化的 {result['skipped']} 个，"
+          f"删除旧图片 {result['pruned']} 个，用时 {result['seconds']:.2f} 秒 -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 紧凑数据集表示
+数据集在内存中按列以最小的类型保存：
+    报告日期        int32天数偏移（相对于最早日期）
+    地区名称/风险等级 字典编码（编码表 + 最小整数类型的编码）
+    各计数列        能容纳其取值范围的最小有符号整数类型
+    人口            每个地区只存一份（各行人口不随日期变化时）
+    发病率          与 现存确诊/人口×100000 一致（只差浮点舍入）时不存储，转换时重新计算
+
+接口需要DataFrame时通过 to_frame() 转换；也可以命令行运行，输出内存占用对比：
+    python3 src/backend/compact_dataset.py data/
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# 原始数据的列顺序
+COLUMN_ORDER = ['报告日期', '地区名称', '新增确诊', '累计确诊', '现存确诊', '新增康复', '累计康复',
+                '新增死亡', '累计死亡', '发病率(每10万人)', '人口', '风险等级']
+
+# 整数计数列
+COUNT_COLUMNS = ['新增确诊', '累计确诊', '现存确诊', '新增康复', '累计康复', '新增死亡', '累计死亡']
+
+INCIDENCE_COLUMN = '发病率(每10万人)'
+
+# 发病率与重新计算值的相对误差在此以内视为一致（Excel与NumPy的运算顺序不同，末位可能相差1）
+INCIDENCE_RTOL = 1e-12
+
+# 降位时依次尝试的整数类型
+INT_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+def smallest_int_dtype(values):
+    """能容纳数组取值范围的最小有符号整数类型（有符号便于差分等运算）"""
+    if len(values) == 0:
+        return np.dtype(np.int8)
+    low, high = int(values.min()), int(values.max())
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    raise OverflowError(f"取值超出int64范围: {low} ~ {high}")
+
+
+def downcast(values):
+    """整数数组降为最小的安全类型"""
+    values = np.asarray(values)
+    return values.astype(smallest_int_dtype(values), copy=False)
+
+
+def dictionary_encode(values):
+    """
+    字典编码
+
+    Returns:
+        tuple: (编码表列表, 编码数组)；已是分类类型时沿用其编码表
+    """
+    categorical = values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype('category')
+    codes = categorical.cat.codes.to_numpy()
+    return categorical.cat.categories.astype(str).tolist(), downcast(codes)
+
+
+def incidence(current, population):
+    """发病率(每10万人) = 现存确诊 / 人口 × 100000"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return current / population * 1e5
+
+
+class CompactDataset:
+    """
+    紧凑的列式数据集（只读）
+
+    Attributes:
+        epoch (numpy.datetime64): 最早的报告日期
+        day_offsets (numpy.ndarray): 各行报告日期相对epoch的天数（int32）
+        regions (list): 地区编码表
+        region_codes (numpy.ndarray): 各行的地区编码
+        risk_levels (list): 风险等级编码表
+        risk_codes (numpy.ndarray): 各行的风险等级编码
+        counts (dict): 计数列名 -> 降位后的数组
+        population (numpy.ndarray): 各地区人口（与regions对齐），或None
+        row_population (numpy.ndarray): 人口随日期变化时各行的人口，否则为None
+        stored_incidence (numpy.ndarray): 发病率无法由其他列算出时保存的原值，否则为None
+    """
+
+    def __init__(self, epoch, day_offsets, regions, region_codes, risk_levels, risk_codes, counts,
+                 population=None, row_population=None, stored_incidence=None):
+        self.epoch = epoch
+        self.day_offsets = day_offsets
+        self.regions = regions
+        self.region_codes = region_codes
+        self.risk_levels = risk_levels
+        self.risk_codes = risk_codes
+        self.counts = counts
+        self.population = population
+        self.row_population = row_population
+        self.stored_incidence = stored_incidence
+
+    def __len__(self):
+        return len(self.day_offsets)
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        从疫情数据DataFrame构建
+
+        Raises:
+            ValueError: 报告日期带有时间部分或跨度超出int32天数
+        """
+        dates = df['报告日期'].to_numpy(dtype='datetime64[ns]')
+        days = dates.astype('datetime64[D]')
+        if (days != dates).any():
+            raise ValueError("报告日期不应包含时间部分")
+        epoch = days.min() if len(days) else np.datetime64('1970-01-01', 'D')
+        offsets = (days - epoch).astype(np.int64)
+        if len(offsets) and offsets.max() > np.iinfo(np.int32).max:
+            raise ValueError("报告日期跨度超出int32天数范围")
+
+        regions, region_codes = dictionary_encode(df['地区名称'])
+        risk_levels, risk_codes = dictionary_encode(df['风险等级'])
+        counts = {col: downcast(df[col].to_numpy(dtype=np.int64)) for col in COUNT_COLUMNS}
+
+        # 各地区人口：每个地区只有一个取值时按地区保存一份
+        row_population = df['人口'].to_numpy(dtype=np.int64)
+        population = np.zeros(len(regions), dtype=np.int64)
+        population[region_codes] = row_population
+        if np.array_equal(population[region_codes], row_population):
+            population, row_population = downcast(population), None
+        else:
+            population, row_population = None, downcast(row_population)
+
+        stored = df[INCIDENCE_COLUMN].to_numpy(dtype=np.float64)
+        derived = incidence(counts['现存确诊'], row_population if population is None else population[region_codes])
+        if np.allclose(stored, derived, rtol=INCIDENCE_RTOL, atol=0, equal_nan=True):
+            stored = None
+        else:
+            stored = np.array(stored)
+
+        return cls(epoch, offsets.astype(np.int32), regions, region_codes, risk_levels, risk_codes, counts,
+                   population, row_population, stored)
+
+    def row_population_values(self):
+        """各行的人口"""
+        if self.row_population is not None:
+            return self.row_population
+        return self.population[self.region_codes]
+
+    def to_frame(self):
+        """
+        转换为与原始数据列结构相同的DataFrame（接口使用的适配层）
+
+        地区名称/风险等级为分类类型，计数列保持降位后的类型（不复制），
+        只有日期、人口和发病率需要临时展开。
+        """
+        population = self.row_population_values()
+        data = {
+            '报告日期': (self.epoch + self.day_offsets.astype('timedelta64[D]')).astype('datetime64[ns]'),
+            '地区名称': pd.Categorical.from_codes(self.region_codes, self.regions),
+            **self.counts,
+            INCIDENCE_COLUMN: (self.stored_incidence if self.stored_incidence is not None
+                               else incidence(self.counts['现存确诊'], population)),
+            '人口': population,
+            '风险等级': pd.Categorical.from_codes(self.risk_codes, self.risk_levels),
+        }
+        return pd.DataFrame({col: data[col] for col in COLUMN_ORDER}, copy=False)
+
+    def memory_usage(self):
+        """
+        各列占用的字节数（编码表按字符串长度估算）
+
+        Returns:
+            dict: 列名 -> 字节数
+        """
+        def table_bytes(table):
+            return sum(sys.getsizeof(value) for value in table)
+
+        usage = {
+            '报告日期': self.day_offsets.nbytes,
+            '地区名称': self.region_codes.nbytes + table_bytes(self.regions),
+        }
+        for col in COUNT_COLUMNS:
+            usage[col] = self.counts[col].nbytes
+        usage[INCIDENCE_COLUMN] = 0 if self.stored_incidence is None else self.stored_incidence.nbytes
+        usage['人口'] = (self.row_population.nbytes if self.row_population is not None
+                       else self.population.nbytes)
+        usage['风险等级'] = self.risk_codes.nbytes + table_bytes(self.risk_levels)
+        return usage
+
+
+def object_layout(df):
+    """pandas直接读取Excel得到的布局：字符串列为object，计数列为int64"""
+    out = df.copy()
+    for col in ('地区名称', '风险等级'):
+        out[col] = out[col].astype(str).astype(object)
+    for col in COUNT_COLUMNS + ['人口']:
+        out[col] = out[col].astype(np.int64)
+    return out
+
+
+def memory_report(df, compact=None):
+    """
+    比较三种布局的内存占用：object（pandas直接读取）、current（列式缓存加载的DataFrame）、compact
+
+    Returns:
+        dict: {'rows', 'columns': {列名: {'object', 'current', 'compact'}}, 'total': {...}}
+    """
+    if compact is None:
+        compact = CompactDataset.from_frame(df)
+    layouts = {
+        'object': object_layout(df).memory_usage(deep=True, index=False).to_dict(),
+        'current': df.memory_usage(deep=True, index=False).to_dict(),
+        'compact': compact.memory_usage(),
+    }
+    columns = {col: {name: int(usage[col]) for name, usage in layouts.items()} for col in COLUMN_ORDER}
+    total = {name: sum(c[name] for c in columns.values()) for name in layouts}
+    return {'rows': len(df), 'columns': columns, 'total': total}
+
+
+def main():
+    """命令行入口：加载数据并输出各布局的内存占用"""
+    from data_cache import load_dataframe
+    from snapshot_loader import load_snapshot_dir
+    from synthetic_data import generate
+
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description='比较数据集各种内存布局的占用')
+    parser.add_argument('data_path', nargs='?', default=os.path.join(project_root, 'data'),
+                        help='数据文件或数据目录')
+    parser.add_argument('--synthetic', metavar='DAYS:REGIONS', help='改用合成数据，如 3650:180')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        days, regions = (int(v) for v in args.synthetic.split(':'))
+        df = generate(days, regions)
+        df['地区名称'] = df['地区名称'].astype('category')
+        df['风险等级'] = df['风险等级'].astype('category')
+    else:
+        load = load_snapshot_dir if os.path.isdir(args.data_path) else load_dataframe
+        df = load(args.data_path)
+    report = memory_report(df)
+
+    names = {'object': '原始布局', 'current': '当前布局', 'compact': '紧凑布局'}
+    print(f"📊 {report['rows']:,} 行的内存占用（字节）")
+    print(f"{'列':<12} " + ' '.join(f"{names[n]:>12}" for n in names))
+    print("-" * 56)
+    for col, usage in report['columns'].items():
+        print(f"{col:<12} " + ' '.join(f"{usage[n]:>16,}" for n in names))
+    print("-" * 56)
+    total = report['total']
+    print(f"{'合计':<12} " + ' '.join(f"{total[n]:>16,}" for n in names))
+    print(f"✅ 紧凑布局为原始布局的 {total['compact'] / total['object']:.1%}，"
+          f"当前布局的 {total['compact'] / total['current']:.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 列式二进制缓存
+首次加载时把Excel数据编译为按列存储的.npy文件，之后直接内存映射读取，不再经过openpyxl
+
+缓存目录结构（以源文件内容的SHA-256为键）:
+    data/.cache/<文件名>-<哈希前16位>/
+        meta.json       列顺序、类型、分类编码表
+        <序号>.npy      每列一个文件
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+CACHE_FORMAT_VERSION = 1
+
+# 以分类类型存储的列（字典编码）
+CATEGORICAL_COLUMNS = ['地区名称', '风险等级']
+
+# 以datetime64存储的列
+DATETIME_COLUMNS = ['报告日期']
+
+# 可用环境变量 DASHBOARD_CACHE_DIR 指定其他缓存目录（如基准测试使用的临时目录）
+DEFAULT_CACHE_ROOT = os.environ.get('DASHBOARD_CACHE_DIR') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', '.cache')
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_dir_for(source_path, content_hash, cache_root=DEFAULT_CACHE_ROOT):
+    """根据源文件名和内容哈希确定缓存目录"""
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(cache_root, f"{stem}-{content_hash[:16]}")
+
+
+def read_source(source_path):
+    """用pandas解析源文件（原始慢路径，支持xlsx和csv），并统一列类型"""
+    if source_path.lower().endswith('.csv'):
+        df = pd.read_csv(source_path)
+    else:
+        df = pd.read_excel(source_path)
+    for col in DATETIME_COLUMNS:
+        df[col] = pd.to_datetime(df[col])
+    for col in CATEGORICAL_COLUMNS:
+        df[col] = df[col].astype('category')
+    return df
+
+
+def write_cache(df, cache_dir, content_hash):
+    """
+    把DataFrame写入列式缓存目录
+
+    先写入临时目录再整体重命名，避免并发读取到写了一半的缓存。
+    """
+    tmp_dir = f"{cache_dir}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        entry = {'name': col, 'file': f"{i}.npy"}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            entry['kind'] = 'categorical'
+            entry['categories'] = [str(c) for c in series.cat.categories]
+            values = series.cat.codes.to_numpy()
+        elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+            entry['kind'] = 'datetime'
+            values = series.to_numpy(dtype='datetime64[ns]')
+        else:
+            entry['kind'] = 'numeric'
+            values = series.to_numpy()
+        np.save(os.path.join(tmp_dir, entry['file']), np.ascontiguousarray(values))
+        columns.append(entry)
+
+    meta = {
+        'format_version': CACHE_FORMAT_VERSION,
+        'source_sha256': content_hash,
+        'rows': len(df),
+        'columns': columns,
+    }
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    try:
+        os.rename(tmp_dir, cache_dir)
+    except OSError:
+        # 其他进程已经写好了同一份缓存
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def read_cache(cache_dir):
+    """
+    以内存映射方式读取列式缓存
+
+    Returns:
+        pandas.DataFrame: 列直接引用映射的只读数组，不复制数据
+    """
+    with open(os.path.join(cache_dir, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('format_version') != CACHE_FORMAT_VERSION:
+        raise ValueError(f"缓存格式版本不匹配: {cache_dir}")
+
+    data = {}
+    for entry in meta['columns']:
+        values = np.load(os.path.join(cache_dir, entry['file']), mmap_mode='r')
+        if entry['kind'] == 'categorical':
+            data[entry['name']] = pd.Categorical.from_codes(values, entry['categories'])
+        else:
+            data[entry['name']] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def remove_stale_caches(source_path, keep_dir, cache_root=DEFAULT_CACHE_ROOT):
+    """删除同一源文件的旧版本缓存"""
+    if not os.path.isdir(cache_root):
+        return
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    for name in os.listdir(cache_root):
+        path = os.path.join(cache_root, name)
+        if path != keep_dir and name.startswith(f"{stem}-") and '.tmp-' not in name:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def build_cache(source_path, cache_root=DEFAULT_CACHE_ROOT, force=False):
+    """
+    编译源文件的列式缓存
+
+    Args:
+        source_path (str): 数据文件路径（xlsx或csv）
+        cache_root (str): 缓存根目录
+        force (bool): 缓存已存在时是否强制重建
+
+    Returns:
+        str: 缓存目录
+    """
+    content_hash = file_sha256(source_path)
+    cache_dir = cache_dir_for(source_path, content_hash, cache_root)
+    if force and os.path.isdir(cache_dir):
+        shutil.rmtree(cache_dir)
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_root, exist_ok=True)
+        write_cache(read_source(source_path), cache_dir, content_hash)
+        remove_stale_caches(source_path, cache_dir, cache_root)
+    return cache_dir
+
+
+def load_dataframe(source_path, cache_root=DEFAULT_CACHE_ROOT):
+    """
+    加载疫情数据，优先使用列式缓存
+
+    缓存不存在或已损坏时从源文件解析并重建缓存；缓存目录不可写时退回直接解析。
+
+    Returns:
+        pandas.DataFrame: 疫情数据（地区名称/风险等级为分类类型，报告日期为datetime64）
+    """
+    content_hash = file_sha256(source_path)
+    cache_dir = cache_dir_for(source_path, content_hash, cache_root)
+    if os.path.isdir(cache_dir):
+        try:
+            return read_cache(cache_dir)
+        except Exception as e:
+            print(f"⚠️ 缓存读取失败，重新构建: {e}")
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    df = read_source(source_path)
+    try:
+        os.makedirs(cache_root, exist_ok=True)
+        write_cache(df, cache_dir, content_hash)
+        remove_stale_caches(source_path, cache_dir, cache_root)
+        return read_cache(cache_dir)
+    except OSError as e:
+        print(f"⚠️ 缓存写入失败，直接使用解析结果: {e}")
+        return df
+
+
+def main():
+    """命令行入口：重建列式缓存"""
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description='构建疫情数据的列式二进制缓存')
+    parser.add_argument('sources', nargs='*',
+                        default=[os.path.join(project_root, 'data', '香港各区疫情数据_20250322.xlsx')],
+                        help='数据文件路径（xlsx或csv，默认为项目自带数据）')
+    parser.add_argument('--cache-root', default=DEFAULT_CACHE_ROOT, help='缓存根目录')
+    parser.add_argument('--force', action='store_true', help='即使缓存已存在也重新构建')
+    args = parser.parse_args()
+
+    for source in args.sources:
+        if not os.path.exists(source):
+            print(f"❌ 数据文件不存在: {source}")
+            sys.exit(1)
+        start = time.perf_counter()
+        cache_dir = build_cache(source, args.cache_root, force=args.force)
+        elapsed = time.perf_counter() - start
+        print(f"✅ {os.path.basename(source)} -> {cache_dir} ({elapsed:.2f}秒)")
+
+
+if __name__ == '__main__':
+    main()
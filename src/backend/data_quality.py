@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 数据质量检查
+加载数据时对整列做一次向量化检查（不逐行循环），输出结构化的异常报告：
+    duplicate_rows        同一（报告日期, 地区名称）出现多次
+    missing_values        数值列或报告日期缺失
+    negative_counts       计数列为负数
+    cumulative_cases      累计确诊 - 该地区上一次报告的累计确诊 ≠ 新增确诊（首次报告时累计小于新增）
+    cumulative_recovered  累计康复同上
+    cumulative_deaths     累计死亡同上
+    active_cases          现存确诊 ≠ 累计确诊 - 累计康复 - 累计死亡
+    incidence             发病率(每10万人) 与 现存确诊/人口×100000 相差超过0.01
+    risk_level            风险等级与发病率阈值不符
+    population_changed    人口与该地区上一次报告不同（警告）
+    missing_reports       地区在首末报告日之间缺少某天的数据（警告）
+
+每个地区的“上一次报告”通过 日期×地区 网格上的前向填充求出，只需整块NumPy运算。
+
+用法：
+    python3 src/backend/data_quality.py data/
+    python3 src/backend/data_quality.py --synthetic 10000:1000
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from ingest import RISK_LEVELS, RISK_THRESHOLDS
+
+# 每项检查在报告中最多列出的异常行
+MAX_EXAMPLES = 50
+
+# 发病率允许的误差（数据可能保留两位小数）
+INCIDENCE_TOLERANCE = 0.01
+
+# (检查名, 累计列, 每日新增列)
+CUMULATIVE_CHECKS = [
+    ('cumulative_cases', '累计确诊', '新增确诊'),
+    ('cumulative_recovered', '累计康复', '新增康复'),
+    ('cumulative_deaths', '累计死亡', '新增死亡'),
+]
+
+COUNT_COLUMNS = ['新增确诊', '累计确诊', '现存确诊', '新增康复', '累计康复', '新增死亡', '累计死亡', '人口']
+
+# 检查名 -> (严重程度, 说明)
+CHECKS = {
+    'duplicate_rows': ('error', '同一报告日期同一地区有多行数据'),
+    'missing_values': ('error', '报告日期或数值列缺失'),
+    'negative_counts': ('error', '计数列为负数'),
+    'cumulative_cases': ('error', '累计确诊与上一次报告之差不等于新增确诊'),
+    'cumulative_recovered': ('error', '累计康复与上一次报告之差不等于新增康复'),
+    'cumulative_deaths': ('error', '累计死亡与上一次报告之差不等于新增死亡'),
+    'active_cases': ('error', '现存确诊不等于累计确诊-累计康复-累计死亡'),
+    'incidence': ('error', '发病率(每10万人)与现存确诊/人口×100000不符'),
+    'risk_level': ('error', '风险等级与发病率不符（不超过100为低风险，不超过500为中风险，否则为高风险）'),
+    'population_changed': ('warning', '人口与该地区上一次报告不同'),
+    'missing_reports': ('warning', '地区在首末报告日之间缺少数据'),
+}
+
+
+def _number(value):
+    """numpy标量转为JSON数值"""
+    if value is None:
+        return None
+    value = value.item() if hasattr(value, 'item') else value
+    if isinstance(value, float):
+        return round(value, 4) if np.isfinite(value) else None
+    return value
+
+
+def _previous_rows(day, region, n_regions):
+    """
+    每行所在地区的上一次报告所在的行号（没有则为-1）
+
+    日期×地区网格上记录各单元格的行号，沿日期轴前向填充即得每个地区最近一次报告的日期。
+    同一单元格有重复行时网格中保留最后一行。
+
+    Returns:
+        tuple: (上一次报告的行号, 网格（日期数×地区数，缺失为-1）, 各行在网格中的扁平下标)
+    """
+    n_days = int(day.max()) + 1 if len(day) else 0
+    grid = np.full(n_days * n_regions, -1, dtype=np.int64)
+    flat = day * n_regions + region
+    grid[flat] = np.arange(len(day))
+    grid = grid.reshape(n_days, n_regions)
+
+    days = np.arange(n_days)[:, None]
+    last_day = np.maximum.accumulate(np.where(grid >= 0, days, -1), axis=0)
+    prev_day = np.vstack([np.full((1, n_regions), -1), last_day[:-1]])[:n_days]
+    prev = np.where(prev_day >= 0, grid[np.maximum(prev_day, 0), np.arange(n_regions)], -1)
+    return prev.ravel()[flat], grid, flat
+
+
+class _Report:
+    """收集各项检查的结果"""
+
+    def __init__(self, label, max_examples):
+        """
+        Args:
+            label (callable): 行号 -> (日期标签, 地区名称)
+            max_examples (int): 每项检查最多列出的异常
+        """
+        self.label = label
+        self.max_examples = max_examples
+        self.checks = []
+
+    def _append(self, name, count, examples):
+        severity, description = CHECKS[name]
+        self.checks.append({
+            'name': name,
+            'severity': severity,
+            'description': description,
+            'count': int(count),
+            'examples': examples,
+        })
+
+    def add(self, name, mask, detail=None):
+        """
+        记录一项按行的检查
+
+        Args:
+            mask (numpy.ndarray): 异常行的布尔掩码
+            detail (callable): 行号 -> (期望值, 实际值)，只对列入报告的行调用
+        """
+        rows = np.flatnonzero(mask)
+        examples = []
+        for i in rows[:self.max_examples].tolist():
+            date, region = self.label(i)
+            example = {'row': i, 'date': date, 'region': region}
+            if detail is not None:
+                expected, actual = detail(i)
+                example['expected'] = _number(expected)
+                example['actual'] = _number(actual)
+            examples.append(example)
+        self._append(name, len(rows), examples)
+
+    def add_cells(self, name, count, cells):
+        """记录一项没有对应行的检查（cells为列入报告的(日期标签, 地区名称)）"""
+        self._append(name, count, [{'row': None, 'date': d, 'region': r} for d, r in cells])
+
+
+def validate_frame(df, max_examples=MAX_EXAMPLES):
+    """
+    对完整数据集做一次数据质量检查
+
+    Args:
+        df (pandas.DataFrame): 疫情数据（12列结构）
+        max_examples (int): 每项检查最多列出的异常行
+
+    Returns:
+        dict: {'rows', 'dates', 'regions', 'ok', 'errors', 'warnings', 'seconds',
+               'checks': [{'name', 'severity', 'description', 'count', 'examples': [{'row', 'date', 'region', ...}]}]}
+              row为数据集中的行号（从0开始）
+    """
+    start = time.perf_counter()
+    n = len(df)
+
+    dates = df['报告日期'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+    bad_date = np.isnat(dates)
+    region_values = df['地区名称']
+    if isinstance(region_values.dtype, pd.CategoricalDtype):
+        region_codes = region_values.cat.codes.to_numpy().astype(np.int64)
+        region_names = region_values.cat.categories.astype(str).tolist()
+    else:
+        region_codes, region_names = pd.factorize(region_values.astype(str))
+        region_names = list(region_names)
+    n_regions = len(region_names)
+
+    report = _Report(lambda i: (None if bad_date[i] else str(dates[i]),
+                                region_names[region_codes[i]] if region_codes[i] >= 0 else None),
+                     max_examples)
+
+    columns = {col: df[col].to_numpy() for col in COUNT_COLUMNS + ['发病率(每10万人)']}
+    missing = bad_date | (region_codes < 0)
+    for values in columns.values():
+        if values.dtype.kind == 'f':
+            missing |= np.isnan(values)
+    valid = ~missing
+
+    # 全部行有效时（通常情况）直接使用整列，不复制
+    all_valid = not missing.any()
+    sel = slice(None) if all_valid else valid
+
+    # 日期轴：按天数偏移；日期稀疏时压缩为出现过的日期，避免网格过大
+    day = np.zeros(n, dtype=np.int64)
+    if n and valid.any():
+        offsets = (dates[sel] - dates[sel].min()).astype(np.int64)
+        if (int(offsets.max()) + 1) * n_regions > 4 * n + (1 << 20):
+            _, offsets = np.unique(offsets, return_inverse=True)
+        day[sel] = offsets
+    prev_sel, grid, flat = _previous_rows(day[sel], region_codes[sel], n_regions)
+    counts = np.bincount(flat, minlength=grid.size)
+    if all_valid:
+        prev = prev_sel
+        duplicated = counts[flat] > 1
+    else:
+        # 映射回原始行号
+        rows = np.flatnonzero(valid)
+        prev = np.full(n, -1, dtype=np.int64)
+        prev[rows] = np.where(prev_sel >= 0, rows[np.maximum(prev_sel, 0)], -1)
+        duplicated = np.zeros(n, dtype=bool)
+        duplicated[rows] = counts[flat] > 1
+    report.add('duplicate_rows', duplicated)
+    report.add('missing_values', missing)
+
+    negative = np.zeros(n, dtype=bool)
+    for col in COUNT_COLUMNS:
+        negative |= columns[col] < 0
+    report.add('negative_counts', negative)
+
+    has_prev = prev >= 0
+    prev_index = np.maximum(prev, 0)
+    # 各地区的首次报告（没有上一次报告）只要求累计不小于新增
+    first = np.flatnonzero(~has_prev & valid)
+    for name, total_col, new_col in CUMULATIVE_CHECKS:
+        total, new = columns[total_col], columns[new_col]
+        bad = (total - total[prev_index]) != new
+        bad &= has_prev
+        bad[first] = total[first] < new[first]
+        report.add(name, bad, lambda i, total=total, new=new: (
+            total[prev[i]] + new[i] if prev[i] >= 0 else new[i], total[i]))
+
+    active = columns['现存确诊']
+    expected_active = columns['累计确诊'] - columns['累计康复'] - columns['累计死亡']
+    report.add('active_cases', (active != expected_active) & valid,
+               lambda i: (expected_active[i], active[i]))
+
+    incidence = columns['发病率(每10万人)']
+    population = columns['人口']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected_incidence = active / population * 1e5
+    report.add('incidence', (np.abs(incidence - expected_incidence) > INCIDENCE_TOLERANCE) & valid,
+               lambda i: (expected_incidence[i], incidence[i]))
+
+    # 风险等级：按编码表比较，不逐行比较字符串
+    risk = df['风险等级']
+    if not isinstance(risk.dtype, pd.CategoricalDtype):
+        risk = risk.astype('category')
+    categories = [str(c) for c in risk.cat.categories]
+    risk_codes = risk.cat.codes.to_numpy()
+    level_code = np.array([RISK_LEVELS.index(c) if c in RISK_LEVELS else -1 for c in categories] + [-1],
+                          dtype=np.int8)
+    actual_level = level_code[risk_codes]
+    # 超过的阈值个数即等级编码
+    expected_level = np.zeros(n, dtype=np.int8)
+    for threshold in RISK_THRESHOLDS:
+        expected_level += incidence > threshold
+    report.add('risk_level', (actual_level != expected_level) & valid,
+               lambda i: (RISK_LEVELS[expected_level[i]], categories[risk_codes[i]] if risk_codes[i] >= 0 else None))
+
+    report.add('population_changed', has_prev & (population != population[prev_index]) & valid,
+               lambda i: (population[prev[i]], population[i]))
+
+    # 首末报告日之间的空缺单元格（没有对应行，只列出日期和地区）
+    present = grid >= 0
+    seen = np.maximum.accumulate(present, axis=0)
+    remaining = np.maximum.accumulate(present[::-1], axis=0)[::-1]
+    gap_day, gap_region = np.nonzero(seen & remaining & ~present)
+    # 网格的日期轴可能已压缩，记录每个网格日期对应的实际日期
+    grid_dates = np.empty(grid.shape[0], dtype='datetime64[D]')
+    grid_dates[day[sel]] = dates[sel]
+    report.add_cells('missing_reports', len(gap_day),
+                     [(str(grid_dates[d]), region_names[r])
+                      for d, r in zip(gap_day[:max_examples].tolist(), gap_region[:max_examples].tolist())])
+
+    errors = sum(c['count'] for c in report.checks if c['severity'] == 'error')
+    warnings = sum(c['count'] for c in report.checks if c['severity'] == 'warning')
+    return {
+        'rows': n,
+        'dates': int(grid.shape[0]),
+        'regions': n_regions,
+        'ok': errors == 0,
+        'errors': errors,
+        'warnings': warnings,
+        'seconds': round(time.perf_counter() - start, 4),
+        'checks': report.checks,
+    }
+
+
+def format_summary(report):
+    """一行文字的检查结果"""
+    if report['errors'] == 0 and report['warnings'] == 0:
+        return f"✅ 数据质量检查通过（{report['rows']:,} 行，用时 {report['seconds']:.3f} 秒）"
+    found = ', '.join(f"{c['name']}={c['count']}" for c in report['checks'] if c['count'])
+    return (f"⚠️ 数据质量检查发现 {report['errors']} 处错误、{report['warnings']} 处警告: {found}"
+            f"（用时 {report['seconds']:.3f} 秒）")
+
+
+def main():
+    """命令行入口：加载数据、执行检查并输出报告，附检查耗时占加载耗时的比例"""
+    from data_cache import load_dataframe
+    from snapshot_loader import load_snapshot_dir
+    from synthetic_data import generate
+
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description='检查疫情数据的内部一致性')
+    parser.add_argument('data_path', nargs='?', default=os.path.join(project_root, 'data'),
+                        help='数据文件或数据目录')
+    parser.add_argument('--synthetic', metavar='DAYS:REGIONS', help='改用合成数据，如 10000:1000')
+    parser.add_argument('--json', action='store_true', help='输出完整的JSON报告')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.synthetic:
+        days, regions = (int(v) for v in args.synthetic.split(':'))
+        df = generate(days, regions)
+    else:
+        load = load_snapshot_dir if os.path.isdir(args.data_path) else load_dataframe
+        df = load(args.data_path)
+    load_seconds = time.perf_counter() - start
+
+    report = validate_frame(df)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    print(format_summary(report))
+    for check in report['checks']:
+        if check['count']:
+            print(f"  {check['name']:<22} {check['count']:>10,}  {check['description']}")
+            for example in check['examples'][:3]:
+                print(f"      {example}")
+    print(f"⏱️ 加载 {load_seconds:.3f} 秒，检查 {report['seconds']:.3f} 秒"
+          f"（{report['seconds'] / load_seconds:.1%}）")
+
+
+if __name__ == '__main__':
+    main()
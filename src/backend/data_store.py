@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 数据集存储
+进程级共享的数据集缓存：启动时加载一次，数据文件变化时自动重新加载，
+导入目录中新增的单日数据增量合并，不重新处理历史数据
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from aggregates import AggregateCube
+from compact_dataset import CompactDataset
+from data_cache import CATEGORICAL_COLUMNS, load_dataframe
+from data_quality import format_summary, validate_frame
+from ingest import SUPPORTED_EXTENSIONS, IngestError, read_day_file, save_day, validate_day
+from snapshot_loader import discover_snapshot_files, load_snapshot_files, print_progress
+
+# 快照保留的最近修订记录数（更早版本的客户端请求增量时返回完整数据）
+REVISION_HISTORY = 64
+
+
+class DatasetSnapshot:
+    """
+    数据集快照（只读）
+
+    所有请求共享同一个快照对象，路由函数不得修改其中的数据。
+    数据更新时会整体替换为新的快照，而不是原地修改。
+
+    基础数据以紧凑的列式表示（CompactDataset）常驻内存，增量导入的各日数据保持为小DataFrame；
+    需要完整DataFrame的接口通过 df 属性临时转换。
+    """
+
+    __slots__ = ('_frames', '_quality', 'cube', 'version', 'source_stat', 'ingest_state',
+                 'modified_at', 'loaded_at', 'revisions')
+
+    def __init__(self, frames, cube, version, source_stat, ingest_state, modified_at, loaded_at,
+                 quality=None, revisions=None):
+        """
+        Args:
+            frames (list): 基础数据（CompactDataset）及之后按导入顺序排列的单日DataFrame
+            quality (dict): 数据质量报告，None表示首次访问时再检查
+            revisions (tuple): 修订记录 ((版本, 该版本的最后日期, 该版本改动的日期), ...)，
+                None表示这是完整加载的第一个版本
+        """
+        self._frames = frames
+        self._quality = quality
+        if revisions is None:
+            revisions = ((version, cube.date_labels[-1] if cube.date_labels else None, None),)
+        self.revisions = revisions
+        self.cube = cube
+        self.version = version
+        self.source_stat = source_stat
+        self.ingest_state = ingest_state
+        self.modified_at = modified_at
+        self.loaded_at = loaded_at
+
+    @property
+    def dataset(self):
+        """基础数据的紧凑表示（不含增量导入的数据）"""
+        return self._frames[0]
+
+    @property
+    def df(self):
+        """
+        完整数据（基础数据加上增量导入的各日数据）
+
+        每次访问都从紧凑表示重新转换，不常驻内存；调用方（如描述统计）的结果由响应缓存按版本缓存。
+        """
+        base = self._frames[0].to_frame()
+        if len(self._frames) == 1:
+            return base
+        df = pd.concat([base] + self._frames[1:], ignore_index=True)
+        # 同一天同一地区被多次导入时以最后一次为准
+        df = df.drop_duplicates(['报告日期', '地区名称'], keep='last').reset_index(drop=True)
+        for col in CATEGORICAL_COLUMNS:
+            df[col] = df[col].astype('category')
+        return df
+
+    @property
+    def quality(self):
+        """完整数据的数据质量报告（data_quality.validate_frame），每个快照只检查一次"""
+        if self._quality is None:
+            self._quality = validate_frame(self.df)
+        return self._quality
+
+    @property
+    def checked_quality(self):
+        """已经生成的数据质量报告，尚未检查时为None（不触发检查，供/metrics等需要保持轻量的调用方使用）"""
+        return self._quality
+
+    def appended_since(self, version, cursor=None):
+        """
+        version之后的更新是否只改动了游标日期之后的数据
+
+        Args:
+            version (str): 客户端已有的数据版本
+            cursor (str): 客户端已有数据的最后日期（YYYY-MM-DD），None表示该版本的最后日期
+
+        Returns:
+            str: 游标日期，客户端只需追加其后的数据；版本不在修订记录中、
+                或之后补录/更正了游标及以前的日期时返回None（需要完整数据）
+        """
+        for i, (revision, last_date, _) in enumerate(self.revisions):
+            if revision == version:
+                break
+        else:
+            return None
+        cursor = cursor or last_date
+        if cursor is None:
+            return None
+        if all(edited > cursor for _, _, edited in self.revisions[i + 1:]):
+            return cursor
+        return None
+
+    def with_day(self, day, ingest_state, modified_at):
+        """返回加入一天数据后的新快照（聚合立方体只增量计算受影响的单元格）"""
+        digest = hashlib.sha1(repr(sorted(ingest_state.items())).encode('utf-8')).hexdigest()[:8]
+        version = f"{self.version.split('+')[0]}+{digest}"
+        cube = self.cube.with_day(day)
+        edited = pd.Timestamp(day['报告日期'].iloc[0]).strftime('%Y-%m-%d')
+        revisions = self.revisions[-(REVISION_HISTORY - 1):] + ((version, cube.date_labels[-1], edited),)
+        return DatasetSnapshot(
+            self._frames + [day], cube, version, self.source_stat, ingest_state,
+            max(self.modified_at, modified_at), time.time(), revisions=revisions)
+
+
+class DatasetStore:
+    """
+    进程级数据集存储
+
+    热路径只读取当前快照引用（Python中的引用赋值是原子的），不加锁；
+    只有在需要（重新）加载数据时才会获取锁，并且同一时间只有一个线程执行加载。
+    """
+
+    def __init__(self, data_path, ingest_dir=None, check_interval=1.0, load_workers=None, logger=None,
+                 metrics=None):
+        """
+        Args:
+            data_path (str): 数据文件路径（xlsx或csv），或包含多个日期快照文件的数据目录
+            ingest_dir (str): 增量导入目录，其中每个文件是一天的各区数据；None表示不启用
+            check_interval (float): 两次检查文件变化之间的最小间隔（秒）
+            load_workers (int): 数据目录中有多个快照时并行解析的进程数，None表示CPU核数
+            logger (logging.Logger): 加载过程的日志（如Flask的app.logger），None表示本模块的logger
+            metrics (RequestMetrics): 跳过的无效导入文件计入其errors（kind为ingest_invalid）
+        """
+        self.data_path = data_path
+        self.ingest_dir = ingest_dir
+        self.check_interval = check_interval
+        self.load_workers = load_workers
+        self.logger = logger or logging.getLogger(__name__)
+        self.metrics = metrics
+        self._snapshot = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _stat_source(self):
+        """
+        读取数据文件的修改时间和大小，作为变化检测的依据
+
+        数据目录取所有快照文件的最新修改时间、总大小和文件数，
+        新增、替换或删除任何一个快照都会触发重新加载。
+        """
+        if os.path.isdir(self.data_path):
+            files = discover_snapshot_files(self.data_path)
+            if not files:
+                raise FileNotFoundError(f"目录中没有数据快照文件: {self.data_path}")
+            stats = [os.stat(path) for _, path in files]
+            return (max(st.st_mtime_ns for st in stats), sum(st.st_size for st in stats), len(stats))
+        st = os.stat(self.data_path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _stat_ingest(self):
+        """读取导入目录中各数据文件的修改时间"""
+        if not self.ingest_dir or not os.path.isdir(self.ingest_dir):
+            return {}
+        state = {}
+        for entry in os.scandir(self.ingest_dir):
+            if entry.is_file() and entry.name.lower().endswith(SUPPORTED_EXTENSIONS):
+                state[entry.name] = entry.stat().st_mtime_ns
+        return state
+
+    def _read_source(self):
+        """
+        读取数据文件（优先内存映射列式缓存，缓存缺失时解析Excel并生成缓存）
+
+        数据目录中的多个快照用进程池并行解析，同一天同一地区以最新的快照为准。
+        """
+        if os.path.isdir(self.data_path):
+            paths = [path for _, path in discover_snapshot_files(self.data_path)]
+            if len(paths) == 1:
+                return load_dataframe(paths[0])
+            return load_snapshot_files(paths, self.load_workers, print_progress)
+        return load_dataframe(self.data_path)
+
+    def _load(self, source_stat):
+        """加载数据、检查数据质量、构建聚合立方体并生成新快照（读取的DataFrame只在加载期间存在）"""
+        df = self._read_source()
+        quality = validate_frame(df)
+        self.logger.info(format_summary(quality))
+        cube = AggregateCube.from_frame(df)
+        dataset = CompactDataset.from_frame(df)
+        version = '-'.join(f"{value:x}" for value in source_stat)
+        return DatasetSnapshot([dataset], cube, version, source_stat, {}, source_stat[0] / 1e9, time.time(),
+                               quality)
+
+    def _apply_ingested(self, snapshot, ingest_state):
+        """按日期顺序增量合并导入目录中新增或修改过的文件"""
+        state = dict(snapshot.ingest_state)
+        for name in sorted(ingest_state):
+            mtime = ingest_state[name]
+            if state.get(name) == mtime:
+                continue
+            state[name] = mtime
+            try:
+                day = validate_day(read_day_file(os.path.join(self.ingest_dir, name)), snapshot.cube.regions)
+            except (IngestError, OSError) as e:
+                if self.metrics is not None:
+                    self.metrics.errors.inc('ingest_invalid')
+                self.logger.warning("跳过无效的导入文件 %s: %s", name, e)
+                continue
+            snapshot = snapshot.with_day(day, dict(state), mtime / 1e9)
+
+        if snapshot.ingest_state != ingest_state:
+            # 无效文件或文件被删除：数据保持不变（删除在下次完整加载时生效），只记录已检查过的状态
+            snapshot = DatasetSnapshot(
+                snapshot._frames, snapshot.cube, snapshot.version, snapshot.source_stat,
+                ingest_state, snapshot.modified_at, snapshot.loaded_at, snapshot._quality, snapshot.revisions)
+        return snapshot
+
+    def get(self):
+        """
+        获取当前数据集快照
+
+        Returns:
+            DatasetSnapshot: 当前快照；数据文件变化后返回重新加载的新快照
+        """
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now < self._next_check:
+            return snapshot
+
+        source_stat = self._stat_source()
+        ingest_state = self._stat_ingest()
+        if (snapshot is not None and snapshot.source_stat == source_stat
+                and snapshot.ingest_state == ingest_state):
+            self._next_check = now + self.check_interval
+            return snapshot
+
+        with self._lock:
+            # 等待锁期间可能已有其他线程完成了加载
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.source_stat != source_stat:
+                snapshot = self._load(source_stat)
+            if snapshot.ingest_state != ingest_state:
+                snapshot = self._apply_ingested(snapshot, ingest_state)
+            self._snapshot = snapshot
+            self._next_check = time.monotonic() + self.check_interval
+            return snapshot
+
+    def ingest_day(self, day):
+        """
+        导入一天的各区数据
+
+        数据先保存到导入目录（重启或其他进程重新加载时同样生效），
+        然后直接在当前快照上增量合并。
+
+        Args:
+            day (pandas.DataFrame): 原始单日数据
+
+        Returns:
+            DatasetSnapshot: 合并后的新快照
+
+        Raises:
+            IngestError: 数据校验失败或未配置导入目录
+        """
+        if not self.ingest_dir:
+            raise IngestError("未配置导入目录")
+        self.get()
+        with self._lock:
+            snapshot = self._snapshot
+            day = validate_day(day, snapshot.cube.regions)
+            path = save_day(day, self.ingest_dir)
+            mtime = os.stat(path).st_mtime_ns
+            state = dict(snapshot.ingest_state)
+            state[os.path.basename(path)] = mtime
+            snapshot = snapshot.with_day(day, state, mtime / 1e9)
+            self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self):
+        """强制下次访问时重新检查数据文件"""
+        self._next_check = 0.0
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 单遍描述统计引擎
+一次扫描同时得到所有数值列的计数、均值、标准差、最值、总和与分位数：
+均值/方差用按块合并的Welford算法（Chan并行公式）精确累积，
+中位数等分位数用KLL草图近似（数据量不超过草图容量时为精确值）；
+统计结果可逐块更新、跨文件/进程合并，数据分析脚本和 /api/stats 共用
+"""
+
+import math
+
+import numpy as np
+
+# KLL草图容量：数据量不超过该值时分位数精确，超过后秩误差约为 1.7/容量
+DEFAULT_SKETCH_SIZE = 4096
+
+# 整块数据按该行数分批送入草图，限制排序时的临时内存
+DEFAULT_BATCH_ROWS = 1_000_000
+
+# describe()输出的分位数
+DESCRIBE_QUANTILES = (0.25, 0.5, 0.75)
+
+
+class KLLSketch:
+    """
+    KLL分位数草图
+
+    各层缓冲区中的元素权重为2^层号；某层超过容量时排序后随机取奇数位或偶数位元素
+    升入上一层，元素个数减半、权重加倍。内存占用约为3倍容量，与数据量无关，可合并。
+    """
+
+    def __init__(self, k=DEFAULT_SKETCH_SIZE, seed=0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        """某层的容量：最高层为k，往下每层乘以2/3"""
+        depth = len(self.levels) - 1 - level
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        """从低到高压缩超出容量的层"""
+        level = 0
+        while level < len(self.levels):
+            buffer = self.levels[level]
+            if len(buffer) <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            buffer = np.sort(buffer)
+            # 奇数个元素时留下一个在本层
+            keep = buffer[-1:] if len(buffer) % 2 else buffer[:0]
+            even = buffer[:len(buffer) - len(keep)]
+            promoted = even[self.rng.integers(2)::2]
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            # 层数增加后各层容量变化，从最低层重新检查
+            level = 0
+
+    def update(self, values):
+        """加入一批数值（忽略NaN）"""
+        values = np.asarray(values)
+        if values.dtype.kind == 'f':
+            values = values[~np.isnan(values)]
+        values = values.astype(np.float64, copy=False)
+        if not len(values):
+            return
+        self.n += len(values)
+        # 大批数据先整体排序，再反复隔位取半（有序数组取半后仍然有序），
+        # 直接放入能容纳它的层，相当于只对这批数据做了若干次压缩，省去逐层重复排序
+        level = 0
+        if len(values) > self.k:
+            values = np.sort(values)
+            while len(values) > self.k:
+                values = values[self.rng.integers(2)::2]
+                level += 1
+            while len(self.levels) <= level:
+                self.levels.append(np.empty(0))
+        self.levels[level] = np.concatenate([self.levels[level], values])
+        self._compress()
+
+    def merge(self, other):
+        """合并另一个草图"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, buffer in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], buffer])
+        self.n += other.n
+        self._compress()
+        return self
+
+    @property
+    def exact(self):
+        """是否还没有发生过压缩（分位数为精确值）"""
+        return len(self.levels) == 1
+
+    def quantiles(self, qs):
+        """
+        估计分位数
+
+        未压缩时与numpy/pandas的线性插值结果相同；压缩后按元素权重取加权经验分布的分位点。
+        """
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        if self.exact:
+            return np.quantile(self.levels[0], qs)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(buf), 2.0 ** level) for level, buf in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1], side='left')
+        return items[order][np.minimum(positions, len(items) - 1)]
+
+
+class DescriptiveStats:
+    """
+    多列描述统计（单遍、可合并）
+
+    每列每批数据只做一次向量化扫描：计数、缺失数、总和、最值、Welford均值/二阶矩，
+    并把数值送入该列的KLL草图。
+    """
+
+    def __init__(self, columns=None, sketch_size=DEFAULT_SKETCH_SIZE, seed=0):
+        """
+        Args:
+            columns (list): 统计的列；None表示第一批数据中的全部数值列
+            sketch_size (int): 每列KLL草图的容量
+            seed (int): 草图压缩时的随机种子
+        """
+        self.columns = None
+        self.sketch_size = sketch_size
+        self.seed = seed
+        if columns is not None:
+            self._init_columns(columns)
+
+    def _init_columns(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.count = np.zeros(k, dtype=np.int64)
+        self.missing = np.zeros(k, dtype=np.int64)
+        self.sum = np.zeros(k)
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+        self.sketches = [KLLSketch(self.sketch_size, self.seed + i) for i in range(k)]
+
+    def _combine(self, count, total, mean, m2, minimum, maximum):
+        """合并各列的矩（Chan等人的并行Welford公式，用于合并两个统计对象）"""
+        combined = self.count + count
+        safe = np.maximum(combined, 1)
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / safe)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * count / safe)
+        self.count = combined
+        self.sum = self.sum + total
+        self.min = np.fmin(self.min, minimum)
+        self.max = np.fmax(self.max, maximum)
+
+    def _update_column(self, i, values):
+        """用一列数据更新第i列的统计（一次扫描求和/最值/二阶矩，并送入草图）"""
+        n = len(values)
+        if values.dtype.kind == 'f':
+            nan = np.isnan(values)
+            if nan.any():
+                values = values[~nan]
+        count = len(values)
+        self.missing[i] += n - count
+        if not count:
+            return
+        total = float(values.sum(dtype=np.float64))
+        mean = total / count
+        centered = values - mean
+        m2 = float(np.dot(centered, centered))
+        self._combine_column(i, count, total, mean, m2, float(values.min()), float(values.max()))
+        self.sketches[i].update(values)
+
+    def _combine_column(self, i, count, total, mean, m2, minimum, maximum):
+        """合并一列一批数据的矩（Chan等人的并行Welford公式）"""
+        combined = self.count[i] + count
+        delta = mean - self.mean[i]
+        self.mean[i] += delta * count / combined
+        self.m2[i] += m2 + delta ** 2 * self.count[i] * count / combined
+        self.count[i] = combined
+        self.sum[i] += total
+        self.min[i] = min(self.min[i], minimum)
+        self.max[i] = max(self.max[i], maximum)
+
+    def update_array(self, values):
+        """
+        用一批二维数据（行×列，列顺序与columns一致）更新统计
+
+        Args:
+            values (numpy.ndarray): 数值数组，浮点数中的NaN视为缺失
+        """
+        values = np.asarray(values)
+        if values.ndim == 1:
+            values = values[:, None]
+        for start in range(0, len(values), DEFAULT_BATCH_ROWS):
+            batch = values[start:start + DEFAULT_BATCH_ROWS]
+            for i in range(batch.shape[1]):
+                self._update_column(i, np.ascontiguousarray(batch[:, i]))
+
+    def update(self, frame):
+        """用一个DataFrame数据块更新统计（首次调用时可自动确定数值列）"""
+        if self.columns is None:
+            self._init_columns(col for col, dtype in frame.dtypes.items() if dtype.kind in 'iuf')
+        # 按列分批处理，直接使用各列的连续数组，不构造整块float64矩阵
+        for i, col in enumerate(self.columns):
+            column = frame[col].to_numpy()
+            for start in range(0, len(column), DEFAULT_BATCH_ROWS):
+                self._update_column(i, column[start:start + DEFAULT_BATCH_ROWS])
+
+    def merge(self, other):
+        """合并另一个统计对象（列必须相同）"""
+        if other.columns is None:
+            return self
+        if self.columns is None:
+            self._init_columns(other.columns)
+        self.missing += other.missing
+        self._combine(other.count, other.sum, other.mean, other.m2, other.min, other.max)
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+        return self
+
+    def _std(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt(self.m2 / (self.count - 1))
+
+    def quantiles(self, qs=DESCRIBE_QUANTILES):
+        """各列的分位数，形状为 (len(qs), 列数)"""
+        return np.column_stack([sketch.quantiles(qs) for sketch in self.sketches])
+
+    def result(self):
+        """DataFrame.describe()格式的统计表（行为统计量，列为各数值列）"""
+        import pandas as pd
+
+        empty = self.count == 0
+        q = self.quantiles()
+        rows = [self.count, np.where(empty, np.nan, self.mean), self._std(),
+                np.where(empty, np.nan, self.min), q[0], q[1], q[2], np.where(empty, np.nan, self.max)]
+        return pd.DataFrame(rows, index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'],
+                            columns=self.columns)
+
+    def to_dict(self, digits=4):
+        """
+        JSON友好的统计结果
+
+        Returns:
+            dict: {列名: {count, missing, sum, mean, std, min, q25, median, q75, max}}，
+                  以及分位数是否为精确值
+        """
+        def number(value):
+            value = float(value)
+            return None if math.isnan(value) or math.isinf(value) else round(value, digits)
+
+        q = self.quantiles()
+        std = self._std()
+        columns = {}
+        for i, col in enumerate(self.columns):
+            has_data = self.count[i] > 0
+            columns[col] = {
+                'count': int(self.count[i]),
+                'missing': int(self.missing[i]),
+                'sum': number(self.sum[i]),
+                'mean': number(self.mean[i]) if has_data else None,
+                'std': number(std[i]),
+                'min': number(self.min[i]),
+                'q25': number(q[0, i]),
+                'median': number(q[1, i]),
+                'q75': number(q[2, i]),
+                'max': number(self.max[i]),
+            }
+        return {
+            'columns': columns,
+            'exact_quantiles': all(sketch.exact for sketch in self.sketches),
+        }
+
+
+def describe_frame(df, columns=None, sketch_size=DEFAULT_SKETCH_SIZE):
+    """
+    单遍统计一个完整DataFrame的数值列
+
+    Args:
+        df (pandas.DataFrame): 数据
+        columns (list): 统计的列，默认为全部数值列
+
+    Returns:
+        DescriptiveStats: 统计结果
+    """
+    stats = DescriptiveStats(columns, sketch_size)
+    stats.update(df)
+    return stats
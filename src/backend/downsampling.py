@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 时间序列降采样
+Largest-Triangle-Three-Buckets（LTTB）算法：把长序列压缩为指定点数，
+保留折线的视觉形状（峰谷、拐点），并保证全序列的最高点一定被保留
+"""
+
+import numpy as np
+
+
+def lttb_indices(y, max_points, x=None):
+    """
+    LTTB降采样，返回被保留的点的下标
+
+    首尾两点固定保留，中间的点均分为 max_points-2 个桶；每个桶选出与
+    “上一个已选点”和“下一个桶的平均点”构成的三角形面积最大的点。
+    最后把序列最高点（第一个最大值，与summary_stats的peak_date一致）换入它所在的桶。
+
+    Args:
+        y (numpy.ndarray): 数值序列
+        max_points (int): 最多保留的点数（不小于3）
+        x (numpy.ndarray): 横坐标，默认为等间距的下标
+
+    Returns:
+        numpy.ndarray: 升序排列的下标；序列不长于max_points时为全部下标
+    """
+    n = len(y)
+    if max_points < 3:
+        raise ValueError("max_points 不能小于3")
+    if n <= max_points:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+    buckets = max_points - 2
+    # 第i个中间桶为 [edges[i], edges[i+1])，首尾点不属于任何桶
+    edges = (1 + np.arange(buckets + 1) * ((n - 2) / buckets)).astype(np.int64)
+    edges[-1] = n - 1
+
+    # 各桶的平均点一次算出（前缀和相减），作为前一个桶选点时的第三个顶点
+    cx = np.r_[0.0, np.cumsum(x)]
+    cy = np.r_[0.0, np.cumsum(y)]
+    counts = edges[1:] - edges[:-1]
+    avg_x = np.r_[(cx[edges[1:]] - cx[edges[:-1]]) / counts, x[-1]]
+    avg_y = np.r_[(cy[edges[1:]] - cy[edges[:-1]]) / counts, y[-1]]
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(buckets):
+        lo, hi = edges[i], edges[i + 1]
+        bx, by = x[lo:hi], y[lo:hi]
+        # 三角形面积的2倍（省去常数因子不影响比较）
+        area = np.abs((x[a] - avg_x[i + 1]) * (by - y[a]) - (x[a] - bx) * (avg_y[i + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+
+    peak = int(np.argmax(y))
+    if peak not in (0, n - 1):
+        bucket = int(np.searchsorted(edges, peak, 'right')) - 1
+        selected[bucket + 1] = peak
+    return selected
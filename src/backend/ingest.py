@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 每日数据增量导入
+解析并校验单日各区数据（CSV/JSON/xlsx），校验通过的数据以CSV保存在导入目录中
+"""
+
+import io
+import json
+import os
+
+import pandas as pd
+
+# 数据文件的12列结构
+SCHEMA_COLUMNS = [
+    '报告日期', '地区名称', '新增确诊', '累计确诊', '现存确诊', '新增康复',
+    '累计康复', '新增死亡', '累计死亡', '发病率(每10万人)', '人口', '风险等级',
+]
+
+# 必须为非负整数的列
+COUNT_COLUMNS = ['新增确诊', '累计确诊', '现存确诊', '新增康复', '累计康复', '新增死亡', '累计死亡', '人口']
+
+RISK_LEVELS = ['低风险', '中风险', '高风险']
+
+# 风险等级划分（发病率阈值，每10万人现存确诊）：不超过100为低风险，不超过500为中风险，否则为高风险
+RISK_THRESHOLDS = [100, 500]
+
+# 导入目录中识别的文件类型
+SUPPORTED_EXTENSIONS = ('.csv', '.json', '.xlsx')
+
+
+class IngestError(ValueError):
+    """导入数据不符合数据结构"""
+
+
+def parse_day_payload(content, fmt):
+    """
+    解析上传的单日数据
+
+    Args:
+        content (bytes): 文件内容
+        fmt (str): 'csv'、'json' 或 'xlsx'
+
+    Returns:
+        pandas.DataFrame: 原始数据（尚未校验）
+    """
+    try:
+        if fmt == 'csv':
+            return pd.read_csv(io.BytesIO(content), encoding='utf-8-sig')
+        if fmt == 'json':
+            payload = json.loads(content.decode('utf-8'))
+            # 支持 [{...}, ...] 或 {"rows": [{...}, ...]}
+            if isinstance(payload, dict):
+                payload = payload.get('rows', [])
+            return pd.DataFrame(payload)
+        if fmt == 'xlsx':
+            return pd.read_excel(io.BytesIO(content))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise IngestError(f"无法解析{fmt}数据: {e}")
+    raise IngestError(f"不支持的数据格式: {fmt}")
+
+
+def read_day_file(path):
+    """读取导入目录中的单日数据文件"""
+    fmt = os.path.splitext(path)[1].lstrip('.').lower()
+    with open(path, 'rb') as f:
+        return parse_day_payload(f.read(), fmt)
+
+
+def validate_day(df, known_regions):
+    """
+    校验单日数据并规范化列类型
+
+    Args:
+        df (pandas.DataFrame): 待校验数据
+        known_regions (iterable): 已有的地区名称
+
+    Returns:
+        pandas.DataFrame: 按SCHEMA_COLUMNS排列、类型已转换的数据
+
+    Raises:
+        IngestError: 数据不符合要求，错误信息列出所有问题
+    """
+    missing = [c for c in SCHEMA_COLUMNS if c not in df.columns]
+    if missing:
+        raise IngestError(f"缺少列: {', '.join(missing)}")
+    if df.empty:
+        raise IngestError("没有数据行")
+
+    df = df[SCHEMA_COLUMNS].copy()
+    errors = []
+
+    try:
+        df['报告日期'] = pd.to_datetime(df['报告日期'])
+    except (ValueError, TypeError) as e:
+        raise IngestError(f"报告日期格式错误: {e}")
+    if df['报告日期'].isna().any() or df['报告日期'].nunique() != 1:
+        errors.append("一次只能导入同一报告日期的数据")
+
+    df['地区名称'] = df['地区名称'].astype(str).str.strip()
+    unknown = sorted(set(df['地区名称']) - set(known_regions))
+    if unknown:
+        errors.append(f"未知的地区: {', '.join(unknown)}")
+    duplicated = sorted(set(df.loc[df['地区名称'].duplicated(), '地区名称']))
+    if duplicated:
+        errors.append(f"地区重复: {', '.join(duplicated)}")
+
+    for col in COUNT_COLUMNS + ['发病率(每10万人)']:
+        values = pd.to_numeric(df[col], errors='coerce')
+        bad = values.isna() | (values < 0)
+        if col in COUNT_COLUMNS:
+            bad |= values.notna() & (values != values.round())
+        if bad.any():
+            errors.append(f"{col} 应为非负{'整数' if col in COUNT_COLUMNS else '数值'}（第{', '.join(str(i + 1) for i in df.index[bad])}行）")
+        else:
+            df[col] = values.astype('int64' if col in COUNT_COLUMNS else 'float64')
+
+    bad_risk = ~df['风险等级'].isin(RISK_LEVELS)
+    if bad_risk.any():
+        errors.append(f"风险等级应为{'/'.join(RISK_LEVELS)}之一（第{', '.join(str(i + 1) for i in df.index[bad_risk])}行）")
+
+    if errors:
+        raise IngestError('; '.join(errors))
+    return df.reset_index(drop=True)
+
+
+def day_file_name(day):
+    """单日数据在导入目录中的文件名"""
+    return f"{day['报告日期'].iloc[0].strftime('%Y-%m-%d')}.csv"
+
+
+def save_day(day, ingest_dir):
+    """
+    把校验后的单日数据写入导入目录
+
+    同一日期已有文件时按地区合并，新上传的行覆盖同一地区的旧行。
+
+    Returns:
+        str: 写入的文件路径
+    """
+    os.makedirs(ingest_dir, exist_ok=True)
+    path = os.path.join(ingest_dir, day_file_name(day))
+    if os.path.exists(path):
+        existing = pd.read_csv(path, encoding='utf-8-sig', parse_dates=['报告日期'])
+        existing = existing[~existing['地区名称'].isin(day['地区名称'])]
+        day = pd.concat([existing, day], ignore_index=True)
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    day.to_csv(tmp_path, index=False, encoding='utf-8-sig', date_format='%Y-%m-%d')
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 请求耗时统计与采样分析
+不依赖prometheus_client，直接输出Prometheus文本格式（text/plain; version=0.0.4）：
+    各路由的请求耗时直方图和请求计数
+    数据加载（load）、聚合（aggregate）、JSON序列化（serialize）、图表渲染（render）各阶段的耗时直方图
+    其他指标由调用方在采集时提供（缓存命中、数据版本等）
+
+采样分析器默认关闭，可在运行时开启：后台线程按固定间隔采集正在处理请求的线程的调用栈，
+请求耗时超过阈值时保留该请求的折叠调用栈（flamegraph.pl / speedscope 可直接读取）。
+多进程模式下每个工作进程各自统计。
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+# 耗时直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    """Prometheus标签值转义"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    """{'a': 1} -> '{a="1"}'"""
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def format_value(value):
+    """数值输出（整数不带小数点）"""
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+class Histogram:
+    """按标签组合分别累计的直方图"""
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # 标签值元组 -> [各桶计数（不累计）, 总和, 总数]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        """记录一次观测值"""
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self):
+        """Prometheus文本格式的各行"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, [list(s[0]), s[1], s[2]]) for key, s in self._series.items())
+        for label_values, (counts, total, count) in items:
+            labels = dict(zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket{format_labels({**labels, 'le': le})} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {count}")
+        return lines
+
+
+class LabeledCounter:
+    """按标签组合分别累计的计数器"""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] += amount
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{format_labels(dict(zip(self.label_names, label_values)))} {value}")
+        return lines
+
+
+def metric_lines(name, kind, help_text, samples):
+    """
+    由调用方提供数值的指标
+
+    Args:
+        samples (list): [(标签字典, 数值), ...]
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{format_labels(labels)} {format_value(value)}" for labels, value in samples)
+    return lines
+
+
+class RequestMetrics:
+    """
+    请求级指标
+
+    请求开始时调用 start_request，结束时调用 finish_request；
+    处理过程中用 phase(名称) 统计各阶段耗时，阶段耗时同时累计到当前请求上。
+    """
+
+    def __init__(self, prefix='dashboard'):
+        self.prefix = prefix
+        self.request_duration = Histogram(
+            f"{prefix}_http_request_duration_seconds", '各路由的请求处理耗时（秒）', ('route', 'method'))
+        self.requests = LabeledCounter(
+            f"{prefix}_http_requests_total", '各路由的请求数', ('route', 'method', 'status'))
+        self.phase_duration = Histogram(
+            f"{prefix}_phase_duration_seconds", '数据加载/聚合/JSON序列化/图表渲染各阶段耗时（秒）', ('route', 'phase'))
+        self.errors = LabeledCounter(f"{prefix}_errors_total", '各类错误次数', ('kind',))
+        # 线程 -> (路由, {阶段: 耗时})，后台线程（如SSE推送）的阶段记在 route="background"
+        self._current = {}
+
+    def start_request(self, route):
+        self._current[threading.get_ident()] = (route, {})
+
+    def finish_request(self, route, method, status, seconds):
+        """
+        Returns:
+            dict: 该请求各阶段的耗时
+        """
+        _, phases = self._current.pop(threading.get_ident(), (route, {}))
+        self.request_duration.observe(seconds, route, method)
+        self.requests.inc(route, method, str(status))
+        return phases
+
+    @contextmanager
+    def phase(self, name):
+        """统计一个阶段的耗时"""
+        route, phases = self._current.get(threading.get_ident(), ('background', None))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.phase_duration.observe(seconds, route, name)
+            if phases is not None:
+                phases[name] = phases.get(name, 0.0) + seconds
+
+    def collect(self):
+        """本对象管理的全部指标行"""
+        lines = []
+        for metric in (self.request_duration, self.requests, self.phase_duration, self.errors):
+            lines.extend(metric.collect())
+        return lines
+
+
+def render_metrics(*groups):
+    """把多组指标行拼接为Prometheus文本"""
+    return '\n'.join(line for group in groups for line in group) + '\n'
+
+
+def _frame_name(frame):
+    """调用栈中一帧的名称：函数名 (文件名:定义行号)"""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def fold_stack(frame):
+    """把调用栈折叠为 'root;...;leaf' 字符串"""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def threads_are_greenlets():
+    """gevent替换了threading模块时，采样线程无法抢占运行"""
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('threading')
+
+
+class SamplingProfiler:
+    """
+    慢请求采样分析器
+
+    开启后由一个后台线程每隔interval秒读取 sys._current_frames()，
+    只记录正在处理请求的线程；请求结束时耗时不小于threshold才保留其调用栈，
+    最多保留keep个请求。关闭时停止采样线程，已保留的调用栈仍可读取。
+    """
+
+    def __init__(self, interval=0.005, threshold=0.25, keep=20):
+        self.interval = interval
+        self.threshold = threshold
+        self.captured = deque(maxlen=keep)
+        self.enabled = False
+        self.samples = 0
+        # 线程 -> 调用栈计数
+        self._active = {}
+        self._thread = None
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def configure(self, enabled=None, interval=None, threshold=None, keep=None):
+        """
+        运行时修改设置并开启/关闭采样
+
+        Raises:
+            RuntimeError: gevent模式下无法运行采样线程
+        """
+        if interval is not None:
+            self.interval = max(0.001, interval)
+        if threshold is not None:
+            self.threshold = max(0.0, threshold)
+        if keep is not None:
+            self.captured = deque(self.captured, maxlen=max(1, keep))
+        if enabled is None or enabled == self.enabled:
+            return
+        if enabled:
+            if threads_are_greenlets():
+                raise RuntimeError("gevent模式下不支持采样分析器")
+            self.enabled = True
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+        else:
+            self.enabled = False
+            self._active.clear()
+
+    def _run(self):
+        """采样线程"""
+        me = threading.get_ident()
+        # 关闭后立即重新开启时旧线程也会退出，始终只有一个采样线程
+        while self.enabled and self._thread is threading.current_thread():
+            frames = sys._current_frames()
+            for ident, stacks in list(self._active.items()):
+                frame = frames.get(ident)
+                if frame is not None and ident != me:
+                    stacks[fold_stack(frame)] += 1
+                    self.samples += 1
+            del frames
+            time.sleep(self.interval)
+
+    def begin(self):
+        """请求开始（未开启时不做任何事）"""
+        if self.enabled:
+            self._active[threading.get_ident()] = Counter()
+
+    def end(self, route, method, seconds):
+        """请求结束：耗时达到阈值时保留调用栈"""
+        stacks = self._active.pop(threading.get_ident(), None)
+        if not stacks or seconds < self.threshold:
+            return
+        with self._lock:
+            self._sequence += 1
+            self.captured.append({
+                'id': self._sequence,
+                'route': route,
+                'method': method,
+                'seconds': round(seconds, 4),
+                'captured_at': time.time(),
+                'samples': sum(stacks.values()),
+                'stacks': stacks,
+            })
+
+    def status(self):
+        """当前设置和已保留请求的概况"""
+        return {
+            'enabled': self.enabled,
+            'interval_ms': round(self.interval * 1000, 3),
+            'threshold_ms': round(self.threshold * 1000, 3),
+            'keep': self.captured.maxlen,
+            'samples': self.samples,
+            'captured': [{k: v for k, v in item.items() if k != 'stacks'} for item in list(self.captured)],
+        }
+
+    def folded(self, request_id=None):
+        """
+        折叠调用栈文本（每行 '栈 次数'）
+
+        Args:
+            request_id (int): 只输出该请求，None表示合并全部已保留的请求
+        """
+        total = Counter()
+        for item in list(self.captured):
+            if request_id is None or item['id'] == request_id:
+                total.update(item['stacks'])
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(total.items()))
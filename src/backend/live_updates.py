@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 实时推送
+后台线程监视数据集版本，版本变化时通过Server-Sent Events只推送内容发生变化的面板；
+支持增量的面板（每日趋势）只推送客户端已有版本之后新增的数据
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class UpdateBroadcaster:
+    """
+    数据更新广播器
+
+    所有SSE连接共享一个后台监视线程，连接本身只在条件变量上等待，
+    空闲连接不消耗CPU（配合gevent时每个连接只是一个协程）。
+    """
+
+    def __init__(self, store, render_panel, panels, render_delta=None, poll_interval=1.0, history_size=16,
+                 on_load_error=None):
+        """
+        Args:
+            store (DatasetStore): 数据集存储
+            render_panel (callable): (snapshot, 面板名) -> CachedResponse，返回面板的序列化响应
+            panels (iterable): 推送的面板名
+            render_delta (callable): (snapshot, 面板名, 客户端版本) -> CachedResponse，
+                返回面板相对客户端版本的增量，不支持增量的面板返回None
+            poll_interval (float): 检查数据版本的间隔（秒）
+            history_size (int): 保留多少个历史版本的面板ETag，用于断线重连后计算差异
+            on_load_error (callable): 后台线程加载数据失败时在except块中调用（记录日志和错误计数）
+        """
+        self.store = store
+        self.render_panel = render_panel
+        self.render_delta = render_delta
+        self.panels = tuple(panels)
+        self.poll_interval = poll_interval
+        self.history_size = history_size
+        self.on_load_error = on_load_error
+        self.version = None
+        self._snapshot = None
+        self._bodies = {}
+        self._history = OrderedDict()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """启动后台监视线程（只启动一次）"""
+        with self._start_lock:
+            if self._thread is None:
+                self._publish(self.store.get())
+                self._thread = threading.Thread(target=self._run, name='dataset-watcher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """后台循环：数据集版本变化时发布更新"""
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                snapshot = self.store.get()
+            except Exception:
+                if self.on_load_error is not None:
+                    self.on_load_error()
+                continue
+            if snapshot.version != self.version:
+                self._publish(snapshot)
+
+    def _publish(self, snapshot):
+        """渲染新版本的各面板并唤醒所有等待中的连接"""
+        entries = {name: self.render_panel(snapshot, name) for name in self.panels}
+        with self._condition:
+            self._history[snapshot.version] = {name: entry.etag for name, entry in entries.items()}
+            while len(self._history) > self.history_size:
+                self._history.popitem(last=False)
+            self._bodies = {name: entry.body.rstrip(b'\n') for name, entry in entries.items()}
+            self._snapshot = snapshot
+            self.version = snapshot.version
+            self._condition.notify_all()
+
+    def changed_panels(self, since_version):
+        """相对于since_version内容发生变化的面板；版本未知时返回全部面板"""
+        previous = self._history.get(since_version)
+        current = self._history[self.version]
+        if previous is None:
+            return list(self.panels)
+        return [name for name in self.panels if previous.get(name) != current[name]]
+
+    def event(self, since_version):
+        """
+        生成从since_version到当前版本的更新事件
+
+        Returns:
+            tuple: (当前版本, SSE消息文本)；没有更新时消息为None
+        """
+        with self._condition:
+            version, bodies, snapshot = self.version, self._bodies, self._snapshot
+            changed = self.changed_panels(since_version)
+        if version == since_version:
+            return version, None
+        if self.render_delta is not None and since_version is not None:
+            # 同一旧版本的所有连接共用一份增量（由render_delta缓存）
+            bodies = dict(bodies)
+            for name in changed:
+                entry = self.render_delta(snapshot, name, since_version)
+                if entry is not None:
+                    bodies[name] = entry.body.rstrip(b'\n')
+        # 直接拼接已序列化的面板JSON，不重新编码
+        panels = b','.join(b'"%s":%s' % (name.encode('utf-8'), bodies[name]) for name in changed)
+        changed_list = ','.join(f'"{name}"' for name in changed)
+        data = f'{{"version":"{version}","changed":[{changed_list}],"panels":{{'.encode('utf-8') + panels + b'}}'
+        return version, f"id: {version}\nevent: update\ndata: {data.decode('utf-8')}\n\n"
+
+    def wait(self, version, timeout):
+        """等待数据集版本不同于version，超时返回False"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.version != version, timeout)
+
+    def stream(self, last_event_id=None, heartbeat=15.0, retry_ms=3000):
+        """
+        单个SSE连接的消息生成器
+
+        Args:
+            last_event_id (str): 客户端已有的数据版本（Last-Event-ID）
+            heartbeat (float): 没有更新时发送心跳注释的间隔（秒）
+            retry_ms (int): 建议客户端断线后重连的等待时间（毫秒）
+        """
+        self.start()
+        yield f"retry: {retry_ms}\n\n"
+        version = last_event_id
+        while True:
+            current, message = self.event(version)
+            if message is not None:
+                version = current
+                yield message
+            elif not self.wait(version, heartbeat):
+                yield ": heartbeat\n\n"
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 多进程预派生（prefork）生产服务器
+主进程加载并预热数据后再fork工作进程，紧凑列式数据集、聚合立方体和预热的响应都在主进程的堆中，
+工作进程通过写时复制共享这些页面（NumPy数组的数据区只读，不会被复制），内存占用不随工作进程数增长；
+数据文件变化时平滑替换工作进程
+"""
+
+import gc
+import os
+import signal
+import socket
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+
+class PreforkServer:
+    """
+    预派生多进程服务器（仅支持提供fork的平台）
+
+    主进程只负责监听端口、监视数据和管理工作进程，请求全部由工作进程处理。
+    工作进程共享同一个监听套接字，由内核分配连接。
+    """
+
+    def __init__(self, app, store, warm_up, host='0.0.0.0', port=8080, workers=2,
+                 watch_interval=2.0, graceful_timeout=30.0, metrics=None):
+        """
+        Args:
+            app (flask.Flask): WSGI应用
+            store (DatasetStore): 应用使用的数据集存储
+            warm_up (callable): 接收数据集快照，在fork前预先生成缓存（如序列化响应）
+            host (str): 监听地址
+            port (int): 监听端口
+            workers (int): 工作进程数
+            watch_interval (float): 主进程检查数据文件变化的间隔（秒）
+            graceful_timeout (float): 平滑退出时等待进行中请求的最长时间（秒）
+            metrics (RequestMetrics): 主进程监视数据时的加载错误计入其errors（之后fork的工作进程继承该计数）
+        """
+        self.app = app
+        self.store = store
+        self.warm_up = warm_up
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.watch_interval = watch_interval
+        self.graceful_timeout = graceful_timeout
+        self.metrics = metrics
+        self._children = {}
+        self._generation = 0
+        self._stopping = False
+        self._reload_requested = False
+
+    def _prepare(self):
+        """在主进程中加载数据并预热缓存，返回当前快照"""
+        snapshot = self.store.get()
+        self.warm_up(snapshot)
+        # 把已有对象移出GC跟踪，避免子进程的垃圾回收触碰共享页面引发复制
+        gc.collect()
+        gc.freeze()
+        return snapshot
+
+    def _spawn(self, sock):
+        """fork一个工作进程"""
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(sock)
+            os._exit(0)
+        self._children[pid] = self._generation
+        return pid
+
+    def _run_worker(self, sock):
+        """工作进程主循环：在继承的监听套接字上提供服务，收到SIGTERM后处理完当前请求再退出"""
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_DFL)
+
+        # 统计正在由应用处理的请求数，退出前等待其归零（SSE长连接在应用返回后不计入）
+        in_flight = [0]
+        in_flight_lock = threading.Lock()
+
+        def counted_app(environ, start_response):
+            with in_flight_lock:
+                in_flight[0] += 1
+            try:
+                return self.app(environ, start_response)
+            finally:
+                with in_flight_lock:
+                    in_flight[0] -= 1
+
+        server = make_server(self.host, self.port, counted_app, threaded=True, fd=sock.fileno())
+
+        def shutdown(signum, frame):
+            # serve_forever运行在主线程中，需要在其他线程里调用shutdown
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        server.serve_forever()
+
+        deadline = time.monotonic() + self.graceful_timeout
+        while in_flight[0] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        # 留出时间把已生成的响应写回客户端
+        time.sleep(0.5)
+
+    def _reap(self):
+        """回收已退出的工作进程"""
+        while self._children:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            self._children.pop(pid, None)
+
+    def _stop_generation(self, generation, sig=signal.SIGTERM):
+        """向指定批次的工作进程发送信号"""
+        for pid, gen in list(self._children.items()):
+            if gen == generation:
+                try:
+                    os.kill(pid, sig)
+                except ProcessLookupError:
+                    pass
+
+    def _reload(self, sock):
+        """平滑重载：主进程重新加载数据后先启动新一批工作进程，再让旧的一批处理完请求后退出，返回新快照"""
+        print("🔄 数据已变化，正在平滑重载工作进程...")
+        gc.unfreeze()
+        snapshot = self._prepare()
+        old_generation = self._generation
+        self._generation += 1
+        for _ in range(self.workers):
+            self._spawn(sock)
+        self._stop_generation(old_generation)
+        print(f"✅ 已切换到数据版本 {snapshot.version}")
+        return snapshot
+
+    def serve(self):
+        """启动服务器并阻塞，直到收到SIGINT/SIGTERM"""
+        snapshot = self._prepare()
+        print(f"📦 数据已加载（版本 {snapshot.version}）")
+
+        sock = socket.create_server((self.host, self.port), backlog=1024)
+        sock.set_inheritable(True)
+
+        def stop(signum, frame):
+            self._stopping = True
+
+        def request_reload(signum, frame):
+            self._reload_requested = True
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGHUP, request_reload)
+
+        for _ in range(self.workers):
+            self._spawn(sock)
+        print(f"🚀 已启动 {self.workers} 个工作进程，监听 {self.host}:{self.port}（SIGHUP可手动平滑重载）")
+
+        next_check = time.monotonic() + self.watch_interval
+        try:
+            while not self._stopping:
+                time.sleep(0.2)
+                self._reap()
+                # 补足当前批次意外退出的工作进程
+                alive = sum(1 for gen in self._children.values() if gen == self._generation)
+                for _ in range(self.workers - alive):
+                    if not self._stopping:
+                        print("⚠️ 工作进程意外退出，重新启动")
+                        self._spawn(sock)
+
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self.store.invalidate()
+                    snapshot = self._reload(sock)
+                elif time.monotonic() >= next_check:
+                    next_check = time.monotonic() + self.watch_interval
+                    previous = snapshot
+                    try:
+                        snapshot = self.store.get()
+                    except Exception:
+                        if self.metrics is not None:
+                            self.metrics.errors.inc('data_load')
+                        self.app.logger.exception("数据加载错误")
+                        continue
+                    # 导入目录中的增量数据由工作进程各自合并，只有基础数据文件变化时才重载
+                    if snapshot.source_stat != previous.source_stat:
+                        snapshot = self._reload(sock)
+        finally:
+            print("\n👋 正在停止工作进程...")
+            for gen in set(self._children.values()):
+                self._stop_generation(gen)
+            deadline = time.monotonic() + self.graceful_timeout
+            while self._children and time.monotonic() < deadline:
+                self._reap()
+                time.sleep(0.1)
+            for pid in list(self._children):
+                os.kill(pid, signal.SIGKILL)
+            self._reap()
+            sock.close()
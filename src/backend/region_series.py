@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 地区优先的逐日序列矩阵
+聚合立方体的 日期×地区 矩阵按日期排列，取单个地区的整段序列是跨步访问；
+地区下钻接口改用 地区×指标×日期 的连续矩阵，每个地区每个指标的序列在内存中连续，
+响应只是一个切片视图（不复制）加上JSON或列式格式的编码。
+
+日期轴末尾预留空间，增量导入新的一天时只写入 地区数×指标数 个单元格。
+"""
+
+import numpy as np
+
+from compact_dataset import smallest_int_dtype
+
+# 下钻序列的指标列及其在接口中的字段名
+SERIES_METRICS = {
+    '新增确诊': 'new_cases',
+    '新增康复': 'recovered',
+    '新增死亡': 'deaths',
+    '现存确诊': 'active_cases',
+}
+
+
+def _fitting_dtype(dtype, values):
+    """能同时容纳已有类型和新取值的整数类型（不低于int32，追加时很少需要升级）"""
+    return np.promote_types(np.promote_types(dtype, np.int32), smallest_int_dtype(np.asarray(values)))
+
+
+class RegionSeries:
+    """
+    地区×指标×日期 矩阵（最后一维连续）
+
+    与聚合立方体一样创建后不再修改：多个对象可以共享同一块存储，各自只读取前n_dates天，
+    追加只写入这之后的位置，因此不会影响正在被读取的旧对象。
+    """
+
+    def __init__(self, data, n_dates, owner=None):
+        """
+        Args:
+            data (numpy.ndarray): 形状为(地区数, 指标数, 容量)的存储
+            n_dates (int): 有效天数
+            owner (list): 存储的已写入天数（共享同一存储的对象共用这个列表）
+        """
+        self._data = data
+        self._owner = owner if owner is not None else [n_dates]
+        self.n_dates = n_dates
+        self.values = data[:, :, :n_dates]
+
+    @classmethod
+    def from_matrices(cls, matrices, headroom=64):
+        """
+        从各指标的 日期×地区 矩阵构建
+
+        Args:
+            matrices (dict): SERIES_METRICS中各指标名 -> 日期×地区矩阵
+            headroom (int): 日期轴预留的天数
+        """
+        n_dates, n_regions = matrices['新增确诊'].shape
+        dtype = np.dtype(np.int32)
+        for metric in SERIES_METRICS:
+            dtype = _fitting_dtype(dtype, matrices[metric])
+        data = np.zeros((n_regions, len(SERIES_METRICS), n_dates + headroom), dtype=dtype)
+        for m, metric in enumerate(SERIES_METRICS):
+            data[:, m, :n_dates] = matrices[metric].T
+        return cls(data, n_dates)
+
+    def appended(self, rows):
+        """
+        追加一天（O(地区数×指标数)）
+
+        存储已满、存储的新类型放不下、或其他对象已在之后写入过数据时，先复制到新存储。
+
+        Args:
+            rows (dict): 各指标名 -> 当天各地区的值
+        """
+        n = self.n_dates
+        column = np.stack([rows[metric] for metric in SERIES_METRICS], axis=1)
+        dtype = _fitting_dtype(self._data.dtype, column)
+        data, owner = self._data, self._owner
+        if owner[0] != n or n == data.shape[2] or dtype != data.dtype:
+            data = np.zeros(data.shape[:2] + (2 * n + 64,), dtype=dtype)
+            data[:, :, :n] = self.values
+            owner = [n]
+        data[:, :, n] = column
+        owner[0] = n + 1
+        return RegionSeries(data, n + 1, owner)
+
+    def with_day_at(self, pos, insert, columns, rows):
+        """
+        补录或更正第pos天（插入新日期时后面的日期整体后移，O(数据量)）
+
+        Args:
+            pos (int): 日期下标
+            insert (bool): 是否在pos处插入新的一天
+            columns (list): 当天有数据的地区列号
+            rows (dict): 各指标名 -> 当天各地区的值
+        """
+        values = self.values
+        if insert:
+            values = np.insert(values, pos, 0, axis=2)
+        matrices = {metric: values[:, m, :].T.copy() for m, metric in enumerate(SERIES_METRICS)}
+        for metric in SERIES_METRICS:
+            matrices[metric][pos, columns] = np.asarray(rows[metric])[columns]
+        return RegionSeries.from_matrices(matrices)
+
+    def series(self, region, lo, hi):
+        """
+        一个地区第[lo, hi)天的各指标序列
+
+        Returns:
+            dict: 字段名 -> 连续内存上的切片视图（不复制）
+        """
+        return {name: self.values[region, m, lo:hi] for m, name in enumerate(SERIES_METRICS.values())}
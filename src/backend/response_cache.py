@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 序列化响应缓存
+每个数据集版本的每个API响应只渲染一次JSON字节，并生成强ETag
+"""
+
+import hashlib
+import threading
+
+
+class CachedResponse:
+    """已序列化的API响应"""
+
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+
+
+class ResponseCache:
+    """
+    按数据集版本缓存的响应字节
+
+    数据集版本变化后旧版本的条目整体失效。读取不加锁；
+    并发请求可能重复渲染同一条目，但结果相同，只保留一份。
+    """
+
+    def __init__(self, max_entries=256):
+        """
+        Args:
+            max_entries (int): 单个版本最多缓存的响应数（带查询参数的请求会产生多个条目）
+        """
+        self.max_entries = max_entries
+        # (版本, 条目字典) 作为一个整体原子替换
+        self._state = (None, {})
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version, key, render):
+        """
+        获取缓存的响应，缺失时调用render生成
+
+        Args:
+            version (str): 数据集版本
+            key (str): 响应键（路由名+参数）
+            render (callable): 无参函数，返回序列化后的bytes
+
+        Returns:
+            CachedResponse: 缓存条目
+        """
+        current_version, entries = self._state
+        if current_version == version:
+            entry = entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+
+        self.misses += 1
+        entry = CachedResponse(render())
+        with self._lock:
+            current_version, entries = self._state
+            if current_version != version:
+                entries = {}
+                self._state = (version, entries)
+            if len(entries) >= self.max_entries:
+                # 淘汰最早写入的条目
+                entries.pop(next(iter(entries)))
+            entries[key] = entry
+        return entry
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._state = (None, {})
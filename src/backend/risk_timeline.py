@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 风险等级时间线
+把每个地区逐日的风险等级压缩为游程区间（等级不变的连续日期只记一条），
+在区间上用二分查找回答：
+    某一天各地区的风险等级（以及从哪天开始处于该等级）
+    某段日期内发生的等级转换（转换矩阵）
+
+区间按（地区, 起始日）排列，编码为 地区×KEY_STRIDE+起始日 的单个有序整数数组，
+所有地区的查询合并为一次 searchsorted，耗时只与地区数和区间数的对数有关，不随天数线性增长。
+转换记录另按日期排列，范围查询只访问范围内的记录。
+"""
+
+import numpy as np
+
+# 区间键中地区编号的步长（天数上限）
+KEY_STRIDE = 1 << 32
+
+
+class RiskTimeline:
+    """
+    各地区风险等级的游程区间
+
+    与聚合立方体一样创建后不再修改；追加新的一天时返回新对象，
+    没有地区改变等级时直接共享全部数组。
+
+    风险等级编码与聚合立方体的 risk_categories 一致，-1 表示当天没有该地区的数据；
+    缺失也作为一种状态记入区间，但不计入转换。
+    """
+
+    def __init__(self, keys, codes, n_dates, n_regions, transitions):
+        """
+        Args:
+            keys (numpy.ndarray): 各区间的 地区×KEY_STRIDE+起始日，升序
+            codes (numpy.ndarray): 各区间的风险等级编码
+            n_dates (int): 天数
+            n_regions (int): 地区数
+            transitions (tuple): 按日期排列的转换记录 (日期下标, 地区, 原等级, 新等级)
+        """
+        self.keys = keys
+        self.codes = codes
+        self.n_dates = n_dates
+        self.n_regions = n_regions
+        self.transitions = transitions
+        # 各地区最后一个区间（即最近一天）的等级
+        if n_dates:
+            self.last_codes = codes[np.searchsorted(keys, (np.arange(n_regions) + 1) * KEY_STRIDE) - 1]
+        else:
+            self.last_codes = np.full(n_regions, -1, dtype=codes.dtype)
+
+    @classmethod
+    def from_matrix(cls, risk_matrix):
+        """
+        从日期×地区的风险等级编码矩阵构建
+
+        Args:
+            risk_matrix (numpy.ndarray): 聚合立方体的 risk_matrix
+        """
+        n_dates, n_regions = risk_matrix.shape
+        change = np.ones(risk_matrix.shape, dtype=bool)
+        change[1:] = risk_matrix[1:] != risk_matrix[:-1]
+        # 转置后按行优先取出，即按（地区, 起始日）排列
+        regions, starts = np.nonzero(change.T)
+        keys = regions.astype(np.int64) * KEY_STRIDE + starts
+        codes = risk_matrix[starts, regions]
+
+        # 每个地区的第一个区间从第0天开始，其余区间的起始日就是一次转换
+        moved = np.flatnonzero(starts > 0)
+        order = moved[np.argsort(starts[moved], kind='stable')]
+        transitions = (starts[order].astype(np.int64), regions[order].astype(np.int64),
+                       codes[order - 1], codes[order])
+        return cls(keys, codes, n_dates, n_regions, transitions)
+
+    def appended(self, row):
+        """
+        追加一天的各地区风险等级编码
+
+        只有等级发生变化的地区新增区间（插入有序数组，O(区间数)的内存复制）；
+        没有变化时为O(地区数)。
+        """
+        n = self.n_dates
+        if n == 0:
+            return RiskTimeline.from_matrix(np.asarray(row)[np.newaxis, :])
+        changed = np.flatnonzero(row != self.last_codes)
+        if not len(changed):
+            return RiskTimeline(self.keys, self.codes, n + 1, self.n_regions, self.transitions)
+
+        # 新区间插在各自地区的末尾
+        positions = np.searchsorted(self.keys, (changed + 1) * KEY_STRIDE)
+        keys = np.insert(self.keys, positions, changed.astype(np.int64) * KEY_STRIDE + n)
+        codes = np.insert(self.codes, positions, row[changed])
+        # 新转换的日期最大，追加在末尾即保持按日期排列
+        new = (np.full(len(changed), n, dtype=np.int64), changed.astype(np.int64),
+               self.last_codes[changed], row[changed])
+        transitions = tuple(np.concatenate([old, add]) for old, add in zip(self.transitions, new))
+        return RiskTimeline(keys, codes, n + 1, self.n_regions, transitions)
+
+    def state_at(self, day):
+        """
+        第day天各地区的风险等级
+
+        Returns:
+            tuple: (各地区等级编码, 各地区进入该等级的日期下标)
+        """
+        regions = np.arange(self.n_regions, dtype=np.int64)
+        pos = np.searchsorted(self.keys, regions * KEY_STRIDE + day, 'right') - 1
+        return self.codes[pos], self.keys[pos] - regions * KEY_STRIDE
+
+    def intervals(self, region, lo, hi):
+        """
+        地区在[lo, hi)天内的等级区间（裁剪到范围内）
+
+        Returns:
+            tuple: (起始日下标, 结束日下标（含）, 等级编码)
+        """
+        base = region * KEY_STRIDE
+        first = max(int(np.searchsorted(self.keys, base + lo, 'right')) - 1,
+                    int(np.searchsorted(self.keys, base)))
+        last = int(np.searchsorted(self.keys, base + hi, 'left'))
+        if lo >= hi:
+            first = last
+        starts = self.keys[first:last] - base
+        ends = np.r_[starts[1:] - 1, hi - 1] if len(starts) else starts
+        return np.maximum(starts, lo), ends, self.codes[first:last]
+
+    def transition_matrix(self, lo, hi, n_levels, columns=None):
+        """
+        [lo, hi)天内（前后两天都在范围内）的等级转换次数
+
+        Args:
+            lo, hi (int): 日期切片
+            n_levels (int): 风险等级数
+            columns (list): 只统计这些地区，None表示全部
+
+        Returns:
+            numpy.ndarray: (n_levels, n_levels) 矩阵，行为原等级、列为新等级
+        """
+        days, regions, before, after = self.transitions
+        a = int(np.searchsorted(days, lo + 1, 'left'))
+        b = int(np.searchsorted(days, hi, 'left'))
+        before, after = before[a:b].astype(np.int64), after[a:b].astype(np.int64)
+        keep = (before >= 0) & (after >= 0)
+        if columns is not None:
+            keep &= np.isin(regions[a:b], columns)
+        flat = before[keep] * n_levels + after[keep]
+        return np.bincount(flat, minlength=n_levels * n_levels).reshape(n_levels, n_levels)
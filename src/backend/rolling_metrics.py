@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 滚动窗口与增长率指标
+基于每日新增确诊的逐日累加数组C（从数据集第一天开始累加，不是数据中的累计确诊列，
+数据从疫情中途开始时两者不同）计算各地区（及全港）的：
+    7日滚动平均          (C[t] - C[t-7]) / 7
+    周环比增长率          本周7日合计 / 上周7日合计 - 1
+    倍增时间（天）        7 × ln2 / ln(C[t] / C[t-7])，C不增长时为空
+    7日发病率(每10万人)   本周7日合计 / 人口 × 100000
+
+任意一天、任意窗口的合计都只是累加数组两行相减；追加新的一天只需在累加数组末尾加一行
+（O(地区数)），不重新滚动整段历史。窗口按数据中的报告日计数。
+"""
+
+import math
+
+import numpy as np
+
+from aggregates import RowBuffer
+
+# 滚动窗口天数
+ROLLING_WINDOW = 7
+
+
+def _metrics(current, week_ago, two_weeks_ago, population):
+    """由当天、7天前、14天前的累加值计算各项指标（各参数形状相同或可广播，缺失为NaN）"""
+    w = ROLLING_WINDOW
+    this_week = current - week_ago
+    last_week = week_ago - two_weeks_ago
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.where(last_week > 0, this_week / last_week - 1, np.nan)
+        ratio = current / week_ago
+        doubling = np.where((week_ago > 0) & (ratio > 1), w * math.log(2) / np.log(ratio), np.nan)
+        incidence = np.where(population > 0, this_week / population * 1e5, np.nan)
+    return {
+        'rolling_avg_7d': this_week / w,
+        'wow_growth': growth,
+        'doubling_days': doubling,
+        'incidence_7d_per_100k': incidence,
+    }
+
+
+# 各指标输出时保留的小数位数
+METRIC_DIGITS = {'rolling_avg_7d': 2, 'wow_growth': 4, 'doubling_days': 2, 'incidence_7d_per_100k': 2}
+
+
+def _to_list(values, digits):
+    """数组转为JSON列表，NaN/无穷大转为None"""
+    values = np.round(np.asarray(values, dtype=np.float64), digits)
+    return [None if not math.isfinite(v) else v for v in values.tolist()]
+
+
+class RollingMetrics:
+    """
+    新增确诊的逐日累加矩阵（最后一列为全港合计）及在其上的窗口指标
+
+    与聚合立方体一样创建后不再修改；追加新的一天时返回共享存储的新对象。
+    """
+
+    def __init__(self, buffer, n_dates, population):
+        """
+        Args:
+            buffer (RowBuffer): 累加矩阵的行缓冲区，形状为(日期数, 地区数+1)
+            n_dates (int): 有效行数
+            population (numpy.ndarray): 各地区人口（最后一个元素为全港合计）
+        """
+        self._buffer = buffer
+        self.cumulative = buffer.data[:n_dates]
+        self.population = population
+
+    @classmethod
+    def from_matrix(cls, cases, population):
+        """
+        从日期×地区的新增确诊矩阵构建
+
+        Args:
+            cases (numpy.ndarray): 新增确诊矩阵
+            population (numpy.ndarray): 各地区人口
+        """
+        with_total = np.column_stack([cases, cases.sum(axis=1)])
+        population = np.append(population, population.sum()).astype(np.float64)
+        return cls(RowBuffer(np.cumsum(with_total, axis=0)), len(cases), population)
+
+    def appended(self, row, population=None):
+        """
+        追加一天的各地区新增确诊（O(地区数)）
+
+        Args:
+            row (numpy.ndarray): 当天各地区新增确诊
+            population (numpy.ndarray): 更新后的各地区人口，None表示不变
+        """
+        n = len(self.cumulative)
+        last = self.cumulative[-1] if n else 0
+        new_row = last + np.append(row, row.sum())
+        if population is not None:
+            population = np.append(population, population.sum()).astype(np.float64)
+        else:
+            population = self.population
+        return RollingMetrics(self._buffer.appended(n, new_row), n + 1, population)
+
+    def _column(self, columns):
+        """选定地区的累加序列和人口（None表示全港）"""
+        if columns is None:
+            return self.cumulative[:, -1], self.population[-1]
+        if len(columns) == 1:
+            return self.cumulative[:, columns[0]], self.population[columns[0]]
+        return self.cumulative[:, columns].sum(axis=1), self.population[columns].sum()
+
+    def _window(self, cumulative, lo, hi, lag):
+        """
+        第[lo, hi)天各自往前lag天的累加值；超出数据开头的位置为NaN
+
+        只读取[lo-lag, hi)范围内的行，与历史长度无关。
+        """
+        out = np.full(hi - lo, np.nan)
+        start = max(lo, lag)
+        if start < hi:
+            out[start - lo:] = cumulative[start - lag:hi - lag]
+        # 恰好在开头之前一天的累加值为0（窗口完整）
+        if lo <= lag - 1 < hi:
+            out[lag - 1 - lo] = 0.0
+        return out
+
+    def series(self, lo, hi, columns=None):
+        """
+        第[lo, hi)天的各项指标序列
+
+        Returns:
+            dict: rolling_avg_7d, wow_growth, doubling_days, incidence_7d_per_100k（numpy数组，不可计算处为NaN）
+        """
+        cumulative, population = self._column(columns)
+        return _metrics(cumulative[lo:hi].astype(np.float64),
+                        self._window(cumulative, lo, hi, ROLLING_WINDOW),
+                        self._window(cumulative, lo, hi, 2 * ROLLING_WINDOW),
+                        np.float64(population))
+
+    def to_dict(self, lo, hi, columns=None):
+        """series的JSON格式"""
+        return {name: _to_list(values, METRIC_DIGITS[name])
+                for name, values in self.series(lo, hi, columns).items()}
+
+    def latest(self):
+        """
+        最近一天各地区（及全港）的指标，只读取3行累加值（与历史长度无关）
+
+        Returns:
+            dict: 指标名 -> 长度为地区数+1的JSON列表（最后一个为全港）
+        """
+        n = len(self.cumulative)
+        rows = np.full((3, self.cumulative.shape[1]), np.nan)
+        for k, lag in enumerate((0, ROLLING_WINDOW, 2 * ROLLING_WINDOW)):
+            t = n - 1 - lag
+            if t >= 0:
+                rows[k] = self.cumulative[t]
+            elif t == -1:
+                rows[k] = 0.0
+        return {name: _to_list(values, METRIC_DIGITS[name])
+                for name, values in _metrics(rows[0], rows[1], rows[2], self.population).items()}
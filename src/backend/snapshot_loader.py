@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 多快照并行加载
+发现数据目录中所有按日期命名的数据快照（香港各区疫情数据_YYYYMMDD.xlsx/csv），
+用进程池并行解析，再按“较新的快照优先”合并为一个数据集
+
+每个工作进程把一个快照编译为列式缓存并只返回缓存目录，主进程内存映射读取，
+解析结果不需要经过进程间序列化；合并结果同样写入列式缓存，文件不变时直接映射读取
+
+用法：
+    python3 src/backend/snapshot_loader.py data/ --workers 4
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from data_cache import (CATEGORICAL_COLUMNS, DEFAULT_CACHE_ROOT, build_cache, cache_dir_for,
+                        file_sha256, read_cache, read_source, write_cache)
+
+# 数据快照文件名：香港各区疫情数据_YYYYMMDD.xlsx（或.csv）
+SNAPSHOT_PATTERN = re.compile(r'^香港各区疫情数据_(\d{8})\.(xlsx|csv)$', re.IGNORECASE)
+
+# 同一天同一地区只保留一行
+KEY_COLUMNS = ['报告日期', '地区名称']
+
+# 合并结果在缓存目录中的名称前缀
+MERGED_CACHE_STEM = '香港各区疫情数据_merged'
+
+
+def discover_snapshot_files(data_dir):
+    """
+    查找目录中的数据快照文件（不递归子目录）
+
+    Returns:
+        list: [(快照日期YYYYMMDD, 文件路径), ...]，按日期从旧到新排列
+    """
+    found = []
+    for entry in os.scandir(data_dir):
+        match = SNAPSHOT_PATTERN.match(entry.name)
+        if match and entry.is_file():
+            found.append((match.group(1), entry.path))
+    return sorted(found)
+
+
+def default_workers(count):
+    """进程池大小：环境变量 DASHBOARD_LOAD_WORKERS，默认为CPU核数，不超过快照数"""
+    workers = int(os.environ.get('DASHBOARD_LOAD_WORKERS') or os.cpu_count() or 1)
+    return max(1, min(workers, count))
+
+
+def _parse_snapshot(path, cache_root):
+    """
+    解析一个快照（在工作进程中执行）
+
+    Returns:
+        tuple: (路径, 缓存目录或DataFrame, 耗时秒)；缓存目录不可写时返回解析出的DataFrame
+    """
+    start = time.perf_counter()
+    if cache_root:
+        try:
+            result = build_cache(path, cache_root)
+        except OSError:
+            result = read_source(path)
+    else:
+        result = read_source(path)
+    return path, result, time.perf_counter() - start
+
+
+def merge_snapshots(frames):
+    """
+    合并多个快照的数据
+
+    同一（报告日期, 地区名称）出现在多个快照中时保留最新快照的行，
+    结果按报告日期排列，同一天内保持地区在快照中的顺序。
+
+    Args:
+        frames (list): 按快照从旧到新排列的DataFrame
+
+    Returns:
+        pandas.DataFrame: 合并后的数据（地区名称/风险等级为分类类型）
+    """
+    if len(frames) == 1:
+        return frames[0]
+    df = pd.concat(frames, ignore_index=True)
+    df = df.drop_duplicates(KEY_COLUMNS, keep='last')
+    df = df.sort_values('报告日期', kind='stable').reset_index(drop=True)
+    # 各快照的分类编码表可能不同，拼接后重新编码
+    for col in CATEGORICAL_COLUMNS:
+        df[col] = df[col].astype('category')
+    return df
+
+
+def print_progress(done, total, path, seconds):
+    """默认的进度输出"""
+    print(f"📥 [{done}/{total}] {os.path.basename(path)} 解析完成，用时 {seconds:.2f} 秒")
+
+
+def load_snapshot_files(paths, workers=None, progress=None, cache_root=DEFAULT_CACHE_ROOT):
+    """
+    并行解析多个快照文件并合并
+
+    Args:
+        paths (list): 按快照从旧到新排列的文件路径
+        workers (int): 进程数，None表示default_workers；1表示在当前进程中依次解析
+        progress (callable): 每解析完一个文件调用 progress(已完成数, 总数, 路径, 耗时秒)
+        cache_root (str): 列式缓存根目录；None表示不读写缓存（每次都重新解析）
+
+    Returns:
+        pandas.DataFrame: 合并后的数据
+    """
+    paths = list(paths)
+    if not paths:
+        raise ValueError("没有需要加载的数据快照")
+
+    merged_dir = merged_hash = None
+    if cache_root and len(paths) > 1:
+        # 合并结果以各快照的文件名和内容哈希为键，任何一个快照变化都会重新合并
+        digest = hashlib.sha256()
+        for path in paths:
+            digest.update(f"{os.path.basename(path)}:{file_sha256(path)}\n".encode('utf-8'))
+        merged_hash = digest.hexdigest()
+        merged_dir = cache_dir_for(MERGED_CACHE_STEM, merged_hash, cache_root)
+        if os.path.isdir(merged_dir):
+            try:
+                return read_cache(merged_dir)
+            except Exception as e:
+                print(f"⚠️ 合并缓存读取失败，重新构建: {e}")
+
+    workers = default_workers(len(paths)) if workers is None else max(1, min(workers, len(paths)))
+    results = {}
+    if workers == 1:
+        for path in paths:
+            _, results[path], seconds = _parse_snapshot(path, cache_root)
+            if progress:
+                progress(len(results), len(paths), path, seconds)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_parse_snapshot, path, cache_root) for path in paths]
+            for future in as_completed(futures):
+                path, results[path], seconds = future.result()
+                if progress:
+                    progress(len(results), len(paths), path, seconds)
+
+    frames = [read_cache(r) if isinstance(r, str) else r for r in (results[path] for path in paths)]
+    df = merge_snapshots(frames)
+    if merged_dir:
+        try:
+            write_cache(df, merged_dir, merged_hash)
+            _remove_stale_merged(merged_dir, cache_root)
+            return read_cache(merged_dir)
+        except OSError as e:
+            print(f"⚠️ 合并缓存写入失败，直接使用合并结果: {e}")
+    return df
+
+
+def _remove_stale_merged(keep_dir, cache_root):
+    """删除旧的合并缓存"""
+    prefix = f"{MERGED_CACHE_STEM}-"
+    for name in os.listdir(cache_root):
+        path = os.path.join(cache_root, name)
+        if path != keep_dir and name.startswith(prefix) and '.tmp-' not in name:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_snapshot_dir(data_dir, workers=None, progress=None, cache_root=DEFAULT_CACHE_ROOT):
+    """
+    加载目录中的全部数据快照
+
+    Raises:
+        FileNotFoundError: 目录中没有快照文件
+    """
+    files = discover_snapshot_files(data_dir)
+    if not files:
+        raise FileNotFoundError(f"目录中没有数据快照文件（香港各区疫情数据_YYYYMMDD.xlsx）: {data_dir}")
+    return load_snapshot_files([path for _, path in files], workers, progress, cache_root)
+
+
+def main():
+    """命令行入口：并行加载目录中的全部快照并输出合并结果概况"""
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description='并行加载并合并多个疫情数据快照')
+    parser.add_argument('data_dir', nargs='?', default=os.path.join(project_root, 'data'), help='数据目录')
+    parser.add_argument('--workers', type=int, help='进程数（默认为CPU核数）')
+    parser.add_argument('--no-cache', action='store_true', help='不读写列式缓存，全部重新解析')
+    args = parser.parse_args()
+
+    files = discover_snapshot_files(args.data_dir)
+    if not files:
+        print(f"❌ 目录中没有数据快照文件: {args.data_dir}")
+        sys.exit(1)
+    workers = args.workers or default_workers(len(files))
+    print(f"🔍 发现 {len(files)} 个数据快照（{files[0][0]} ~ {files[-1][0]}），使用 {workers} 个进程")
+
+    start = time.perf_counter()
+    df = load_snapshot_files([path for _, path in files], workers, print_progress,
+                             None if args.no_cache else DEFAULT_CACHE_ROOT)
+    elapsed = time.perf_counter() - start
+    print(f"✅ 合并后 {len(df):,} 行，{df['报告日期'].nunique()} 天 × {df['地区名称'].nunique()} 个地区，"
+          f"用时 {elapsed:.2f} 秒")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 大规模合成数据生成
+按真实数据的12列结构生成任意天数、任意地区数的疫情数据，全部计算都是整块NumPy运算，
+千万行数据只需数秒即可生成；可输出xlsx、CSV或列式（.npy）格式
+
+数据之间的关系与真实数据一致：
+    累计确诊/累计康复/累计死亡 = 对应每日新增的逐日累加
+    现存确诊 = 累计确诊 - 累计康复 - 累计死亡
+    发病率(每10万人) = 现存确诊 / 人口 × 100000
+    风险等级 = 发病率不超过100为低风险，不超过500为中风险，否则为高风险
+
+用法：
+    python3 src/backend/synthetic_data.py --days 3650 --regions 200 -o data/synthetic.csv
+    python3 src/backend/synthetic_data.py --days 10000 --regions 1000 -o data/synthetic_10m
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from ingest import RISK_LEVELS, RISK_THRESHOLDS, SCHEMA_COLUMNS
+
+# 真实数据中的18区及人口（按数据文件中的顺序）
+HK_DISTRICTS = [
+    ('中西区', 243000), ('湾仔区', 152000), ('东区', 550000), ('南区', 270000),
+    ('油尖旺区', 328000), ('深水埗区', 405000), ('九龙城区', 418000), ('黄大仙区', 420000),
+    ('观塘区', 648000), ('葵青区', 511000), ('荃湾区', 307000), ('屯门区', 488000),
+    ('元朗区', 619000), ('北区', 307000), ('大埔区', 310000), ('沙田区', 660000),
+    ('西贡区', 461000), ('离岛区', 158000),
+]
+
+# xlsx单个工作表的行数上限（含表头）
+XLSX_MAX_ROWS = 1048575
+
+
+def region_table(regions, rng):
+    """
+    生成地区名称和人口
+
+    前18个为真实的香港18区；更多地区复制真实地区并加编号后缀（如“中西区-2”），
+    人口在原地区基础上随机浮动。
+    """
+    base_names = [name for name, _ in HK_DISTRICTS]
+    base_population = np.array([pop for _, pop in HK_DISTRICTS])
+    index = np.arange(regions)
+    copy_no, base = np.divmod(index, len(HK_DISTRICTS))
+    names = [base_names[b] if c == 0 else f"{base_names[b]}-{c + 1}" for b, c in zip(base, copy_no)]
+    jitter = np.where(copy_no == 0, 1.0, rng.lognormal(0.0, 0.3, regions))
+    population = np.round(base_population[base] * jitter, -3).astype(np.int64)
+    return names, np.maximum(population, 1000)
+
+
+def epidemic_curve(length, waves, rng):
+    """
+    生成全局的每10万人每日新增基准曲线（若干个先快升后缓降的疫情波次叠加）
+
+    Returns:
+        numpy.ndarray: 长度为length的曲线
+    """
+    t = np.arange(length, dtype=np.float64)
+    curve = np.full(length, 0.2)
+    centers = np.sort(rng.uniform(0, length, waves))
+    for center in centers:
+        rise = rng.uniform(5, 20)
+        decay = rise * rng.uniform(1.5, 3.0)
+        peak = rng.lognormal(np.log(15.0), 0.6)
+        offset = t - center
+        width = np.where(offset < 0, rise, decay)
+        curve += peak * np.exp(-0.5 * (offset / width) ** 2)
+    return curve
+
+
+def generate(days=180, regions=18, start='2022-01-01', waves=None, seed=0,
+             death_rate=0.004, recovery_delay=4, death_delay=10):
+    """
+    生成合成疫情数据
+
+    Args:
+        days (int): 天数
+        regions (int): 地区数
+        start (str): 起始日期
+        waves (int): 疫情波次数，默认每120天一波
+        seed (int): 随机种子（相同参数和种子生成相同数据）
+        death_rate (float): 确诊病例的死亡比例
+        recovery_delay (int): 确诊到康复的天数
+        death_delay (int): 确诊到死亡的天数
+
+    Returns:
+        pandas.DataFrame: 按报告日期、地区排列的数据，列与真实数据相同
+    """
+    rng = np.random.default_rng(seed)
+    names, population = region_table(regions, rng)
+    waves = waves if waves is not None else max(1, days // 120)
+
+    # 各地区共享同一条基准曲线，但有各自的时间偏移和强度系数
+    max_lag = 14
+    curve = epidemic_curve(days + max_lag, waves, rng)
+    lag = rng.integers(0, max_lag + 1, regions)
+    strength = rng.lognormal(0.0, 0.35, regions)
+    day_index = np.arange(days)[:, None]
+    # 周末报告数偏低
+    weekday_factor = np.where((day_index % 7) >= 5, 0.85, 1.0)
+    noise = rng.lognormal(0.0, 0.15, (days, regions))
+    expected = curve[day_index + lag] * strength * weekday_factor * noise * (population / 1e5)
+
+    new_cases = rng.poisson(expected)
+    # 每批确诊病例按比例死亡，其余康复，分别在固定天数后报告
+    cohort_deaths = rng.binomial(new_cases, death_rate)
+    cohort_recovered = new_cases - cohort_deaths
+    new_deaths = np.zeros_like(new_cases)
+    new_deaths[death_delay:] = cohort_deaths[:days - death_delay]
+    new_recovered = np.zeros_like(new_cases)
+    new_recovered[recovery_delay:] = cohort_recovered[:days - recovery_delay]
+
+    total_cases = np.cumsum(new_cases, axis=0)
+    total_recovered = np.cumsum(new_recovered, axis=0)
+    total_deaths = np.cumsum(new_deaths, axis=0)
+    active = total_cases - total_recovered - total_deaths
+    incidence = active / population * 1e5
+    risk_codes = np.searchsorted(RISK_THRESHOLDS, incidence, side='left').astype(np.int8)
+
+    dates = pd.date_range(start, periods=days, freq='D').to_numpy()
+    data = {
+        '报告日期': np.repeat(dates, regions),
+        '地区名称': pd.Categorical.from_codes(np.tile(np.arange(regions, dtype=np.int32), days), names),
+        '新增确诊': new_cases.ravel(),
+        '累计确诊': total_cases.ravel(),
+        '现存确诊': active.ravel(),
+        '新增康复': new_recovered.ravel(),
+        '累计康复': total_recovered.ravel(),
+        '新增死亡': new_deaths.ravel(),
+        '累计死亡': total_deaths.ravel(),
+        '发病率(每10万人)': incidence.ravel(),
+        '人口': np.broadcast_to(population, (days, regions)).ravel(),
+        '风险等级': pd.Categorical.from_codes(risk_codes.ravel(), RISK_LEVELS),
+    }
+    return pd.DataFrame(data, columns=SCHEMA_COLUMNS, copy=False)
+
+
+def write_dataset(df, path):
+    """
+    按扩展名写出数据集
+
+    .xlsx 和 .csv 与真实数据文件格式相同；其他路径视为目录，
+    写入与列式缓存相同结构的.npy文件（可用 data_cache.read_cache 直接内存映射读取）。
+    """
+    lower = path.lower()
+    if lower.endswith('.xlsx'):
+        if len(df) > XLSX_MAX_ROWS:
+            raise ValueError(f"xlsx最多容纳{XLSX_MAX_ROWS}行数据，当前为{len(df)}行，请改用csv或列式格式")
+        out = df.copy()
+        out['报告日期'] = out['报告日期'].dt.strftime('%Y-%m-%d')
+        out.to_excel(path, index=False)
+    elif lower.endswith('.csv'):
+        out = df.copy()
+        out['报告日期'] = out['报告日期'].dt.strftime('%Y-%m-%d')
+        out.to_csv(path, index=False)
+    else:
+        from data_cache import write_cache
+        if os.path.exists(path):
+            raise ValueError(f"输出目录已存在: {path}")
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        digest = hashlib.sha256(f"synthetic:{len(df)}:{os.path.basename(path)}".encode('utf-8')).hexdigest()
+        write_cache(df, os.path.abspath(path), digest)
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='生成与香港各区疫情数据结构相同的大规模合成数据')
+    parser.add_argument('-o', '--output', required=True,
+                        help='输出路径：.xlsx/.csv文件，或列式.npy数据目录')
+    parser.add_argument('--days', type=int, default=180, help='天数')
+    parser.add_argument('--regions', type=int, default=18, help='地区数（前18个为真实的香港18区）')
+    parser.add_argument('--start', default='2022-01-01', help='起始日期')
+    parser.add_argument('--waves', type=int, help='疫情波次数（默认每120天一波）')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    df = generate(args.days, args.regions, args.start, args.waves, args.seed)
+    generated = time.perf_counter() - start
+    print(f"✅ 已生成 {len(df):,} 行数据（{args.days}天 × {args.regions}个地区），用时 {generated:.2f} 秒")
+
+    try:
+        write_dataset(df, args.output)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"💾 已写入 {args.output}，用时 {time.perf_counter() - start - generated:.2f} 秒")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+香港疫情数据可视化大屏 - 列式二进制响应格式
+时间序列接口（每日趋势、滚动窗口指标等）在请求头 Accept 为 COLUMNAR_MIMETYPE（或参数 format=columnar）时
+返回此格式，前端直接在响应的ArrayBuffer上建立类型化数组视图，不解析JSON：
+
+    魔数 b'HKCF' | 格式版本 u8 | 保留 3字节 | 头部长度 u32 | 保留 4字节
+    头部JSON（UTF-8） | 各列数据（每列起点按8字节对齐，小端序）
+
+头部为 {"rows": 行数, "columns": [{name, type, offset, encoding?, start?, path?}], "meta": {其余字段}}：
+    dates        日期列：相对1970-01-01的天数做差分（第一个值存在start中），存为最小的整数类型，
+                 日期连续时每天只占1字节
+    整数列       能容纳取值范围的最小有符号整数类型
+    小数列       取值已按小数位数舍入时（如滚动窗口指标）存为 值×10^scale 的最小整数类型，
+                 null存为该类型的最小值（列的null字段）；无法缩放为int32时存为float64，null为NaN
+与日期列等长的列表（或NumPy数组）编码为列，其他字段原样放入meta；
+嵌套字典（如多地区序列 {"regions": {地区: {字段: 序列}}}）中的序列同样编码为列，列的path为完整的键路径。
+"""
+
+import json
+import struct
+
+import numpy as np
+
+from compact_dataset import smallest_int_dtype
+
+COLUMNAR_MIMETYPE = 'application/vnd.hkdashboard.columnar'
+
+MAGIC = b'HKCF'
+FORMAT_VERSION = 1
+
+# 魔数、格式版本、保留、头部长度、保留
+PREAMBLE = struct.Struct('<4sB3xI4x')
+
+# 列数据的对齐字节数（Float64Array视图要求起点为8的倍数）
+ALIGNMENT = 8
+
+# 小数列最多尝试的小数位数
+MAX_SCALE = 6
+
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def _align(n):
+    return -n % ALIGNMENT
+
+
+def _date_column(labels):
+    """YYYY-MM-DD 列表 -> (差分后的天数数组, 第一天的天数)"""
+    days = (np.array(labels, dtype='datetime64[D]') - EPOCH).astype(np.int64)
+    if not len(days):
+        return days.astype(np.int8), 0
+    deltas = np.diff(days, prepend=days[0])
+    return deltas.astype(smallest_int_dtype(deltas)), int(days[0])
+
+
+def _scaled_column(values):
+    """
+    小数列按最少的小数位数缩放为整数
+
+    Returns:
+        tuple: (整数数组, 列的附加字段)；无法在int32内精确表示时为 (None, None)
+    """
+    finite = np.isfinite(values)
+    if not np.array_equal(finite, ~np.isnan(values)):
+        return None, None
+    present = values[finite]
+    for scale in range(MAX_SCALE + 1):
+        if np.array_equal(np.round(present, scale), present):
+            break
+    else:
+        return None, None
+    scaled = np.round(present * 10.0 ** scale)
+    # 留出该类型的最小值表示null
+    bounds = np.array([scaled.min(initial=0) - (not finite.all()), scaled.max(initial=0)])
+    if np.abs(bounds).max() >= 2 ** 31:
+        return None, None
+    dtype = smallest_int_dtype(bounds.astype(np.int64))
+    column = np.full(len(values), np.iinfo(dtype).min, dtype=dtype)
+    column[finite] = scaled
+    extra = {'scale': scale}
+    if not finite.all():
+        extra['null'] = int(np.iinfo(dtype).min)
+    return column, extra
+
+
+def _value_column(values):
+    """
+    数值列表 -> (数组, 列的附加字段)；不是数值列表时数组为None
+
+    整数列为最小整数类型，超出int32时存为float64（JavaScript没有对应的类型化数组，2^53以内精确）；
+    小数列和含null的列先尝试缩放为整数，否则为float64
+    """
+    array = np.asarray(values)
+    if array.ndim != 1:
+        return None, {}
+    if array.dtype.kind in 'iub':
+        dtype = smallest_int_dtype(array)
+        return array.astype(np.float64 if dtype == np.int64 else dtype, copy=False), {}
+    if array.dtype.kind == 'f':
+        array = array.astype(np.float64, copy=False)
+    elif array.dtype.kind == 'O' and all(v is None or isinstance(v, (int, float)) for v in values):
+        array = np.array(values, dtype=np.float64)
+    else:
+        return None, {}
+    scaled, extra = _scaled_column(array)
+    if scaled is not None:
+        return scaled, extra
+    return array, {}
+
+
+def encode(payload, date_field='dates'):
+    """
+    把时间序列响应字典编码为列式二进制
+
+    Args:
+        payload (dict): 含日期列表 date_field 的响应字典（可嵌套字典）
+        date_field (str): 日期列的字段名（顶层）
+
+    Returns:
+        bytes: 编码结果
+
+    Raises:
+        ValueError: 响应中没有日期列
+    """
+    if date_field not in payload:
+        raise ValueError(f"列式格式需要日期列: {date_field}")
+    rows = len(payload[date_field])
+    columns, arrays = [], []
+
+    def collect(fields, path):
+        """把字典中的序列收集为列，返回剩余字段（放入meta）"""
+        rest = {}
+        for name, value in fields.items():
+            if isinstance(value, dict):
+                nested = collect(value, path + [name])
+                if nested or not value:
+                    rest[name] = nested
+                continue
+            if not path and name == date_field:
+                array, start = _date_column(value)
+                column = {'name': name, 'encoding': 'day-delta', 'start': start}
+            else:
+                is_series = isinstance(value, (list, np.ndarray)) and len(value) == rows
+                array, extra = _value_column(value) if is_series else (None, {})
+                if array is None:
+                    rest[name] = value.tolist() if isinstance(value, np.ndarray) else value
+                    continue
+                column = {'name': name, **extra}
+                if path:
+                    column['path'] = path + [name]
+            column['type'] = array.dtype.name
+            columns.append(column)
+            arrays.append(array)
+        return rest
+
+    meta = collect(payload, [])
+
+    # 先用占位偏移量确定头部长度，再回填各列偏移（偏移位数可能变化，重复至稳定）
+    offsets = [0] * len(arrays)
+    while True:
+        for column, offset in zip(columns, offsets):
+            column['offset'] = offset
+        header = json.dumps({'rows': rows, 'columns': columns, 'meta': meta},
+                            ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        position = PREAMBLE.size + len(header)
+        new_offsets = []
+        for array in arrays:
+            position += _align(position)
+            new_offsets.append(position)
+            position += array.nbytes
+        if new_offsets == offsets:
+            break
+        offsets = new_offsets
+
+    parts = [PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)), header]
+    position = PREAMBLE.size + len(header)
+    for array, offset in zip(arrays, offsets):
+        parts.append(b'\0' * (offset - position))
+        data = array.astype(array.dtype.newbyteorder('<'), copy=False).tobytes()
+        parts.append(data)
+        position = offset + len(data)
+    return b''.join(parts)
+
+
+def decode(body):
+    """
+    解码列式二进制（Python客户端和基准测试使用）
+
+    Returns:
+        dict: 字段名 -> 值（嵌套列放回原来的键路径）；日期列还原为 YYYY-MM-DD 列表，其他列为NumPy数组
+            （整数列直接引用body，不复制；缩放的小数列还原为float64，null为NaN）
+
+    Raises:
+        ValueError: 不是列式格式或格式版本不支持
+    """
+    magic, version, header_length = PREAMBLE.unpack_from(body)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("不是可识别的列式响应")
+    header = json.loads(body[PREAMBLE.size:PREAMBLE.size + header_length])
+    rows = header['rows']
+    result = dict(header['meta'])
+    for column in header['columns']:
+        values = np.frombuffer(body, dtype=np.dtype(column['type']).newbyteorder('<'),
+                               count=rows, offset=column['offset'])
+        if column.get('encoding') == 'day-delta':
+            days = column['start'] + np.cumsum(values, dtype=np.int64)
+            values = (EPOCH + days.astype('timedelta64[D]')).astype(str).tolist()
+        elif 'scale' in column:
+            restored = values / 10.0 ** column['scale']
+            if 'null' in column:
+                restored[values == column['null']] = np.nan
+            values = restored
+        target = result
+        for key in column.get('path', [column['name']])[:-1]:
+            target = target.setdefault(key, {})
+        target[column['name']] = values
+    return result
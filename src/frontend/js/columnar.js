@@ -0,0 +1,80 @@
+// 香港疫情数据可视化大屏 - 列式二进制响应解码（格式见 src/backend/wire_format.py）
+
+// 列式响应的MIME类型，请求时放在Accept头中
+const COLUMNAR_MIME = 'application/vnd.hkdashboard.columnar';
+
+// 列类型 -> 类型化数组构造函数
+const COLUMN_TYPES = {
+    int8: Int8Array,
+    int16: Int16Array,
+    int32: Int32Array,
+    float64: Float64Array
+};
+
+// 文件头：魔数(4) + 格式版本(1) + 保留(3) + 头部长度(4) + 保留(4)
+const COLUMNAR_PREAMBLE = 16;
+const COLUMNAR_MAGIC = 'HKCF';
+const COLUMNAR_VERSION = 1;
+
+// 把列式响应解码为 {字段名: 值}：整数列为直接建立在buffer上的类型化数组（不复制），
+// 缩放存储的小数列还原为Float64Array（null为NaN），
+// 日期列为天数（相对1970-01-01）的Int32Array，可用 dayLabels 转换为 YYYY-MM-DD；
+// 嵌套的列（带path，如多地区序列）放回原来的键路径
+function decodeColumnar(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+    if (magic !== COLUMNAR_MAGIC || view.getUint8(4) !== COLUMNAR_VERSION) {
+        throw new Error('不是可识别的列式响应');
+    }
+    const headerLength = view.getUint32(8, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, COLUMNAR_PREAMBLE, headerLength)));
+    const result = Object.assign({}, header.meta);
+
+    header.columns.forEach(column => {
+        const ArrayType = COLUMN_TYPES[column.type];
+        if (!ArrayType) {
+            throw new Error(`不支持的列类型: ${column.type}`);
+        }
+        // 各列起点按8字节对齐，数据为小端序（与所有主流浏览器的字节序一致）
+        let values = new ArrayType(buffer, column.offset, header.rows);
+        if (column.encoding === 'day-delta') {
+            // 差分还原为天数
+            const days = new Int32Array(header.rows);
+            let day = column.start;
+            for (let i = 0; i < values.length; i++) {
+                day += values[i];
+                days[i] = day;
+            }
+            values = days;
+        } else if (column.scale !== undefined) {
+            // 整数除以10^scale还原小数，与服务器端舍入后的值一致
+            const divisor = Math.pow(10, column.scale);
+            const restored = new Float64Array(header.rows);
+            for (let i = 0; i < values.length; i++) {
+                restored[i] = values[i] === column.null ? NaN : values[i] / divisor;
+            }
+            values = restored;
+        }
+        const path = column.path || [column.name];
+        let target = result;
+        path.slice(0, -1).forEach(key => {
+            target = target[key] = target[key] || {};
+        });
+        target[column.name] = values;
+    });
+    return result;
+}
+
+// 天数（相对1970-01-01）转换为 YYYY-MM-DD 标签
+function dayLabels(days) {
+    const labels = new Array(days.length);
+    for (let i = 0; i < days.length; i++) {
+        labels[i] = new Date(days[i] * 86400000).toISOString().slice(0, 10);
+    }
+    return labels;
+}
+
+// Node.js中（基准测试）作为模块导出
+if (typeof module !== 'undefined' && module.exports) {
+    module.exports = { COLUMNAR_MIME, decodeColumnar, dayLabels };
+}
@@ -3,12 +3,34 @@
 // 全局变量
 let charts = {};
 let updateInterval;
+// 数据更新推送连接（Server-Sent Events）
+let eventSource;
+// 当前展示的数据版本
+let dataVersion = null;
+// 各接口最近一次响应的ETag和数据，用于条件请求
+let responseCache = {};
+// 每日趋势最多绘制的点数：更长的序列由服务器LTTB降采样（保留峰值），与后端DASHBOARD_TREND_MAX_POINTS一致
+const TREND_MAX_POINTS = 1000;
+// 与每日趋势分开请求的面板（每日趋势以列式二进制格式单独请求）
+const PAGE_PANELS = ['summary_stats', 'regional_comparison', 'risk_distribution', 'monthly_statistics'];
+// 每日趋势超过此点数时按长序列绘制：不画数据点标记、不做平滑，渲染时按像素LTTB采样
+const LONG_TREND_POINTS = 366;
+// 每日趋势图当前绘制的序列，推送的增量点追加在末尾
+let trendSeries = { dates: [], cases: [] };
+// 当前下钻查看的地区（null表示未打开）
+let drilldownRegion = null;
+// 地区下钻图的各条曲线：接口字段名、名称、颜色、使用的纵轴（现存确诊量级较大，用右侧纵轴）
+const REGION_SERIES = [
+    { field: 'new_cases', name: '新增确诊', color: '#e74c3c', yAxisIndex: 0 },
+    { field: 'recovered', name: '新增康复', color: '#27ae60', yAxisIndex: 0 },
+    { field: 'deaths', name: '新增死亡', color: '#8e44ad', yAxisIndex: 0 },
+    { field: 'active_cases', name: '现存确诊', color: '#3498db', yAxisIndex: 1 }
+];
 
 // 页面加载完成后初始化
 document.addEventListener('DOMContentLoaded', function() {
     console.log('🚀 初始化香港疫情数据可视化大屏...');
     initializeDashboard();
-    startAutoUpdate();
 });
 
 // 初始化大屏
@@ -20,8 +42,8 @@ function initializeDashboard() {
         // 初始化所有图表
         initializeCharts();
         
-        // 加载所有数据
-        loadAllData();
+        // 加载所有数据，完成后开始接收数据更新
+        loadAllData().then(startAutoUpdate);
         
         console.log('✅ 大屏初始化完成');
     } catch (error) {
@@ -51,38 +73,23 @@ function updateCurrentTime() {
     }
 }
 
-// 加载所有数据
-async function loadAllData() {
+// 加载所有数据（refresh为true时是刷新，跳过动画）
+async function loadAllData(refresh = false) {
     try {
         console.log('📊 开始加载数据...');
         
-        // 并行加载所有数据
-        const [summaryData, dailyData, regionalData, riskData, monthlyData] = await Promise.all([
-            fetchData('/api/summary_stats'),
-            fetchData('/api/daily_trend'),
-            fetchData('/api/regional_comparison'),
-            fetchData('/api/risk_distribution'),
-            fetchData('/api/monthly_statistics')
+        // 每日趋势以列式格式请求（直接解码为类型化数组），其余面板一次请求获取
+        const [dashboardData, trendData] = await Promise.all([
+            fetchData(`/api/dashboard?panels=${PAGE_PANELS.join(',')}`),
+            fetchData(`/api/daily_trend?max_points=${TREND_MAX_POINTS}`, true)
         ]);
-        
-        // 更新统计卡片
-        if (summaryData && !summaryData.error) {
-            updateSummaryCards(summaryData);
-        }
-        
-        // 更新图表数据
-        if (dailyData && !dailyData.error) {
-            updateChartData('dailyTrend', dailyData);
-        }
-        if (regionalData && !regionalData.error) {
-            updateChartData('regional', regionalData);
-        }
-        if (riskData && !riskData.error) {
-            updateChartData('risk', riskData);
-        }
-        if (monthlyData && !monthlyData.error) {
-            updateChartData('monthly', monthlyData);
+        for (const data of [dashboardData, trendData]) {
+            if (!data || data.error) {
+                throw new Error(data ? data.error : '无响应');
+            }
         }
+        dataVersion = dashboardData.version;
+        applyPanels(Object.assign({ daily_trend: trendData }, dashboardData.panels), refresh);
         
         console.log('✅ 所有数据加载完成');
     } catch (error) {
@@ -91,14 +98,49 @@ async function loadAllData() {
     }
 }
 
-// 获取数据的通用函数
-async function fetchData(url) {
+// 把各面板数据更新到卡片和图表（只更新传入的面板；refresh为true时跳过动画）
+function applyPanels(panels, refresh = false) {
+    // 更新统计卡片
+    if (panels.summary_stats) {
+        updateSummaryCards(panels.summary_stats, refresh);
+    }
+    
+    // 更新图表数据
+    if (panels.daily_trend) {
+        updateChartData('dailyTrend', panels.daily_trend, refresh);
+    }
+    if (panels.regional_comparison) {
+        updateChartData('regional', panels.regional_comparison, refresh);
+    }
+    if (panels.risk_distribution) {
+        updateChartData('risk', panels.risk_distribution, refresh);
+    }
+    if (panels.monthly_statistics) {
+        updateChartData('monthly', panels.monthly_statistics, refresh);
+    }
+}
+
+// 获取数据的通用函数（携带If-None-Match，数据未变化时服务器返回304；columnar为true时请求列式格式并解码）
+async function fetchData(url, columnar = false) {
     try {
-        const response = await fetch(url);
+        const cached = responseCache[url];
+        const headers = columnar ? { 'Accept': COLUMNAR_MIME } : {};
+        if (cached) {
+            headers['If-None-Match'] = cached.etag;
+        }
+        const response = await fetch(url, { headers });
+        if (response.status === 304 && cached) {
+            return cached.data;
+        }
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
-        return await response.json();
+        const data = columnar ? decodeColumnar(await response.arrayBuffer()) : await response.json();
+        const etag = response.headers.get('ETag');
+        if (etag) {
+            responseCache[url] = { etag, data };
+        }
+        return data;
     } catch (error) {
         console.error(`获取数据失败 ${url}:`, error);
         return { error: error.message };
@@ -106,20 +148,20 @@ async function fetchData(url) {
 }
 
 // 更新统计卡片
-function updateSummaryCards(data) {
+function updateSummaryCards(data, refresh = false) {
     try {
-        animateNumber('totalCases', data.total_cases);
-        animateNumber('avgDaily', data.avg_daily);
-        animateNumber('maxDaily', data.max_daily);
-        animateNumber('totalRecovered', data.total_recovered);
-        animateNumber('totalDeaths', data.total_deaths);
+        animateNumber('totalCases', data.total_cases, !refresh);
+        animateNumber('avgDaily', data.avg_daily, !refresh);
+        animateNumber('maxDaily', data.max_daily, !refresh);
+        animateNumber('totalRecovered', data.total_recovered, !refresh);
+        animateNumber('totalDeaths', data.total_deaths, !refresh);
     } catch (error) {
         console.error('统计卡片更新失败:', error);
     }
 }
 
-// 数字动画效果
-function animateNumber(elementId, targetValue) {
+// 数字动画效果（animate为false时直接显示目标值）
+function animateNumber(elementId, targetValue, animate = true) {
     try {
         const element = document.getElementById(elementId);
         if (!element) {
@@ -127,6 +169,11 @@ function animateNumber(elementId, targetValue) {
             return;
         }
         
+        if (!animate) {
+            element.textContent = Math.floor(targetValue).toLocaleString();
+            return;
+        }
+        
         const startValue = 0;
         const duration = 2000;
         const startTime = performance.now();
@@ -161,10 +208,15 @@ function initializeCharts() {
             charts.dailyTrend = echarts.init(dailyTrendElement);
         }
         
-        // 区域对比图
+        // 区域对比图（点击地区下钻查看该地区的每日数据）
         const regionalElement = document.getElementById('regionalChart');
         if (regionalElement) {
             charts.regional = echarts.init(regionalElement);
+            charts.regional.on('click', params => showRegionSeries(params.name));
+        }
+        const closeButton = document.getElementById('regionDrilldownClose');
+        if (closeButton) {
+            closeButton.addEventListener('click', hideRegionSeries);
         }
         
         // 风险等级分布图
@@ -408,21 +460,20 @@ function setDefaultChartOptions() {
     }
 }
 
-// 更新图表数据
-function updateChartData(chartName, data) {
+// 更新图表数据（首次加载带入场动画，刷新时不播放动画）
+function updateChartData(chartName, data, refresh = false) {
     try {
         if (!charts[chartName] || !data) return;
+        const animation = !refresh;
         
         switch(chartName) {
             case 'dailyTrend':
-                charts.dailyTrend.setOption({
-                    xAxis: { data: data.dates },
-                    series: [{ data: data.cases }]
-                });
+                updateTrendChart(data, animation);
                 break;
                 
             case 'regional':
                 charts.regional.setOption({
+                    animation,
                     yAxis: { data: data.regions },
                     series: [{ data: data.cases }]
                 });
@@ -435,6 +486,7 @@ function updateChartData(chartName, data) {
                     '高风险': '#e74c3c'
                 };
                 charts.risk.setOption({
+                    animation,
                     series: [{
                         data: data.risk_levels.map((level, index) => ({
                             value: data.counts[index],
@@ -447,6 +499,7 @@ function updateChartData(chartName, data) {
                 
             case 'monthly':
                 charts.monthly.setOption({
+                    animation,
                     xAxis: { data: data.months },
                     series: [
                         { data: data.new_cases },
@@ -461,14 +514,147 @@ function updateChartData(chartName, data) {
     }
 }
 
+// 更新每日趋势图：增量数据（带since字段）追加到当前序列末尾，完整数据整体替换
+function updateTrendChart(data, animation) {
+    if (data.since !== undefined) {
+        const last = trendSeries.dates[trendSeries.dates.length - 1];
+        if (last === undefined || last < data.since) {
+            // 本地序列与增量的起点衔接不上，重新加载完整数据
+            loadAllData(true);
+            return;
+        }
+        // 去掉游标之后的本地点（正常情况下没有），再追加新增的点
+        let keep = trendSeries.dates.length;
+        while (keep > 0 && trendSeries.dates[keep - 1] > data.since) {
+            keep--;
+        }
+        trendSeries.dates.length = keep;
+        trendSeries.cases.length = keep;
+        trendSeries.dates.push(...data.dates);
+        trendSeries.cases.push(...data.cases);
+    } else {
+        // 列式响应的日期为天数数组；ECharts类目轴的折线只接受普通数组，类型化数组在此复制一次
+        trendSeries = {
+            dates: ArrayBuffer.isView(data.dates) ? dayLabels(data.dates) : data.dates.slice(),
+            cases: Array.from(data.cases)
+        };
+    }
+    
+    // 合并模式的setOption只提交坐标轴数据和序列数据，其余配置保持不变
+    const long = trendSeries.dates.length > LONG_TREND_POINTS;
+    charts.dailyTrend.setOption({
+        animation,
+        xAxis: { data: trendSeries.dates },
+        series: [{
+            data: trendSeries.cases,
+            showSymbol: !long,
+            smooth: !long,
+            sampling: 'lttb'
+        }]
+    });
+}
+
+// 打开地区下钻图：以列式格式请求该地区的完整每日序列（refresh为true时是数据更新后的刷新，不播放动画）
+async function showRegionSeries(region, refresh = false) {
+    try {
+        const container = document.getElementById('regionDrilldown');
+        if (!container || !region) return;
+        
+        const data = await fetchData(`/api/region/${encodeURIComponent(region)}/series`, true);
+        if (!data || data.error) {
+            throw new Error(data ? data.error : '无响应');
+        }
+        drilldownRegion = region;
+        document.getElementById('regionDrilldownTitle').textContent = region;
+        // 先显示容器再初始化图表，ECharts才能取得容器尺寸
+        container.hidden = false;
+        if (!charts.regionSeries) {
+            charts.regionSeries = echarts.init(document.getElementById('regionSeriesChart'));
+            setRegionSeriesOptions();
+        } else {
+            // 隐藏期间窗口尺寸可能变化过
+            charts.regionSeries.resize();
+        }
+        
+        const long = data.dates.length > LONG_TREND_POINTS;
+        charts.regionSeries.setOption({
+            animation: !refresh,
+            xAxis: { data: dayLabels(data.dates) },
+            series: REGION_SERIES.map(item => ({
+                data: Array.from(data[item.field]),
+                showSymbol: !long
+            }))
+        });
+        if (!refresh) {
+            container.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+        }
+    } catch (error) {
+        console.error(`地区数据加载失败 ${region}:`, error);
+        showError(`${region} 的每日数据加载失败`);
+    }
+}
+
+// 地区下钻图的固定配置
+function setRegionSeriesOptions() {
+    charts.regionSeries.setOption({
+        tooltip: {
+            trigger: 'axis',
+            backgroundColor: 'rgba(0,0,0,0.8)',
+            textStyle: { color: '#fff' }
+        },
+        legend: {
+            data: REGION_SERIES.map(item => item.name),
+            top: 'bottom'
+        },
+        grid: {
+            left: '3%',
+            right: '4%',
+            bottom: '12%',
+            containLabel: true
+        },
+        xAxis: {
+            type: 'category',
+            boundaryGap: false,
+            axisLine: { lineStyle: { color: '#ddd' } }
+        },
+        yAxis: [
+            { type: 'value', name: '每日新增', axisLine: { lineStyle: { color: '#ddd' } } },
+            { type: 'value', name: '现存确诊', splitLine: { show: false }, axisLine: { lineStyle: { color: '#ddd' } } }
+        ],
+        series: REGION_SERIES.map(item => ({
+            name: item.name,
+            type: 'line',
+            yAxisIndex: item.yAxisIndex,
+            sampling: 'lttb',
+            lineStyle: { color: item.color, width: 2 },
+            itemStyle: { color: item.color }
+        })),
+        animationDuration: 1000
+    });
+}
+
+// 关闭地区下钻图
+function hideRegionSeries() {
+    drilldownRegion = null;
+    const container = document.getElementById('regionDrilldown');
+    if (container) {
+        container.hidden = true;
+    }
+}
+
 // 开始自动更新
 function startAutoUpdate() {
     try {
         // 每30秒更新一次时间
         setInterval(updateCurrentTime, 30000);
         
-        // 每5分钟重新加载数据
-        updateInterval = setInterval(loadAllData, 300000);
+        if (window.EventSource) {
+            // 订阅服务器推送：数据变化时只收到发生变化的面板
+            subscribeUpdates();
+        } else {
+            // 浏览器不支持SSE时退回每5分钟重新加载数据
+            updateInterval = setInterval(() => loadAllData(true), 300000);
+        }
         
         console.log('✅ 自动更新已启动');
     } catch (error) {
@@ -476,6 +662,37 @@ function startAutoUpdate() {
     }
 }
 
+// 订阅数据更新推送（断线后浏览器会携带Last-Event-ID自动重连）
+function subscribeUpdates() {
+    try {
+        const url = dataVersion ? `/api/stream?since=${encodeURIComponent(dataVersion)}` : '/api/stream';
+        eventSource = new EventSource(url);
+        
+        eventSource.addEventListener('update', function(event) {
+            try {
+                const update = JSON.parse(event.data);
+                dataVersion = update.version;
+                // 每日趋势面板为自上个版本以来新增的点
+                applyPanels(update.panels || {}, true);
+                // 打开着的地区下钻图一并刷新（数据未变化时服务器返回304）
+                if (drilldownRegion) {
+                    showRegionSeries(drilldownRegion, true);
+                }
+                updateCurrentTime();
+                console.log(`🔄 数据已更新 (${update.changed.join(', ')})`);
+            } catch (error) {
+                console.error('推送数据处理失败:', error);
+            }
+        });
+        
+        eventSource.onerror = function() {
+            console.warn('⚠️ 推送连接中断，正在重连...');
+        };
+    } catch (error) {
+        console.error('推送订阅失败:', error);
+    }
+}
+
 // 显示错误信息
 function showError(message) {
     console.error(message);
@@ -520,6 +737,9 @@ window.addEventListener('beforeunload', function() {
         if (updateInterval) {
             clearInterval(updateInterval);
         }
+        if (eventSource) {
+            eventSource.close();
+        }
     } catch (error) {
         console.error('清理失败:', error);
     }
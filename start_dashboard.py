@@ -5,6 +5,7 @@
 一键启动整个应用
 """
 
+import argparse
 import os
 import sys
 import subprocess
@@ -34,16 +35,16 @@ def check_dependencies():
 
 def check_data_file():
     """检查数据文件"""
-    data_file = Path("data/香港各区疫情数据_20250322.xlsx")
-    if not data_file.exists():
-        print(f"❌ 数据文件不存在: {data_file}")
+    snapshots = sorted(Path("data").glob("香港各区疫情数据_*.xlsx")) + sorted(Path("data").glob("香港各区疫情数据_*.csv"))
+    if not snapshots:
+        print("❌ 数据文件不存在: data/香港各区疫情数据_YYYYMMDD.xlsx")
         return False
     
-    print("✅ 数据文件存在")
+    print(f"✅ 数据文件存在（{len(snapshots)}个快照）")
     return True
 
 def start_application():
-    """启动应用"""
+    """启动应用（开发模式：Flask调试服务器）"""
     print("🚀 正在启动香港疫情数据可视化大屏...")
     
     # 切换到backend目录
@@ -79,8 +80,53 @@ def start_application():
     
     return True
 
+def start_production(host, port, workers):
+    """
+    启动应用（生产模式：多进程预派生服务器）
+    
+    主进程加载数据并预热响应缓存后fork工作进程，数据通过写时复制共享；
+    数据文件变化或收到SIGHUP时平滑重载工作进程。
+    """
+    if not hasattr(os, 'fork'):
+        print("⚠️ 当前平台不支持fork，改用开发模式启动")
+        return start_application()
+    
+    backend_path = Path("src/backend")
+    if not backend_path.exists():
+        print("❌ 后端目录不存在")
+        return False
+    
+    print(f"🚀 正在以生产模式启动香港疫情数据可视化大屏（{workers}个工作进程）...")
+    sys.path.insert(0, str(backend_path.resolve()))
+    import app as dashboard_app
+    from prefork_server import PreforkServer
+    
+    print(f"📊 访问地址: http://{'localhost' if host == '0.0.0.0' else host}:{port}")
+    server = PreforkServer(dashboard_app.app, dashboard_app.dataset_store, dashboard_app.warm_up,
+                           host=host, port=port, workers=workers, metrics=dashboard_app.request_metrics)
+    try:
+        server.serve()
+    except Exception as e:
+        print(f"❌ 启动失败: {e}")
+        return False
+    
+    return True
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='香港疫情数据可视化大屏启动器')
+    parser.add_argument('--dev', action='store_true',
+                        help='开发模式：Flask调试服务器（单进程，自动打开浏览器）')
+    parser.add_argument('--host', default='0.0.0.0', help='监听地址（生产模式）')
+    parser.add_argument('--port', type=int, default=8080, help='监听端口（生产模式）')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                        help='工作进程数（生产模式，默认为CPU核数）')
+    return parser.parse_args()
+
 def main():
     """主函数"""
+    args = parse_args()
+    
     print("=" * 60)
     print("🏥 香港疫情数据可视化大屏启动器")
     print("=" * 60)
@@ -94,7 +140,10 @@ def main():
         return
     
     # 启动应用
-    start_application()
+    if args.dev:
+        start_application()
+    else:
+        start_production(args.host, args.port, args.workers)
 
 if __name__ == "__main__":
     main()